@@ -1,66 +1,223 @@
 import discord
 from discord.ext import commands
 import asyncio
+import hashlib
+import json
 import os
+import sys
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
-bot = commands.Bot(command_prefix="!", intents=discord.Intents.all())
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 STATUS_FILE = os.path.join(SCRIPT_DIR, "status.txt")
+CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.json")
+COMMAND_HASH_FILE = os.path.join(SCRIPT_DIR, "databases", "command_tree.sha256")
+
+EXTENSIONS = [
+    'cogs.dev_cog',
+    'cogs.mail_cog',
+    'cogs.clear_cog',
+    'cogs.help_cog',
+    #'cogs.bump_cog',
+    'cogs.forum_bump_cog',
+    'cogs.nomon_logs_cog',
+    'cogs.embed_cog',
+    'dev_commands',
+    'cogs.shard_status_cog',
+    'cogs.registry_sync_cog',
+    'cogs.reconciler_cog',
+    'cogs.metrics_cog',
+]
+
+# Add current directory to path to find cogs
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+# Add parent directory to path to find cogs in ../cogs
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.insert(0, PARENT_DIR)
+
+from utils.auth_cache import auth_cache
+from utils.database import get_database
+from utils.intents import gateway_options
+from utils.metrics import rest_trace_config
+from utils.registry import duplicate_threads
+from utils.rest_workers import RestWorkerPool
+
 
 def load_status():
     with open(STATUS_FILE, "r") as f:
         return f.read().strip()
 
-@bot.event
-async def on_ready():
-    print(f"{bot.user.name} has awakened and is ready to go! ☁️꒰ঌ( •ө• )໒꒱")
+
+def load_config():
+    with open(CONFIG_FILE, "r") as f:
+        return json.load(f)
+
+
+def shard_settings(config):
+    """Return (enabled, shard_count, shard_ids) from config.json, with NOMON_SHARD_IDS overriding the IDs.
+
+    Several processes can share one config by each setting NOMON_SHARD_IDS, e.g. "0,1" and "2,3".
+    """
+    sharding = config.get('sharding', {})
+    enabled = sharding.get('enabled', False)
+    shard_count = sharding.get('shard_count')
+    shard_ids = sharding.get('shard_ids')
+    if os.getenv('NOMON_SHARD_IDS'):
+        shard_ids = [int(shard_id) for shard_id in os.getenv('NOMON_SHARD_IDS').split(',')]
+        # Each process needs the total to know which guilds are its own; AutoShardedBot rejects shard_ids without it
+        if not enabled or not shard_count:
+            raise ValueError("NOMON_SHARD_IDS is set, so config.json needs sharding.enabled = true "
+                             "and sharding.shard_count set to the total number of shards across all processes")
+        if any(not 0 <= shard_id < shard_count for shard_id in shard_ids):
+            raise ValueError(f"NOMON_SHARD_IDS {shard_ids} must be between 0 and sharding.shard_count - 1 ({shard_count - 1})")
+    return enabled, shard_count, shard_ids
+
+
+def command_tree_hash(tree):
+    payloads = []
+    for command in tree.get_commands():
+        try:
+            payloads.append(command.to_dict(tree))
+        except TypeError:
+            # Older discord.py versions take no tree argument
+            payloads.append(command.to_dict())
+    payloads.sort(key=lambda payload: payload['name'])
+    return hashlib.sha256(json.dumps(payloads, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def read_command_hash():
     try:
-        # Add current directory to path to find cogs
-        import sys
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        if current_dir not in sys.path:
-            sys.path.insert(0, current_dir)
-
-        # Add parent directory to path to find cogs in ../cogs
-        parent_dir = os.path.dirname(current_dir)
-        if parent_dir not in sys.path:
-            sys.path.insert(0, parent_dir)
-
-        await bot.load_extension('cogs.dev_cog')
-        print("Dev cog loaded successfully.")
-        await bot.load_extension('cogs.mail_cog')
-        print("Mail cog loaded successfully.")
-
-        await bot.load_extension('cogs.clear_cog')
-        print("Clear cog loaded successfully.")
-        await bot.load_extension('cogs.help_cog')
-        print("Help cog loaded successfully.")
-        #await bot.load_extension('cogs.bump_cog')
-        #print("Bump cog loaded successfully.")
-        await bot.load_extension('cogs.forum_bump_cog')
-        print("Forum bump cog loaded successfully.")
-        await bot.load_extension('cogs.nomon_logs_cog')
-        print("Nomon logs cog loaded successfully.")
-        await bot.load_extension('cogs.embed_cog')
-        print("Embed cog loaded successfully.")
-        await bot.load_extension('dev_commands')
-        print("Dev commands cog loaded successfully.")
-        status = load_status()
-        await bot.change_presence(activity=discord.Game(name=status))
-        await bot.tree.sync()
-        synced_commands = [cmd.name for cmd in bot.tree.get_commands()]
-        print(f"Slash commands synced globally successfully. Synced commands: {synced_commands}")
-    except Exception as e:
-        print(f"Failed to load cogs or sync commands: {e}")
-
-
-
-
-
-bot.run(TOKEN)
+        with open(COMMAND_HASH_FILE, "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def write_command_hash(digest):
+    os.makedirs(os.path.dirname(COMMAND_HASH_FILE), exist_ok=True)
+    with open(COMMAND_HASH_FILE, "w") as f:
+        f.write(digest)
+
+
+class NomonBotMixin:
+    def __init__(self, config=None, rest_processes=0, **kwargs):
+        super().__init__(**kwargs)
+        self.config = config or {}
+        self.started_at = time.perf_counter()
+        self.startup_timings = {}
+        self.rest_processes = rest_processes
+        self.rest_pool = None
+        self.failed_extensions = []
+
+    def log_stage(self, stage, started):
+        elapsed = time.perf_counter() - started
+        self.startup_timings[stage] = elapsed
+        print(f"[startup] {stage}: {elapsed:.2f}s")
+
+    async def load_extension_timed(self, name):
+        started = time.perf_counter()
+        try:
+            await self.load_extension(name)
+        except Exception as e:
+            print(f"Failed to load {name}: {e}")
+            self.failed_extensions.append(name)
+            return
+        self.log_stage(f"load {name}", started)
+
+    async def init_database(self):
+        started = time.perf_counter()
+        db = get_database()
+        # Opening the connection applies any pending migrations
+        await db.run(lambda conn: None)
+        duplicates = await db.run(duplicate_threads)
+        if duplicates:
+            print(f"{len(duplicates)} duplicate partner thread(s) are waiting for `python migrate_db.py --delete-duplicates`.")
+        await auth_cache.ensure_loaded(db)
+        self.log_stage("database and auth cache", started)
+
+    async def setup_hook(self):
+        # Runs once per process, before the gateway connects; on_ready can fire again on reconnect
+        if self.rest_processes:
+            # Created before the extensions load so the job queue picks it up
+            self.rest_pool = RestWorkerPool(TOKEN, self.rest_processes)
+            print(f"Running job-queue REST calls in {self.rest_processes} worker process(es).")
+
+        started = time.perf_counter()
+        await asyncio.gather(self.init_database(), *(self.load_extension_timed(name) for name in EXTENSIONS))
+        self.log_stage("database and extensions", started)
+
+        started = time.perf_counter()
+        digest = command_tree_hash(self.tree)
+        shard_ids = getattr(self, 'shard_ids', None)
+        if shard_ids is not None and 0 not in shard_ids:
+            # With several shard processes, only the one owning shard 0 syncs the global tree
+            print("Skipping global sync; shard 0 runs in another process.")
+        elif self.failed_extensions:
+            # Syncing a tree without those cogs would delete their commands globally
+            print(f"Skipping global sync; failed to load {', '.join(self.failed_extensions)}.")
+        elif digest == read_command_hash():
+            print("Slash commands unchanged since last sync, skipping global sync.")
+        else:
+            try:
+                await self.tree.sync()
+                write_command_hash(digest)
+                synced_commands = [cmd.name for cmd in self.tree.get_commands()]
+                print(f"Slash commands synced globally successfully. Synced commands: {synced_commands}")
+            except Exception as e:
+                print(f"Failed to sync commands: {e}")
+        self.log_stage("command tree", started)
+
+    async def on_ready(self):
+        print(f"{self.user.name} has awakened and is ready to go! ☁️꒰ঌ( •ө• )໒꒱")
+        if "time to ready" not in self.startup_timings:
+            self.log_stage("time to ready", self.started_at)
+        try:
+            status = load_status()
+            await self.change_presence(activity=discord.Game(name=status))
+        except Exception as e:
+            print(f"Failed to set status: {e}")
+
+    async def close(self):
+        await super().close()
+        if self.rest_pool is not None:
+            self.rest_pool.shutdown()
+
+
+class NomonBot(NomonBotMixin, commands.Bot):
+    pass
+
+
+class ShardedNomonBot(NomonBotMixin, commands.AutoShardedBot):
+    pass
+
+
+def main():
+    config = load_config()
+    options = gateway_options(config, EXTENSIONS)
+    print(f"Gateway intents: {sorted(name for name, enabled in options['intents'] if enabled)}")
+    rest_processes = config.get('rest_workers', {}).get('processes', 0)
+    if config.get('metrics', {}).get('enabled', False):
+        # Counts and times every REST call by route for /metrics
+        options['http_trace'] = rest_trace_config()
+
+    sharded, shard_count, shard_ids = shard_settings(config)
+    if sharded:
+        bot = ShardedNomonBot(command_prefix="!", shard_count=shard_count, shard_ids=shard_ids,
+                              config=config, rest_processes=rest_processes, **options)
+    else:
+        bot = NomonBot(command_prefix="!", config=config, rest_processes=rest_processes, **options)
+
+    bot.run(TOKEN)
+
+
+# REST worker processes are spawned and re-import this module, so they must not start a bot
+if __name__ == "__main__":
+    main()
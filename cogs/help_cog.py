@@ -2,9 +2,22 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
+from utils.auth_cache import auth_cache
+from utils.database import get_database
+
+# Slash commands need no gateway intents
+INTENTS = []
+
 class HelpCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = get_database()
+
+    async def cog_load(self):
+        try:
+            await auth_cache.ensure_loaded(self.db)
+        except Exception as e:
+            print(f"Failed to load dev list for help: {e}")
 
     @app_commands.command(name='help', description='Shows all available commands')
     async def help(self, interaction: discord.Interaction):
@@ -59,19 +72,7 @@ class HelpCog(commands.Cog):
         )
 
         # Developer Commands (only show if user is dev)
-        is_dev = False
-        try:
-            # Check if user is in dev list
-            import sqlite3
-            conn = sqlite3.connect('databases/bump.db')
-            cursor = conn.cursor()
-            cursor.execute('SELECT user_id FROM devs WHERE user_id = ?', (interaction.user.id,))
-            is_dev = cursor.fetchone() is not None
-            conn.close()
-        except:
-            pass
-
-        if is_dev:
+        if auth_cache.is_dev(interaction.user.id):
             embed.add_field(
                 name="👨‍💻 Developer Commands",
                 value="• `/restart` - Restart the bot (Owner only)\n"
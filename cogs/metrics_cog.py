@@ -0,0 +1,66 @@
+import discord
+from discord.ext import commands
+import math
+
+from utils.metrics import command_latency, gateway_latency, registry, serve_metrics
+
+
+INTENTS = []
+
+
+class MetricsCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.runner = None
+        self.tree_on_error = None
+
+    async def cog_load(self):
+        registry.collectors.append(self.collect_gateway_latency)
+
+        # Wrap the tree's error handler so failed commands are timed too
+        self.tree_on_error = self.bot.tree.on_error
+
+        async def on_error(interaction, error):
+            self.observe(interaction, 'error')
+            await self.tree_on_error(interaction, error)
+
+        self.bot.tree.on_error = on_error
+
+        settings = getattr(self.bot, 'config', {}).get('metrics', {})
+        if settings.get('enabled', False):
+            host, port = settings.get('host', '127.0.0.1'), settings.get('port', 9108)
+            try:
+                self.runner = await serve_metrics(host, port)
+                print(f"Metrics available at http://{host}:{port}/metrics")
+            except OSError as e:
+                print(f"Failed to start metrics endpoint: {e}")
+
+    async def cog_unload(self):
+        if self.collect_gateway_latency in registry.collectors:
+            registry.collectors.remove(self.collect_gateway_latency)
+        if self.tree_on_error is not None:
+            self.bot.tree.on_error = self.tree_on_error
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    def observe(self, interaction, outcome):
+        command = interaction.command.qualified_name if interaction.command else 'unknown'
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        command_latency.observe(command, outcome, value=elapsed)
+
+    def collect_gateway_latency(self):
+        if isinstance(self.bot, commands.AutoShardedBot):
+            latencies = self.bot.latencies
+        else:
+            latencies = [(self.bot.shard_id or 0, self.bot.latency)]
+        for shard_id, latency in latencies:
+            if not (math.isinf(latency) or math.isnan(latency)):
+                gateway_latency.set(shard_id, value=latency)
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction, command):
+        self.observe(interaction, 'ok')
+
+
+async def setup(bot):
+    await bot.add_cog(MetricsCog(bot))
@@ -0,0 +1,97 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+import time
+
+from utils.auth_cache import auth_cache
+from utils.channel_cache import get_channel_resolver
+from utils.database import get_database
+from utils.discord_jobs import get_job_queue
+from utils.reconciler import Reconciler
+from utils.registry import RegistrySync
+from utils.shard_metrics import local_shards
+
+
+INTENTS = ['guilds']
+
+
+class ReconcilerCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        db = get_database()
+        settings = getattr(bot, 'config', {}).get('reconciler', {})
+        self.interval = settings.get('interval_seconds', 10)
+        self.reconciler = Reconciler(
+            db, get_channel_resolver(bot), get_job_queue(bot), RegistrySync(db),
+            batch_size=settings.get('batch_size', 50),
+            rate=settings.get('rest_rate', 2.0),
+            burst=settings.get('rest_burst', 20),
+            slice_seconds=settings.get('slice_seconds', 5.0),
+            shards=local_shards(bot)
+        )
+
+    async def cog_load(self):
+        self.reconcile.change_interval(seconds=self.interval)
+        self.reconcile.start()
+
+    async def cog_unload(self):
+        self.reconcile.cancel()
+
+    @tasks.loop(seconds=10)
+    async def reconcile(self):
+        try:
+            await self.reconciler.tick()
+        except Exception as e:
+            print(f"Error reconciling partner threads: {e}")
+
+    @reconcile.before_loop
+    async def before_reconcile(self):
+        await self.bot.wait_until_ready()
+
+    @app_commands.command(name='reconcile_status', description='Show partner thread drift checks (Dev only)')
+    async def reconcile_status(self, interaction: discord.Interaction):
+        if not auth_cache.is_dev(interaction.user.id):
+            await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
+            return
+
+        stats = self.reconciler.stats()
+        backlog = f"~{stats['backlog']} threads" if stats['backlog'] is not None else "unknown until the first pass ends"
+        embed = discord.Embed(
+            title="🧭 Partner Thread Reconciler",
+            description=f"Backlog this pass: {backlog}\n"
+                        f"Position: thread {stats['cursor']}\n"
+                        f"Completed passes: {stats['cycles']}",
+            color=0xf9d6c1
+        )
+
+        current = stats['current']
+        embed.add_field(
+            name="Current Pass",
+            value=f"Running for {stats['cycle_elapsed'] / 60:.1f} min\n"
+                  f"Checked: {current['checked']}\n"
+                  f"Drifted: {current['drifted']}\n"
+                  f"Missing: {current['missing']}\n"
+                  f"No starter message: {current['no_starter']}\n"
+                  f"Errors: {current['errors']}",
+            inline=True
+        )
+
+        last = stats['last']
+        if last is not None:
+            embed.add_field(
+                name="Last Pass",
+                value=f"Took {stats['last_cycle_seconds'] / 60:.1f} min\n"
+                      f"Checked: {last['checked']}\n"
+                      f"Drifted: {last['drifted']}\n"
+                      f"Missing: {last['missing']}\n"
+                      f"No starter message: {last['no_starter']}\n"
+                      f"Errors: {last['errors']}",
+                inline=True
+            )
+
+        embed.set_footer(text=f"REST budget: {stats['tokens']:.1f} tokens • Checked at {time.strftime('%H:%M:%S')}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(ReconcilerCog(bot))
@@ -0,0 +1,97 @@
+import discord
+from discord.ext import commands, tasks
+
+from utils.channel_cache import get_channel_resolver
+from utils.database import get_database
+from utils.discord_jobs import get_job_queue
+from utils.invites import get_invite_manager
+from utils.log_sink import get_log_sink
+from utils.partner_ads import forum_tags
+from utils.reconciler import enqueue_registration_refresh
+from utils.registry import RegistrySync
+
+
+INTENTS = ['guilds']
+
+
+class RegistrySyncCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = get_database()
+        self.registry = RegistrySync(self.db)
+        self.channels = get_channel_resolver(bot)
+        self.invites = get_invite_manager(bot, self.db)
+        self.jobs = get_job_queue(bot)
+        self.invite_cursor = 0
+
+    async def cog_load(self):
+        self.sweep_tombstones.start()
+        self.sweep_invites.start()
+
+    async def cog_unload(self):
+        self.sweep_tombstones.cancel()
+        self.sweep_invites.cancel()
+
+    async def tombstone(self, kind, target_id, reason):
+        try:
+            if await self.registry.tombstone(kind, target_id, reason) and not self.sweep_tombstones.is_running():
+                await self.registry.sweep()
+        except Exception as e:
+            print(f"Error recording removed {kind} {target_id}: {e}")
+
+    @tasks.loop(seconds=15)
+    async def sweep_tombstones(self):
+        # Events arrive in bursts (a guild leaving takes its forum and threads with it), so sweep them together
+        try:
+            while await self.registry.sweep() == self.registry.batch_size:
+                pass
+        except Exception as e:
+            print(f"Error sweeping registry tombstones: {e}")
+
+    @tasks.loop(minutes=2)
+    async def sweep_invites(self):
+        # A few servers per tick; with the check TTL a full pass costs one fetch_invite per server per TTL
+        try:
+            self.invite_cursor, stale = await self.invites.stale_servers(self.invite_cursor)
+            for server_id, dead_url in stale:
+                guild = self.bot.get_guild(server_id)
+                if guild is None:
+                    continue
+                invite_url = await self.invites.ensure_invite(guild)
+                if invite_url is not None and invite_url != dead_url:
+                    # Mirrored ads still show the dead invite
+                    await enqueue_registration_refresh(self.jobs, self.db, server_id)
+        except Exception as e:
+            print(f"Error sweeping server invites: {e}")
+
+    @sweep_invites.before_loop
+    async def before_sweep_invites(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        # Kicked, banned or the guild was deleted; outages fire on_guild_unavailable instead
+        await self.tombstone('guild', guild.id, 'bot removed from guild')
+        get_log_sink(self.bot).log(f"👋 **Left Server**\n**Server:** {guild.name} ({guild.id})", 0xF4A6A6)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.channels.invalidate(channel.id)
+        if isinstance(channel, discord.ForumChannel):
+            forum_tags.invalidate(channel.id)
+            await self.tombstone('forum', channel.id, 'forum deleted')
+
+    @commands.Cog.listener()
+    async def on_raw_thread_update(self, payload):
+        # Archiving or renaming changes what a repair has to do
+        self.channels.invalidate(payload.thread_id)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload):
+        # Raw, so threads missing from the cache are still caught
+        self.channels.invalidate(payload.thread_id)
+        await self.tombstone('thread', payload.thread_id, 'thread deleted')
+
+
+async def setup(bot):
+    await bot.add_cog(RegistrySyncCog(bot))
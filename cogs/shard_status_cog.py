@@ -0,0 +1,155 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+import math
+import time
+
+from utils.auth_cache import auth_cache
+from utils.shard_metrics import get_shard_metrics, shard_for_guild
+
+
+INTENTS = ['guilds']
+
+
+class ShardStatusCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.metrics = get_shard_metrics(bot)
+        self.sharded = isinstance(bot, commands.AutoShardedBot)
+
+    async def cog_load(self):
+        self.report_shards.start()
+
+    async def cog_unload(self):
+        self.report_shards.cancel()
+
+    def count(self, guild_id):
+        if guild_id is None:
+            # DMs always arrive on shard 0
+            self.metrics.record_event(0)
+        else:
+            self.metrics.record_event(shard_for_guild(guild_id, self.bot.shard_count))
+
+    def shard_rows(self):
+        if self.sharded:
+            latencies = self.bot.latencies
+        else:
+            latencies = [(self.bot.shard_id or 0, self.bot.latency)]
+
+        guild_counts = {}
+        for guild in self.bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+        rows = []
+        for shard_id, latency in latencies:
+            if self.sharded:
+                shard = self.bot.get_shard(shard_id)
+                closed = shard is None or shard.is_closed()
+            else:
+                closed = self.bot.is_closed()
+            rows.append({
+                'shard_id': shard_id,
+                'latency_ms': None if math.isinf(latency) or math.isnan(latency) else latency * 1000,
+                'healthy': not closed,
+                'guilds': guild_counts.get(shard_id, 0),
+                'events_per_minute': self.metrics.events_per_minute(shard_id),
+                'reconnects': self.metrics.disconnects[shard_id],
+                'resumes': self.metrics.resumes[shard_id],
+            })
+        return rows
+
+    @tasks.loop(minutes=5)
+    async def report_shards(self):
+        for row in self.shard_rows():
+            latency = f"{row['latency_ms']:.0f}ms" if row['latency_ms'] is not None else "n/a"
+            print(f"[shard {row['shard_id']}] {'up' if row['healthy'] else 'DOWN'} latency={latency} "
+                  f"guilds={row['guilds']} events/min={row['events_per_minute']:.1f} reconnects={row['reconnects']}")
+
+    @report_shards.before_loop
+    async def before_report_shards(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_shard_connect(self, shard_id):
+        self.metrics.record_connect(shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id):
+        self.metrics.record_disconnect(shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id):
+        self.metrics.record_resume(shard_id)
+
+    @commands.Cog.listener()
+    async def on_connect(self):
+        # AutoShardedBot reports these per shard through the on_shard_* events instead
+        if not self.sharded:
+            self.metrics.record_connect(self.bot.shard_id or 0)
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        if not self.sharded:
+            self.metrics.record_disconnect(self.bot.shard_id or 0)
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        if not self.sharded:
+            self.metrics.record_resume(self.bot.shard_id or 0)
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction):
+        self.count(interaction.guild_id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        self.count(message.guild.id if message.guild else None)
+
+    @commands.Cog.listener()
+    async def on_thread_create(self, thread):
+        self.count(thread.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.count(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.count(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.count(guild.id)
+
+    @app_commands.command(name='shard_status', description='Show latency and health for each shard (Dev only)')
+    async def shard_status(self, interaction: discord.Interaction):
+        if not auth_cache.is_dev(interaction.user.id):
+            await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
+            return
+
+        rows = self.shard_rows()
+        embed = discord.Embed(
+            title="🛰️ Shard Status",
+            description=f"{len(rows)} shard(s) in this process, {self.bot.shard_count or 1} total",
+            color=0xf9d6c1
+        )
+
+        # Embeds hold at most 25 fields
+        for row in rows[:25]:
+            latency = f"{row['latency_ms']:.0f}ms" if row['latency_ms'] is not None else "n/a"
+            last_drop = self.metrics.last_disconnect.get(row['shard_id'])
+            embed.add_field(
+                name=f"{'🟢' if row['healthy'] else '🔴'} Shard {row['shard_id']}",
+                value=f"Latency: {latency}\n"
+                      f"Guilds: {row['guilds']}\n"
+                      f"Events/min: {row['events_per_minute']:.1f}\n"
+                      f"Reconnects: {row['reconnects']} (resumed {row['resumes']})\n"
+                      f"Last drop: {f'<t:{int(last_drop)}:R>' if last_drop else 'never'}",
+                inline=True
+            )
+
+        embed.set_footer(text=f"Checked at {time.strftime('%H:%M:%S')}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(ShardStatusCog(bot))
@@ -1,27 +1,59 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-import sqlite3
-import asyncio
 import time
 
+from utils.auth_cache import auth_cache
+from utils.channel_cache import get_channel_resolver
+from utils.database import UnitOfWork, get_database
+from utils.db_inspect import database_estimate
+from utils.discord_jobs import get_job_queue
+from utils.paginator import GuildPageSource, Paginator, SQLitePageSource
+from utils.partner_ads import ad_fingerprint, ad_renderer, forum_tags
+from utils.reconcile import build_sync_plan
+from utils.registry import remove_server_rows
+from utils.shard_metrics import local_shards
+
+
+# Guild, channel and thread data only; everything else arrives through interactions
+INTENTS = ['guilds']
+
 
 class DevCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db_path = 'databases/bump.db'
+        self.db = get_database(self.db_path)
+        self.channels = get_channel_resolver(bot)
+        self.jobs = get_job_queue(bot)
         self.STATUS_FILE = "status.txt"
 
-    def get_db_connection(self):
-        return sqlite3.connect(self.db_path)
+    async def cog_load(self):
+        await auth_cache.ensure_loaded(self.db)
+        self.jobs.start()
+        if local_shards(self.bot) is not None:
+            # Other shard processes change devs and the whitelist in the shared database without telling this one
+            self.reload_auth.start()
+
+    async def cog_unload(self):
+        self.jobs.stop()
+        self.reload_auth.cancel()
+
+    @tasks.loop(seconds=30)
+    async def reload_auth(self):
+        try:
+            await auth_cache.reload(self.db)
+        except Exception as e:
+            print(f"Error reloading the auth cache: {e}")
 
     def is_dev(self, user_id):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT user_id FROM devs WHERE user_id = ?', (user_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result is not None
+        return auth_cache.is_dev(user_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        # Forum tags may have changed; rebuild the name -> tag map on next use
+        forum_tags.invalidate(after.id)
+        self.channels.invalidate(after.id)
 
     @app_commands.command(
         name='add_dev',
@@ -33,11 +65,8 @@ class DevCommands(commands.Cog):
             await interaction.response.send_message("❌ This command is for the bot owner only.", ephemeral=True)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('INSERT OR IGNORE INTO devs (user_id) VALUES (?)', (user.id,))
-        conn.commit()
-        conn.close()
+        await self.db.execute('INSERT OR IGNORE INTO devs (user_id) VALUES (?)', (user.id,))
+        auth_cache.add_dev(user.id)
 
         await interaction.response.send_message(f"✅ {user.mention} has been added to the dev list.", ephemeral=True)
 
@@ -51,11 +80,8 @@ class DevCommands(commands.Cog):
             await interaction.response.send_message("❌ This command is for the bot owner only.", ephemeral=True)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM devs WHERE user_id = ?', (user.id,))
-        conn.commit()
-        conn.close()
+        await self.db.execute('DELETE FROM devs WHERE user_id = ?', (user.id,))
+        auth_cache.remove_dev(user.id)
 
         await interaction.response.send_message(f"✅ {user.mention} has been removed from the dev list.", ephemeral=True)
 
@@ -68,33 +94,20 @@ class DevCommands(commands.Cog):
             await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT user_id FROM devs')
-        devs = cursor.fetchall()
-        conn.close()
-
-        if not devs:
-            await interaction.response.send_message("💤 No developers registered yet!", ephemeral=True)
-            return
-
-        embed = discord.Embed(
-            title="👨‍💻 Developers",
-            description=f"Total devs: {len(devs)}",
-            color=0xf9d6c1
-        )
-
-        dev_list = ""
-        for dev_id, in devs:
-            user = self.bot.get_user(dev_id)
-            if user:
-                dev_list += f"• {user.mention} ({user.id})\n"
-            else:
-                dev_list += f"• Unknown User ({dev_id})\n"
-
-        embed.add_field(name="Developers", value=dev_list[:1024], inline=False)
-
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        def render(dev_ids, page, total):
+            embed = discord.Embed(
+                title="👨‍💻 Developers",
+                description=f"Total devs: {total}",
+                color=0xf9d6c1
+            )
+            # A raw mention renders client-side, so it works with the member cache turned off
+            lines = [f"• <@{dev_id}> ({dev_id})" for dev_id in dev_ids]
+            embed.add_field(name="Developers", value="\n".join(lines) or "Nothing on this page.", inline=False)
+            embed.set_footer(text=f"Page {page + 1}/{paginator.page_count()}")
+            return embed
+
+        paginator = Paginator(SQLitePageSource(self.db, 'devs', 'user_id'), render, interaction.user.id)
+        await paginator.send(interaction, empty="💤 No developers registered yet!")
 
     @app_commands.command(
         name='whitelist_server',
@@ -111,11 +124,8 @@ class DevCommands(commands.Cog):
             await interaction.response.send_message("❌ Invalid server ID.", ephemeral=True)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('INSERT OR IGNORE INTO whitelisted_servers (server_id) VALUES (?)', (sid,))
-        conn.commit()
-        conn.close()
+        await self.db.execute('INSERT OR IGNORE INTO whitelisted_servers (server_id) VALUES (?)', (sid,))
+        auth_cache.add_server(sid)
 
         await interaction.response.send_message(f"✅ Server {sid} has been whitelisted.", ephemeral=True)
 
@@ -134,30 +144,16 @@ class DevCommands(commands.Cog):
             await interaction.response.send_message("❌ Invalid server ID.", ephemeral=True)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-
         # Check if server is whitelisted
-        cursor.execute('SELECT server_id FROM whitelisted_servers WHERE server_id = ?', (sid,))
-        if not cursor.fetchone():
+        if not auth_cache.is_whitelisted(sid):
             await interaction.response.send_message("❌ Server is not whitelisted.", ephemeral=True)
-            conn.close()
             return
 
-        # Remove from whitelisted_servers
-        cursor.execute('DELETE FROM whitelisted_servers WHERE server_id = ?', (sid,))
-
-        # Also remove from servers table if exists
-        cursor.execute('DELETE FROM servers WHERE server_id = ?', (sid,))
-
-        # Remove partner threads
-        cursor.execute('DELETE FROM partner_threads WHERE server_id = ?', (sid,))
-
-        # Remove from global_partner_threads (both hosting and advertised)
-        cursor.execute('DELETE FROM global_partner_threads WHERE hosting_server_id = ? OR advertised_server_id = ?', (sid, sid))
-
-        conn.commit()
-        conn.close()
+        async with UnitOfWork(self.db) as writes:
+            await writes.execute('DELETE FROM whitelisted_servers WHERE server_id = ?', (sid,))
+            # Registry rows, tags, and partner threads it hosts or is advertised in
+            await writes.run(remove_server_rows, sid)
+        auth_cache.remove_server(sid)
 
         await interaction.response.send_message(f"✅ Server {sid} has been removed from the network.", ephemeral=True)
 
@@ -170,25 +166,24 @@ class DevCommands(commands.Cog):
             await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
             return
 
-        guilds = self.bot.guilds
-
-        if not guilds:
+        if not self.bot.guilds:
             await interaction.response.send_message("💤 The bot is not in any servers!", ephemeral=True)
             return
 
-        embed = discord.Embed(
-            title="🌐 Servers the Bot is In",
-            description=f"Total servers: {len(guilds)}",
-            color=0xf9d6c1
-        )
-
-        server_list = ""
-        for guild in guilds:
-            server_list += f"• **{guild.name}** ({guild.id}) - {guild.member_count} members\n"
-
-        embed.add_field(name="Servers", value=server_list[:1024], inline=False)
-
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        def render(guilds, page, total):
+            embed = discord.Embed(
+                title="🌐 Servers the Bot is In",
+                description=f"Total servers: {total}",
+                color=0xf9d6c1
+            )
+            server_list = "\n".join(f"• **{guild.name}** ({guild.id}) - {guild.member_count} members" for guild in guilds)
+            embed.add_field(name="Servers", value=server_list or "Nothing on this page.", inline=False)
+            embed.set_footer(text=f"Page {page + 1}/{paginator.page_count()}")
+            return embed
+
+        # Six rows keep the field under 1024 characters even with 100-character guild names
+        paginator = Paginator(GuildPageSource(self.bot, per_page=6), render, interaction.user.id, key=lambda guild: guild.id)
+        await paginator.send(interaction)
 
     @app_commands.command(
         name='set_status',
@@ -210,6 +205,29 @@ class DevCommands(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"Error: {e}", ephemeral=True)
 
+    @app_commands.command(
+        name='channel_cache_stats',
+        description='Show how many channel lookups skipped the API (Dev only)'
+    )
+    async def channel_cache_stats(self, interaction: discord.Interaction):
+        if not self.is_dev(interaction.user.id):
+            await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
+            return
+
+        stats = self.channels.stats()
+        embed = discord.Embed(
+            title="📦 Channel Cache",
+            description=f"API calls saved: {stats['saved_calls']}",
+            color=0xf9d6c1
+        )
+        embed.add_field(name="Gateway hits", value=stats['gateway_hits'], inline=True)
+        embed.add_field(name="LRU hits", value=stats['cache_hits'], inline=True)
+        embed.add_field(name="Coalesced", value=stats['coalesced'], inline=True)
+        embed.add_field(name="REST fetches", value=stats['rest_fetches'], inline=True)
+        embed.add_field(name="Cached channels", value=stats['cached'], inline=True)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @app_commands.command(
         name='dev_sync',
         description='Sync a server\'s forum with the network (Dev only)'
@@ -227,155 +245,163 @@ class DevCommands(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
+        # One anti-join finds every missing thread for this server, in both directions
+        plan = await self.db.run(build_sync_plan, sid)
 
         # Check if server is registered
-        cursor.execute('SELECT forum_channel_id, server_name, advertisement, tags, invite_url FROM servers WHERE server_id = ?', (sid,))
-        server_data = cursor.fetchone()
-        if not server_data:
-            conn.close()
+        if sid not in plan.servers:
             await interaction.followup.send("❌ Server is not registered.", ephemeral=True)
             return
 
-        forum_id, server_name, advertisement, tags_str, invite_url = server_data
-        tags = tags_str.split(',') if tags_str else []
+        queued = await self.enqueue_sync_plan(plan, home_sid=sid, label=f"/dev_sync {sid}")
+        await interaction.followup.send(f"✅ Queued {queued} threads for server {sid}. Use `/job_queue_status` to follow progress.", ephemeral=True)
 
-        # Get all other registered servers
-        cursor.execute('SELECT server_id, forum_channel_id FROM servers WHERE server_id != ?', (sid,))
-        other_servers = cursor.fetchall()
-        conn.close()
+    @app_commands.command(
+        name='dev_sync_all',
+        description='Create every missing partner thread across the whole network (Dev only)'
+    )
+    async def dev_sync_all(self, interaction: discord.Interaction):
+        if not self.is_dev(interaction.user.id):
+            await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
+            return
 
-        synced_threads = 0
+        await interaction.response.defer(ephemeral=True)
 
-        # Create threads in the target server's forum for all other servers (if missing)
-        try:
-            forum = await self.bot.fetch_channel(forum_id)
-            if forum:
-                for other_sid, other_forum_id in other_servers:
-                    # Check if thread already exists
-                    conn = self.get_db_connection()
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT thread_id FROM global_partner_threads WHERE hosting_server_id = ? AND advertised_server_id = ?', (sid, other_sid))
-                    existing_thread = cursor.fetchone()
-                    conn.close()
-
-                    if existing_thread:
-                        continue  # Skip if already exists
-
-                    # Get other server's data
-                    conn = self.get_db_connection()
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT server_name, advertisement, tags, invite_url FROM servers WHERE server_id = ?', (other_sid,))
-                    other_data = cursor.fetchone()
-                    conn.close()
-
-                    if other_data:
-                        other_name, other_ad, other_tags_str, other_invite = other_data
-                        other_tags = other_tags_str.split(',') if other_tags_str else []
-
-                        join_text = f"[Join Server]({other_invite})" if other_invite else f"Server ID: {other_sid}"
-                        content = f"**{other_name}** ({join_text})\n\n{other_ad}\n\n💌 Added to HoneyBun's Portal on {time.strftime('%m/%d/%Y', time.localtime(time.time()))}\n\nTags: {', '.join(other_tags) if other_tags else 'None'}"
-                        applied_tags = [tag for tag in forum.available_tags if tag.name in other_tags]
-
-                        thread = await forum.create_thread(
-                            name=f"🌸 {other_name} — Partner Ad",
-                            content=content,
-                            applied_tags=applied_tags
-                        )
-
-                        # Save to DB
-                        conn = self.get_db_connection()
-                        cursor = conn.cursor()
-                        cursor.execute('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id) VALUES (?, ?, ?)',
-                                       (sid, thread.thread.id, other_sid))
-                        conn.commit()
-                        conn.close()
-
-                        synced_threads += 1
-                        await asyncio.sleep(1)  # Rate limit
-        except Exception as e:
-            print(f"Error syncing threads to {sid}: {e}")
-
-        # Create threads in other servers' forums for this server (if missing)
-        for other_sid, other_forum_id in other_servers:
-            try:
-                other_forum = await self.bot.fetch_channel(other_forum_id)
-                if not other_forum:
-                    continue
-
-                # Check if thread already exists
-                conn = self.get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute('SELECT thread_id FROM global_partner_threads WHERE hosting_server_id = ? AND advertised_server_id = ?', (other_sid, sid))
-                existing_thread = cursor.fetchone()
-                conn.close()
-
-                if existing_thread:
-                    continue  # Skip if already exists
-
-                join_text = f"[Join Server]({invite_url})" if invite_url else f"Server ID: {sid}"
-                content = f"**{server_name}** ({join_text})\n\n{advertisement}\n\n💌 Added to Nomons's Cottage on {time.strftime('%m/%d/%Y', time.localtime(time.time()))}\n\nTags: {', '.join(tags) if tags else 'None'}"
-                applied_tags = [tag for tag in other_forum.available_tags if tag.name in tags]
-
-                thread = await other_forum.create_thread(
-                    name=f"🌸 {server_name} — Partner Ad",
-                    content=content,
-                    applied_tags=applied_tags
-                )
-
-                # Save to DB
-                conn = self.get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id) VALUES (?, ?, ?)',
-                               (other_sid, thread.thread.id, sid))
-                conn.commit()
-                conn.close()
-
-                synced_threads += 1
-                await asyncio.sleep(1)  # Rate limit
-            except Exception as e:
-                print(f"Error syncing thread for {sid} in {other_sid}: {e}")
-
-        await interaction.followup.send(f"✅ Synced {synced_threads} threads for server {sid}.", ephemeral=True)
+        plan = await self.db.run(build_sync_plan)
+        queued = await self.enqueue_sync_plan(plan, label="/dev_sync_all")
+        await interaction.followup.send(f"✅ Queued {queued} threads across {len(plan.servers)} servers. Use `/job_queue_status` to follow progress.", ephemeral=True)
+
+    async def enqueue_sync_plan(self, plan, home_sid=None, label=None):
+        added_on = time.strftime('%m/%d/%Y', time.localtime(time.time()))
+        jobs = []
+
+        for host_sid, advertised_sids in plan.by_host().items():
+            forum_id = plan.servers[host_sid][0]
+            for advertised_sid in advertised_sids:
+                # Ads for other servers inside the synced server's own forum keep their original footer
+                portal = "HoneyBun's Portal" if host_sid == home_sid else "Nomons's Cottage"
+                ad = ad_renderer.render(advertised_sid, *plan.servers[advertised_sid][1:], portal, added_on)
+                payload = {
+                    'forum_id': forum_id,
+                    'hosting_server_id': host_sid,
+                    'advertised_server_id': advertised_sid,
+                    'title': ad.title,
+                    'content': ad.content,
+                    'tags': ad.tags,
+                    'ad_hash': ad_fingerprint(ad.title, ad.content, ad.tags),
+                }
+                # Each hosting guild gets its own lane, so guilds are synced concurrently
+                jobs.append(('create_thread', payload, f"create_thread:{host_sid}:{advertised_sid}", host_sid))
+
+        return await self.jobs.enqueue_many(jobs, label=label)
 
     @app_commands.command(
-        name='view_whitelisted_servers',
-        description='Show all approved (whitelisted) servers (Dev only)'
+        name='job_queue_status',
+        description='Show pending and failed Discord jobs (Dev only)'
     )
-    async def view_whitelisted_servers(self, interaction: discord.Interaction):
+    async def job_queue_status(self, interaction: discord.Interaction):
         if not self.is_dev(interaction.user.id):
             await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT server_id FROM whitelisted_servers')
-        whitelisted = cursor.fetchall()
-        conn.close()
+        stats = await self.jobs.stats()
+        runs = await self.jobs.progress()
+        if not stats and not runs:
+            await interaction.response.send_message("💤 The job queue is empty!", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="📬 Job Queue",
+            description=f"Total jobs: {sum(stats.values())}",
+            color=0xf9d6c1
+        )
 
-        if not whitelisted:
-            await interaction.response.send_message("💤 No servers whitelisted yet!", ephemeral=True)
+        for status in ('pending', 'running', 'failed'):
+            counts = [f"• {kind}: {count}" for (job_status, kind), count in sorted(stats.items()) if job_status == status]
+            if counts:
+                embed.add_field(name=status.title(), value="\n".join(counts), inline=False)
+
+        if runs:
+            lines = []
+            for label, total, done, failed, started_at in runs:
+                failures = f", {failed} failed" if failed else ""
+                lines.append(f"• {label}: {done}/{total} done{failures} (queued <t:{int(started_at)}:R>)")
+            embed.add_field(name="Commands", value="\n".join(lines), inline=False)
+
+        commits = self.db.metrics.summary()
+        embed.add_field(
+            name="Database Writes",
+            value=f"Commits: {commits['commits']}\n"
+                  f"Rows per commit: {commits['rows_per_commit']:.1f}\n"
+                  f"Commit latency: {commits['avg_commit_ms']:.1f}ms avg, {commits['p95_commit_ms']:.1f}ms p95",
+            inline=False
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(
+        name='db_stats',
+        description='Show table sizes and database write stats (Dev only)'
+    )
+    async def db_stats(self, interaction: discord.Interaction):
+        if not self.is_dev(interaction.user.id):
+            await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
             return
 
+        # A capped ANALYZE rather than COUNT(*), which would hold the DB thread for the whole N² thread table
+        summary = await self.db.run(database_estimate)
+
         embed = discord.Embed(
-            title="✅ Approved Servers",
-            description=f"Total whitelisted servers: {len(whitelisted)}",
+            title="🗄️ Database",
+            description=f"Size: {summary['size_bytes'] / 2**20:.1f} MiB "
+                        f"({summary['free_bytes'] / 2**20:.1f} MiB free), journal: {summary['journal_mode']}",
             color=0xf9d6c1
         )
 
-        server_list = ""
-        for server_id, in whitelisted:
-            guild = self.bot.get_guild(server_id)
-            if guild:
-                server_list += f"• **{guild.name}** ({server_id})\n"
-            else:
-                server_list += f"• Unknown Server ({server_id})\n"
+        lines = [f"• {table}: {'~' if estimated else ''}{rows:,}" for table, (rows, estimated) in summary['tables'].items()]
+        embed.add_field(name="Rows", value="\n".join(lines) or "No tables.", inline=False)
 
-        embed.add_field(name="Whitelisted Servers", value=server_list[:1024], inline=False)
+        commits = self.db.metrics.summary()
+        embed.add_field(
+            name="Writes",
+            value=f"Commits: {commits['commits']} ({commits['rows']} rows)\n"
+                  f"Rows per commit: {commits['rows_per_commit']:.1f}\n"
+                  f"Commit latency: {commits['avg_commit_ms']:.1f}ms avg, {commits['p95_commit_ms']:.1f}ms p95",
+            inline=False
+        )
+        embed.set_footer(text="~ marks sampled estimates; view_databases.py --exact counts every row")
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(
+        name='view_whitelisted_servers',
+        description='Show all approved (whitelisted) servers (Dev only)'
+    )
+    async def view_whitelisted_servers(self, interaction: discord.Interaction):
+        if not self.is_dev(interaction.user.id):
+            await interaction.response.send_message("❌ This command is for developers only.", ephemeral=True)
+            return
+
+        def render(server_ids, page, total):
+            embed = discord.Embed(
+                title="✅ Approved Servers",
+                description=f"Total whitelisted servers: {total}",
+                color=0xf9d6c1
+            )
+            lines = []
+            for server_id in server_ids:
+                guild = self.bot.get_guild(server_id)
+                if guild:
+                    lines.append(f"• **{guild.name}** ({server_id})")
+                else:
+                    lines.append(f"• Unknown Server ({server_id})")
+            embed.add_field(name="Whitelisted Servers", value="\n".join(lines) or "Nothing on this page.", inline=False)
+            embed.set_footer(text=f"Page {page + 1}/{paginator.page_count()}")
+            return embed
+
+        paginator = Paginator(SQLitePageSource(self.db, 'whitelisted_servers', 'server_id', per_page=7), render, interaction.user.id)
+        await paginator.send(interaction, empty="💤 No servers whitelisted yet!")
+
     @app_commands.command(
         name='delete_all_threads',
         description='Delete all partner threads in the network (Dev only - Destructive)'
@@ -387,46 +413,18 @@ class DevCommands(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-
-        # Get all thread IDs from global_partner_threads
-        cursor.execute('SELECT thread_id FROM global_partner_threads')
-        thread_ids = [row[0] for row in cursor.fetchall()]
-
-        # Also get partner_threads if any
-        cursor.execute('SELECT thread_id FROM partner_threads')
-        partner_thread_ids = [row[0] for row in cursor.fetchall()]
+        # Every known thread, whether mirrored into a partner forum or a server's own
+        rows = await self.db.fetchall('SELECT thread_id FROM global_partner_threads UNION SELECT thread_id FROM partner_threads')
 
-        all_thread_ids = set(thread_ids + partner_thread_ids)
+        # Thread deletes use per-channel buckets, so each thread is its own lane.
+        # Rows are dropped as each batch of deletes completes, so a reset survives restarts.
+        jobs = [
+            ('delete_thread', {'thread_id': thread_id, 'reason': "Partner network reset"}, f"delete_thread:{thread_id}", thread_id)
+            for thread_id, in rows if thread_id
+        ]
+        queued = await self.jobs.enqueue_many(jobs, label="/delete_all_threads")
 
-        deleted_count = 0
-        failed_count = 0
-
-        for thread_id in all_thread_ids:
-            try:
-                thread = await self.bot.fetch_channel(thread_id)
-                if isinstance(thread, discord.Thread):
-                    await thread.delete()
-                    deleted_count += 1
-                else:
-                    failed_count += 1
-                    print(f"Channel {thread_id} is not a thread")
-            except discord.NotFound:
-                # Thread already deleted or doesn't exist
-                pass
-            except Exception as e:
-                failed_count += 1
-                print(f"Error deleting thread {thread_id}: {e}")
-            await asyncio.sleep(0.5)  # Rate limit
-
-        # Clear the database tables
-        cursor.execute('DELETE FROM global_partner_threads')
-        cursor.execute('DELETE FROM partner_threads')
-        conn.commit()
-        conn.close()
-
-        await interaction.followup.send(f"✅ Deleted {deleted_count} threads. {failed_count} failed or skipped.", ephemeral=True)
+        await interaction.followup.send(f"✅ Queued {queued} threads for deletion. Use `/job_queue_status` to follow progress.", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(DevCommands(bot))
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sqlite3
+
+from utils.migrations import MIGRATIONS, current_version, migrate
+from utils.registry import duplicate_threads, queue_duplicate_deletions
+
+
+def report_duplicates(conn):
+    thread_ids = duplicate_threads(conn)
+    if thread_ids:
+        print(f"{len(thread_ids)} duplicate partner thread(s) were dropped from the registry but still exist on Discord: "
+              f"{', '.join(str(thread_id) for thread_id in thread_ids)}")
+        print("Run again with --delete-duplicates to queue their deletion; the bot's job queue then deletes them.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations to a Nomon database.")
+    parser.add_argument('--db', default='databases/bump.db', help="Path to the database file")
+    parser.add_argument('--target', type=int, help="Stop after this migration version")
+    parser.add_argument('--status', action='store_true', help="Show the applied version and exit")
+    parser.add_argument('--delete-duplicates', action='store_true',
+                        help="Queue deletion of the duplicate partner threads the migrations dropped")
+    args = parser.parse_args()
+
+    directory = os.path.dirname(args.db)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        version = current_version(conn)
+        if args.status:
+            print(f"{args.db} is at version {version} of {MIGRATIONS[-1][0]}.")
+            for number, name, _ in MIGRATIONS:
+                print(f"  [{'x' if number <= version else ' '}] {number}: {name}")
+            report_duplicates(conn)
+            return
+
+        new_version = migrate(conn, target=args.target, verbose=True)
+        if new_version == version:
+            print(f"Database is already up to date (version {version}).")
+        else:
+            print(f"Database migrated from version {version} to {new_version}.")
+
+        if args.delete_duplicates:
+            thread_ids = queue_duplicate_deletions(conn)
+            conn.commit()
+            print(f"Queued deletion of {len(thread_ids)} duplicate partner thread(s).")
+        else:
+            report_duplicates(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
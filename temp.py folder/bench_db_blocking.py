@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database
+
+QUERIES = 2000
+TICK = 0.001
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute('CREATE TABLE devs (user_id INTEGER PRIMARY KEY)')
+    cursor.execute('CREATE TABLE global_partner_threads (hosting_server_id INTEGER, thread_id INTEGER, advertised_server_id INTEGER)')
+    cursor.executemany('INSERT INTO devs (user_id) VALUES (?)', [(i,) for i in range(100)])
+    cursor.executemany('INSERT INTO global_partner_threads VALUES (?, ?, ?)',
+                       [(h, h * 1000 + a, a) for h in range(100) for a in range(100) if h != a])
+    conn.commit()
+    conn.close()
+
+
+async def measure(workload):
+    """Run workload while a ticker records how late the event loop wakes it up."""
+    lags = []
+    running = True
+
+    async def ticker():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await workload()
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    lags.sort()
+    return {
+        'wall': elapsed,
+        'max_lag_ms': lags[-1] * 1000 if lags else 0.0,
+        'p99_lag_ms': lags[int(len(lags) * 0.99)] * 1000 if lags else 0.0,
+        'blocked_ms': sum(lags) * 1000,
+    }
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    make_db(path)
+
+    async def before():
+        # The old pattern: a fresh blocking connection per query, on the loop thread
+        for i in range(QUERIES):
+            conn = sqlite3.connect(path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT thread_id FROM global_partner_threads WHERE hosting_server_id = ? AND advertised_server_id = ?',
+                           (i % 100, (i + 1) % 100))
+            cursor.fetchone()
+            conn.close()
+            await asyncio.sleep(0)
+
+    db = Database(path)
+
+    async def after():
+        for i in range(QUERIES):
+            await db.fetchone('SELECT thread_id FROM global_partner_threads WHERE hosting_server_id = ? AND advertised_server_id = ?',
+                              (i % 100, (i + 1) % 100))
+
+    for name, workload in (('before (sqlite3.connect per query)', before), ('after (Database executor)', after)):
+        result = await measure(workload)
+        print(f"{name}: wall={result['wall']:.3f}s max_lag={result['max_lag_ms']:.2f}ms "
+              f"p99_lag={result['p99_lag_ms']:.2f}ms total_blocked={result['blocked_ms']:.1f}ms")
+
+    await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
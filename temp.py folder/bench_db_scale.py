@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gen_network import generate, server_id
+from utils.bump_propagation import bump_targets
+from utils.database import Database
+from utils.reconcile import build_sync_plan
+from utils.reconciler import BATCH_SQL
+from utils.registry import remove_server_rows
+
+SIZES = (100, 1000, 5000)
+ITERATIONS = 200
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'iterations': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 4),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 4),
+        'p95_ms': round(samples[int(0.95 * (len(samples) - 1))] * 1000, 4),
+        'max_ms': round(samples[-1] * 1000, 4),
+    }
+
+
+async def timed(call, params):
+    samples = []
+    for args in params:
+        start = time.perf_counter()
+        await call(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def bench_size(servers, fill, iterations, full_plan):
+    path = os.path.join(tempfile.mkdtemp(prefix=f'nomon-scale-{servers}-'), 'bump.db')
+    start = time.perf_counter()
+    rows = generate(path, servers, fill)
+    generate_s = time.perf_counter() - start
+    print(f"{servers} servers: {rows} global_partner_threads rows generated in {generate_s:.1f}s")
+
+    rng = random.Random(servers)
+    sample = [(server_id(rng.randrange(servers)),) for _ in range(iterations)]
+    db = Database(path)
+    await db.run(lambda conn: None)
+
+    thread_ids = [row for row, in await db.fetchall(
+        'SELECT thread_id FROM global_partner_threads ORDER BY thread_id LIMIT 1 OFFSET ?', (rows // 2,))]
+    middle = thread_ids[0] if thread_ids else 0
+
+    # Every query here is the one the bot issues, called through the same code path
+    queries = {
+        'registration lookup': await timed(
+            lambda sid: db.fetchone('SELECT server_id, forum_channel_id, server_name, advertisement, tags, invite_url FROM servers WHERE server_id = ?', (sid,)),
+            sample),
+        'missing threads (dev_sync plan)': await timed(lambda sid: db.run(build_sync_plan, sid), sample[:max(10, iterations // 10)]),
+        'bump targets': await timed(lambda sid: bump_targets(db, sid), sample),
+        'reconciler batch': await timed(lambda after: db.fetchall(BATCH_SQL.format(shards='1'), (after, 25)), [(middle,)] * iterations),
+        'whitelist page (keyset)': await timed(
+            lambda after: db.fetchall('SELECT server_id FROM whitelisted_servers WHERE server_id > ? ORDER BY server_id LIMIT ?', (after, 8)),
+            sample),
+    }
+    if full_plan:
+        queries['missing threads (dev_sync_all plan)'] = await timed(lambda: db.run(build_sync_plan), [()] * 3)
+
+    # Destructive, so it runs last and on distinct servers
+    victims = [(server_id(i),) for i in rng.sample(range(servers), min(20, servers))]
+    queries['remove_server cascade'] = await timed(lambda sid: db.run(remove_server_rows, sid), victims)
+
+    await db.close()
+    size_bytes = os.path.getsize(path)
+    os.remove(path)
+    return {
+        'servers': servers,
+        'global_partner_threads': rows,
+        'fill': fill,
+        'db_mib': round(size_bytes / 2**20, 1),
+        'generate_s': round(generate_s, 2),
+        'queries': queries,
+    }
+
+
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {str(result['servers']): result for result in baseline['results']}
+    print(f"\nCompared with {baseline_path} ({baseline['generated_at']}):")
+    for result in report['results']:
+        old = previous.get(str(result['servers']))
+        if old is None:
+            continue
+        for name, stats in result['queries'].items():
+            if name in old['queries']:
+                before, after = old['queries'][name]['p50_ms'], stats['p50_ms']
+                print(f"  {result['servers']:>5} {name:<36} p50 {before:>9.3f}ms -> {after:>9.3f}ms ({before / max(after, 1e-9):.2f}x)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Time the bot's real bump.db queries on synthetic networks.")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help="comma-separated server counts; 5000 means ~25M thread rows and a few GiB of disk")
+    parser.add_argument('--fill', type=float, default=0.99, help="share of thread pairs that already exist")
+    parser.add_argument('--iterations', type=int, default=ITERATIONS)
+    parser.add_argument('--full-plan', action='store_true', help="also time the whole-network dev_sync_all plan")
+    parser.add_argument('--output', default='db_scale_report.json')
+    parser.add_argument('--compare', help="earlier report to compare p50s against")
+    args = parser.parse_args()
+
+    report = {
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'results': [],
+    }
+    for servers in (int(size) for size in args.sizes.split(',')):
+        result = await bench_size(servers, args.fill, args.iterations, args.full_plan)
+        report['results'].append(result)
+        for name, stats in result['queries'].items():
+            print(f"  {name:<36} p50={stats['p50_ms']:>9.3f}ms p95={stats['p95_ms']:>9.3f}ms max={stats['max_ms']:>9.3f}ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+import argparse
+import datetime
+import os
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GUILDS = 2000
+MEMBERS_PER_GUILD = 250
+CHANNELS_PER_GUILD = 20
+THREADS_PER_GUILD = 30
+
+
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def guild_payload(guild_id, with_members):
+    """A GUILD_CREATE payload; members and presences only arrive with those intents enabled."""
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    base = guild_id * 10000
+    payload = {
+        'id': str(guild_id),
+        'name': f'Guild {guild_id}',
+        'owner_id': str(base + 1),
+        'member_count': MEMBERS_PER_GUILD,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'channels': [
+            {'id': str(base + 100 + i), 'type': 0, 'name': f'channel-{i}', 'position': i,
+             'permission_overwrites': [], 'guild_id': str(guild_id)}
+            for i in range(CHANNELS_PER_GUILD)
+        ],
+        'threads': [
+            {'id': str(base + 500 + i), 'type': 11, 'name': f'thread-{i}', 'parent_id': str(base + 100),
+             'owner_id': str(base + 1), 'guild_id': str(guild_id), 'message_count': 0, 'member_count': 0,
+             'rate_limit_per_user': 0, 'flags': 0,
+             'thread_metadata': {'archived': False, 'auto_archive_duration': 1440,
+                                 'archive_timestamp': now, 'locked': False}}
+            for i in range(THREADS_PER_GUILD)
+        ],
+    }
+    if with_members:
+        payload['members'] = [
+            {'user': {'id': str(base + 1000 + i), 'username': f'user{i}', 'discriminator': '0',
+                      'avatar': None, 'global_name': None},
+             'roles': [], 'joined_at': now, 'deaf': False, 'mute': False, 'flags': 0}
+            for i in range(MEMBERS_PER_GUILD)
+        ]
+        payload['presences'] = [
+            {'user': {'id': str(base + 1000 + i)}, 'status': 'online', 'activities': [],
+             'client_status': {'desktop': 'online'}}
+            for i in range(MEMBERS_PER_GUILD)
+        ]
+    return payload
+
+
+def run_profile(profile, guilds):
+    import discord
+    from discord.state import ConnectionState
+    from utils.intents import gateway_options
+
+    if profile == 'before':
+        options = {'intents': discord.Intents.all(), 'member_cache_flags': discord.MemberCacheFlags.all(),
+                   'max_messages': 1000, 'chunk_guilds_at_startup': True}
+    else:
+        # What bot.py itself would connect with
+        from bot import EXTENSIONS, load_config
+        options = gateway_options(load_config(), EXTENSIONS)
+
+    state = ConnectionState(dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=None, **options)
+    with_members = options['intents'].members
+
+    baseline = rss_kb()
+    for guild_id in range(1, guilds + 1):
+        state._add_guild(discord.Guild(data=guild_payload(guild_id, with_members), state=state))
+    used = rss_kb() - baseline
+    print(f"{profile}: {guilds} guilds, {used / 1024:.1f} MiB, {used / guilds * 1000 / 1024:.1f} MiB per 1k guilds")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gateway cache memory for the old and lean intent profiles.")
+    parser.add_argument('--profile', choices=['before', 'after'])
+    parser.add_argument('--guilds', type=int, default=GUILDS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args.profile, args.guilds)
+        return
+
+    # Each profile runs in a fresh process so one cannot inflate the other's RSS
+    for profile in ('before', 'after'):
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--profile', profile, '--guilds', str(args.guilds)], check=True)
+
+
+if __name__ == "__main__":
+    main()
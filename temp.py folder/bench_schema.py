@@ -0,0 +1,81 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.migrations import migrate
+
+TAGS = ['RP', 'ERP', 'Community', 'Gaming', 'Art', 'Anime', 'Music', 'Chat']
+PARTNERS_PER_SERVER = 20
+LOOKUPS = 500
+
+
+def build_legacy_db(path, server_count):
+    """Schema as the old ad-hoc scripts left it: no indexes, tags as a CSV string."""
+    rng = random.Random(server_count)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute('CREATE TABLE servers (server_id INTEGER PRIMARY KEY, forum_channel_id INTEGER, server_name TEXT, advertisement TEXT, tags TEXT, invite_url TEXT)')
+    cursor.execute('CREATE TABLE partner_threads (server_id INTEGER PRIMARY KEY, thread_id INTEGER, last_bump INTEGER DEFAULT 0, next_bump INTEGER DEFAULT 0)')
+    cursor.execute('CREATE TABLE global_partner_threads (hosting_server_id INTEGER, thread_id INTEGER, advertised_server_id INTEGER)')
+    cursor.execute('CREATE TABLE devs (user_id INTEGER PRIMARY KEY)')
+    cursor.execute('CREATE TABLE whitelisted_servers (server_id INTEGER PRIMARY KEY)')
+
+    cursor.executemany('INSERT INTO servers VALUES (?, ?, ?, ?, ?, ?)', (
+        (sid, sid + 10**6, f'Server {sid}', 'An ad', ','.join(rng.sample(TAGS, 3)), None)
+        for sid in range(server_count)
+    ))
+    rows = []
+    thread_id = 10**7
+    for host in range(server_count):
+        for advertised in rng.sample(range(server_count), PARTNERS_PER_SERVER):
+            if advertised != host:
+                thread_id += 1
+                rows.append((host, thread_id, advertised))
+    cursor.executemany('INSERT INTO global_partner_threads VALUES (?, ?, ?)', rows)
+    conn.commit()
+    return conn, rows
+
+
+def timed(conn, sql, params_list):
+    start = time.perf_counter()
+    for params in params_list:
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / len(params_list) * 1e6
+
+
+def run_queries(conn, rows, server_count, tag_sql):
+    rng = random.Random(1)
+    pairs = [(host, advertised) for host, _, advertised in rng.sample(rows, LOOKUPS)]
+    servers = [(rng.randrange(server_count),) for _ in range(LOOKUPS)]
+    results = {
+        'pair lookup': timed(conn, 'SELECT thread_id FROM global_partner_threads WHERE hosting_server_id = ? AND advertised_server_id = ?', pairs),
+        'bump targets': timed(conn, 'SELECT hosting_server_id, thread_id FROM global_partner_threads WHERE advertised_server_id = ?', servers),
+        'remove_server scan': timed(conn, 'SELECT rowid FROM global_partner_threads WHERE hosting_server_id = ? OR advertised_server_id = ?',
+                                    [(sid, sid) for sid, in servers[:50]]),
+        'tag filter': timed(conn, tag_sql, [(tag,) for tag in TAGS] * 5),
+    }
+    return results
+
+
+def main():
+    for server_count in (1000, 10000):
+        path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        conn, rows = build_legacy_db(path, server_count)
+        print(f"\n=== {server_count} servers, {len(rows)} global_partner_threads rows ===")
+
+        before = run_queries(conn, rows, server_count, "SELECT server_id FROM servers WHERE ',' || tags || ',' LIKE '%,' || ? || ',%'")
+        migrate(conn)
+        after = run_queries(conn, rows, server_count, 'SELECT server_id FROM server_tags WHERE tag = ?')
+
+        for name in before:
+            print(f"{name:<20} before={before[name]:>10.1f}us  after={after[name]:>8.1f}us  ({before[name] / max(after[name], 1e-9):.0f}x)")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Local stand-in for the parts of the Discord API the bot uses.
+
+``FakeDiscord`` is an aiohttp server that answers the REST routes the job
+handlers and bump propagation call, with per-route buckets that send real
+``X-RateLimit-*`` headers and 429s, plus injected latency. It runs on its
+own thread and event loop so its work never shows up as lag in the bot's
+loop. ``seed_gateway`` plays the part of the gateway by putting guilds and
+forums into a client's cache the way GUILD_CREATE would.
+"""
+
+import asyncio
+import datetime
+import json
+import random
+import threading
+import time
+from collections import Counter
+
+from aiohttp import web
+
+BOT_ID = 900000000000000001
+API_PREFIX = '/api/v10'
+
+
+def json_response(data, status=200, headers=None):
+    # discord.py only parses bodies whose Content-Type is exactly application/json, with no charset
+    return web.Response(body=json.dumps(data).encode('utf-8'), status=status,
+                        headers={'Content-Type': 'application/json', **(headers or {})})
+
+
+def now_iso():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def bot_user():
+    return {'id': str(BOT_ID), 'username': 'Nomon', 'discriminator': '0', 'avatar': None,
+            'global_name': None, 'bot': True}
+
+
+class Bucket:
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self):
+        """Return ``(allowed, remaining, reset_after)``."""
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+        if self.remaining <= 0:
+            return False, 0, self.reset_at - now
+        self.remaining -= 1
+        return True, self.remaining, self.reset_at - now
+
+
+class FakeDiscord:
+    def __init__(self, latency=0.05, jitter=0.02, bucket_limit=5, bucket_window=1.0, spurious_429=0.0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        # Chance of a 429 from a shared or global bucket the headers did not predict
+        self.spurious_429 = spurious_429
+        self.random = random.Random(seed)
+        self.channels = {}
+        self.messages = {}
+        self.buckets = {}
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self._next_id = 1000000000000000000
+        self._loop = None
+        self._runner = None
+        self.port = None
+
+    def snowflake(self):
+        self._next_id += 1
+        return self._next_id
+
+    # ----- network fixtures -----
+
+    def add_forum(self, guild_id, forum_id, tag_names=()):
+        self.channels[forum_id] = {
+            'id': str(forum_id), 'type': 15, 'guild_id': str(guild_id), 'name': 'partners', 'position': 0,
+            'permission_overwrites': [], 'nsfw': False, 'parent_id': None, 'flags': 0,
+            'available_tags': [{'id': str(forum_id + i + 1), 'name': name, 'moderated': False,
+                                'emoji_id': None, 'emoji_name': None} for i, name in enumerate(tag_names)],
+            'default_reaction_emoji': None, 'default_sort_order': None, 'default_forum_layout': 0,
+        }
+        return self.channels[forum_id]
+
+    def thread_payload(self, thread_id, guild_id, parent_id, name, applied_tags):
+        return {
+            'id': str(thread_id), 'type': 11, 'guild_id': str(guild_id), 'parent_id': str(parent_id), 'name': name,
+            'owner_id': str(BOT_ID), 'message_count': 1, 'member_count': 1, 'rate_limit_per_user': 0, 'flags': 0,
+            'applied_tags': applied_tags, 'last_message_id': str(thread_id),
+            'thread_metadata': {'archived': False, 'auto_archive_duration': 10080,
+                                'archive_timestamp': now_iso(), 'locked': False},
+        }
+
+    def message_payload(self, message_id, channel_id, content):
+        return {
+            'id': str(message_id), 'channel_id': str(channel_id), 'author': bot_user(), 'content': content,
+            'timestamp': now_iso(), 'edited_timestamp': None, 'tts': False, 'mention_everyone': False,
+            'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': [], 'pinned': False, 'type': 0,
+        }
+
+    # ----- request plumbing -----
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        major = request.match_info.get('channel_id', '')
+        key = (request.method, route, major)
+        self.calls[(request.method, route)] += 1
+
+        await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = Bucket(self.bucket_limit, self.bucket_window)
+        allowed, remaining, reset_after = bucket.take()
+        if allowed and self.spurious_429 and self.random.random() < self.spurious_429:
+            allowed, reset_after = False, self.bucket_window
+        headers = {
+            'X-RateLimit-Limit': str(self.bucket_limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': f"{time.time() + reset_after:.3f}",
+            'X-RateLimit-Reset-After': f"{reset_after:.3f}",
+            'X-RateLimit-Bucket': f"{request.method}:{route}",
+        }
+        if not allowed:
+            self.rate_limited[(request.method, route)] += 1
+            headers['Retry-After'] = f"{reset_after:.3f}"
+            headers['X-RateLimit-Scope'] = 'user'
+            return json_response({'message': 'You are being rate limited.', 'retry_after': reset_after, 'global': False},
+                                     status=429, headers=headers)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    def not_found(self, what='Channel', code=10003):
+        return json_response({'message': f'Unknown {what}', 'code': code}, status=404)
+
+    async def get_me(self, request):
+        return json_response(bot_user())
+
+    async def get_application(self, request):
+        # discord.py 2.4+ fetches this during login()
+        return json_response({'id': str(BOT_ID), 'name': 'Nomon', 'description': '', 'icon': None,
+                              'bot_public': True, 'bot_require_code_grant': False, 'owner': bot_user(),
+                              'verify_key': '0' * 64, 'flags': 0})
+
+    async def get_channel(self, request):
+        channel = self.channels.get(int(request.match_info['channel_id']))
+        return json_response(channel) if channel else self.not_found()
+
+    async def edit_channel(self, request):
+        channel = self.channels.get(int(request.match_info['channel_id']))
+        if channel is None:
+            return self.not_found()
+        body = await request.json()
+        for field in ('name', 'applied_tags'):
+            if field in body:
+                channel[field] = body[field]
+        if 'archived' in body:
+            channel['thread_metadata']['archived'] = body['archived']
+        return json_response(channel)
+
+    async def delete_channel(self, request):
+        channel = self.channels.pop(int(request.match_info['channel_id']), None)
+        if channel is None:
+            return self.not_found()
+        self.messages.pop(int(channel['id']), None)
+        return json_response(channel)
+
+    async def create_thread(self, request):
+        forum = self.channels.get(int(request.match_info['channel_id']))
+        if forum is None:
+            return self.not_found()
+        body = await request.json()
+        thread_id = self.snowflake()
+        thread = self.thread_payload(thread_id, forum['guild_id'], forum['id'], body.get('name', ''), body.get('applied_tags', []))
+        message = self.message_payload(thread_id, thread_id, body.get('message', {}).get('content', ''))
+        self.channels[thread_id] = thread
+        self.messages[thread_id] = message
+        return json_response(dict(thread, message=message), status=201)
+
+    async def get_message(self, request):
+        message = self.messages.get(int(request.match_info['message_id']))
+        return json_response(message) if message else self.not_found('Message', 10008)
+
+    async def edit_message(self, request):
+        message = self.messages.get(int(request.match_info['message_id']))
+        if message is None:
+            return self.not_found('Message', 10008)
+        body = await request.json()
+        for field in ('content', 'embeds'):
+            if field in body:
+                message[field] = body[field]
+        message['edited_timestamp'] = now_iso()
+        return json_response(message)
+
+    def app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get(f'{API_PREFIX}/users/@me', self.get_me)
+        app.router.add_get(f'{API_PREFIX}/oauth2/applications/@me', self.get_application)
+        app.router.add_get(f'{API_PREFIX}/channels/{{channel_id}}', self.get_channel)
+        app.router.add_patch(f'{API_PREFIX}/channels/{{channel_id}}', self.edit_channel)
+        app.router.add_delete(f'{API_PREFIX}/channels/{{channel_id}}', self.delete_channel)
+        app.router.add_post(f'{API_PREFIX}/channels/{{channel_id}}/threads', self.create_thread)
+        app.router.add_get(f'{API_PREFIX}/channels/{{channel_id}}/messages/{{message_id}}', self.get_message)
+        app.router.add_patch(f'{API_PREFIX}/channels/{{channel_id}}/messages/{{message_id}}', self.edit_message)
+        return app
+
+    def start(self):
+        """Serve on a background thread; returns the base URL to point discord.py at."""
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, name='fake-discord', daemon=True).start()
+        started.wait()
+        return f'http://127.0.0.1:{self.port}{API_PREFIX}'
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def reset_counters(self):
+        # Runs on the server thread so counts are never reset mid-request
+        async def reset():
+            self.calls.clear()
+            self.rate_limited.clear()
+        asyncio.run_coroutine_threadsafe(reset(), self._loop).result()
+
+
+def seed_gateway(client, fake, guild_ids):
+    """Put each guild and its forum in the client's cache, as GUILD_CREATE would on connect."""
+    import discord
+
+    state = client._connection
+    for guild_id in guild_ids:
+        forums = [channel for channel in fake.channels.values() if channel['type'] == 15 and int(channel['guild_id']) == guild_id]
+        data = {
+            'id': str(guild_id), 'name': f'Guild {guild_id}', 'owner_id': str(BOT_ID), 'member_count': 1,
+            'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+                       'hoist': False, 'managed': False, 'mentionable': False}],
+            'emojis': [], 'stickers': [], 'features': [], 'channels': forums, 'threads': [],
+        }
+        state._add_guild(discord.Guild(data=data, state=state))
@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.migrations import migrate
+from utils.partner_ads import ad_fingerprint, render_partner_ad
+
+TAGS = ['RP', 'ERP', 'Community', 'Gaming', 'Art', 'Anime', 'Music', 'Chat']
+SERVER_BASE = 300000000000000000
+THREAD_BASE = 1100000000000000000
+WORDS = ['cozy', 'friendly', 'active', 'events', 'art', 'voice', 'chill', 'giveaways', 'roles', 'bots', 'memes', 'gaming']
+
+
+def server_id(index):
+    return SERVER_BASE + index * 1000
+
+
+def generate(path, servers, fill=1.0, seed=1, batch=50000):
+    """Write an N-server network to ``path``; returns the number of global_partner_threads rows.
+
+    Every server hosts a thread for each other server, so a full network has
+    N * (N - 1) rows; ``fill`` below 1.0 leaves that share of pairs missing,
+    the way an interrupted sync would.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+    migrate(conn)
+
+    registrations = []
+    for i in range(servers):
+        sid = server_id(i)
+        tags = ','.join(rng.sample(TAGS, rng.randint(1, 4)))
+        ad = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 120)))
+        registrations.append((sid, sid + 1, f'Server {i}', ad, tags, f'https://discord.gg/net{i:05d}'))
+    conn.executemany('INSERT INTO servers (server_id, forum_channel_id, server_name, advertisement, tags, invite_url) VALUES (?, ?, ?, ?, ?, ?)',
+                     registrations)
+    conn.executemany('INSERT INTO whitelisted_servers (server_id) VALUES (?)', [(sid,) for sid, *_ in registrations])
+
+    hashes = {}
+    for sid, _, name, ad, tags, invite in registrations:
+        rendered = render_partner_ad(sid, name, ad, tags, invite, "Nomons's Cottage", '01/01/2026')
+        hashes[sid] = ad_fingerprint(rendered.title, rendered.content, rendered.tags)
+
+    thread_id = THREAD_BASE
+    # Each server's own partner thread, bumped at some point in the last day
+    now = int(time.time())
+    own = []
+    for sid, *_ in registrations:
+        thread_id += 1
+        last_bump = now - rng.randrange(86400)
+        own.append((sid, thread_id, last_bump, last_bump + 7200, thread_id + 10**15, hashes[sid]))
+    conn.executemany('INSERT INTO partner_threads (server_id, thread_id, last_bump, next_bump, last_bump_message_id, ad_hash) VALUES (?, ?, ?, ?, ?, ?)',
+                     own)
+
+    rows = 0
+    pending = []
+    for host, *_ in registrations:
+        for advertised, *_ in registrations:
+            if host == advertised or (fill < 1.0 and rng.random() >= fill):
+                continue
+            thread_id += 1
+            pending.append((host, thread_id, advertised, hashes[advertised]))
+            if len(pending) >= batch:
+                conn.executemany('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id, ad_hash) VALUES (?, ?, ?, ?)',
+                                 pending)
+                rows += len(pending)
+                pending = []
+    conn.executemany('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id, ad_hash) VALUES (?, ?, ?, ?)',
+                     pending)
+    rows += len(pending)
+
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic partner network database.")
+    parser.add_argument('path')
+    parser.add_argument('--servers', type=int, default=1000)
+    parser.add_argument('--fill', type=float, default=1.0, help="share of (host, advertised) pairs that already have a thread")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        parser.error(f"{args.path} already exists")
+    start = time.perf_counter()
+    rows = generate(args.path, args.servers, args.fill, args.seed)
+    print(f"Wrote {args.servers} servers and {rows} global_partner_threads rows to {args.path} "
+          f"in {time.perf_counter() - start:.1f}s ({os.path.getsize(args.path) / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.ext import commands
+
+from bench_db_blocking import measure
+from fake_discord import FakeDiscord, seed_gateway
+from utils.rest_workers import RestWorkerPool
+
+DEV_ID = 800000000000000001
+GUILD_BASE = 200000000000000000
+TAGS = ['Gaming', 'Art', 'Anime', 'Community', 'Music']
+
+
+class FakeResponse:
+    def __init__(self, replies):
+        self.replies = replies
+
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, content=None, **kwargs):
+        self.replies.append(content)
+
+
+class FakeFollowup(FakeResponse):
+    async def send(self, content=None, **kwargs):
+        self.replies.append(content)
+
+
+class FakeInteraction:
+    """Just enough of an Interaction for a dev command callback."""
+
+    def __init__(self):
+        self.replies = []
+        self.user = SimpleNamespace(id=DEV_ID)
+        self.guild_id = None
+        self.response = FakeResponse(self.replies)
+        self.followup = FakeFollowup(self.replies)
+
+
+def guild_id(index):
+    return GUILD_BASE + index * 1000
+
+
+def seed_network(db_path, fake, servers):
+    import sqlite3
+    from utils.migrations import migrate
+
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    for i in range(servers):
+        gid = guild_id(i)
+        tags = ','.join(TAGS[j % len(TAGS)] for j in range(i % 3 + 1))
+        conn.execute('INSERT INTO servers (server_id, forum_channel_id, server_name, advertisement, tags, invite_url) VALUES (?, ?, ?, ?, ?, ?)',
+                     (gid, gid + 1, f'Server {i}', f'Come hang out with server {i}!', tags, f'https://discord.gg/fake{i}'))
+        conn.execute('INSERT INTO whitelisted_servers (server_id) VALUES (?)', (gid,))
+        fake.add_forum(gid, gid + 1, TAGS)
+    conn.execute('INSERT INTO devs (user_id) VALUES (?)', (DEV_ID,))
+    conn.commit()
+    conn.close()
+
+
+async def drain(queue, db):
+    """Run the job queue until nothing is pending, sleeping only until the next retry is due."""
+    while True:
+        if await queue.run_batch():
+            continue
+        pending, = await db.fetchone("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')")
+        if not pending:
+            failed, = await db.fetchone("SELECT COUNT(*) FROM jobs WHERE status = 'failed'")
+            return failed
+        await asyncio.sleep(await queue._idle_timeout())
+
+
+async def run_size(servers, args):
+    from dev_commands import DevCommands
+    from utils.auth_cache import auth_cache
+    from utils.bump_propagation import propagate_bump
+    from utils.partner_ads import forum_tags
+
+    fake = FakeDiscord(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, bucket_limit=args.bucket_limit,
+                       bucket_window=args.bucket_window, spurious_429=args.spurious_429)
+    base = fake.start()
+    discord.http.Route.BASE = base
+
+    workdir = tempfile.mkdtemp(prefix=f'nomon-load-{servers}-')
+    os.chdir(workdir)
+    os.makedirs('databases')
+    seed_network(os.path.join('databases', 'bump.db'), fake, servers)
+    forum_tags._by_forum.clear()
+
+    bot = commands.Bot(command_prefix='!', intents=discord.Intents(guilds=True))
+    # Set before the cog builds the job queue, as NomonBot.setup_hook does
+    bot.rest_pool = RestWorkerPool('fake-token', args.rest_workers, api_base=base) if args.rest_workers else None
+    await bot.login('fake-token')
+    if args.gateway:
+        seed_gateway(bot, fake, [guild_id(i) for i in range(servers)])
+    auth_cache.devs.add(DEV_ID)
+
+    cog = DevCommands(bot)
+    home = guild_id(0)
+    results = []
+
+    async def scenario(name, workload):
+        fake.reset_counters()
+        outcome = {}
+
+        async def run():
+            outcome['result'] = await workload()
+
+        timing = await measure(run)
+        results.append({
+            'servers': servers,
+            'scenario': name,
+            'wall_s': round(timing['wall'], 3),
+            'max_lag_ms': round(timing['max_lag_ms'], 2),
+            'p99_lag_ms': round(timing['p99_lag_ms'], 2),
+            'rest_calls': sum(fake.calls.values()),
+            'rest_429': sum(fake.rate_limited.values()),
+            'by_route': {f'{method} {route}': count for (method, route), count in sorted(fake.calls.items())},
+            'result': outcome.get('result'),
+        })
+
+    async def dev_sync():
+        interaction = FakeInteraction()
+        await DevCommands.dev_sync.callback(cog, interaction, str(home))
+        return {'failed_jobs': await drain(cog.jobs, cog.db), 'reply': interaction.replies[-1]}
+
+    async def bump():
+        report = await propagate_bump(bot, cog.db, home, content=f"**Server 0** bumped at {time.strftime('%H:%M:%S')}")
+        return {'edited': report.edited, 'skipped': report.skipped, 'failed': report.failed,
+                'p95_edit_s': round(report.percentile(95), 3)}
+
+    repeat_content = "**Server 0** bumped (unchanged)"
+
+    async def bump_unchanged():
+        await propagate_bump(bot, cog.db, home, content=repeat_content)
+        report = await propagate_bump(bot, cog.db, home, content=repeat_content)
+        return {'edited': report.edited, 'skipped': report.skipped}
+
+    async def delete_all():
+        interaction = FakeInteraction()
+        await DevCommands.delete_all_threads.callback(cog, interaction)
+        return {'failed_jobs': await drain(cog.jobs, cog.db), 'reply': interaction.replies[-1]}
+
+    await scenario('dev_sync', dev_sync)
+    await scenario('bump', bump)
+    await scenario('bump_unchanged_x2', bump_unchanged)
+    await scenario('delete_all_threads', delete_all)
+
+    await bot.close()
+    if bot.rest_pool is not None:
+        bot.rest_pool.shutdown()
+    await cog.db.close()
+    fake.stop()
+    return results
+
+
+def print_table(results):
+    print(f"{'servers':>7} {'scenario':<20} {'wall':>9} {'REST':>7} {'429s':>6} {'max lag':>9} {'p99 lag':>9}")
+    for row in results:
+        print(f"{row['servers']:>7} {row['scenario']:<20} {row['wall_s']:>8.2f}s {row['rest_calls']:>7} {row['rest_429']:>6} "
+              f"{row['max_lag_ms']:>7.1f}ms {row['p99_lag_ms']:>7.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Drive dev_sync, bumps and delete_all_threads against a fake Discord.")
+    parser.add_argument('--servers', default='10,100', help="comma-separated network sizes, e.g. 10,100,1000")
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--bucket-limit', type=int, default=10, help="requests per route bucket per window")
+    parser.add_argument('--bucket-window', type=float, default=1.0)
+    parser.add_argument('--spurious-429', type=float, default=0.0, help="chance of an unpredicted 429 per request")
+    parser.add_argument('--gateway', action='store_true', help="pre-fill the guild cache as the gateway would")
+    parser.add_argument('--rest-workers', type=int, default=0, help="run queued jobs in this many REST worker processes")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    results = []
+    for servers in (int(size) for size in args.servers.split(',')):
+        results.extend(await run_size(servers, args))
+    os.chdir(cwd)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bump_propagation import propagate_bump
+from utils.database import Database
+from utils.channel_cache import ChannelResolver
+from utils.discord_jobs import COMPLETIONS, HANDLERS, create_thread
+from utils.job_queue import JobQueue
+
+
+def not_found(code):
+    return discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), {'message': 'Unknown', 'code': code})
+
+
+class Bot:
+    """Partial messageables whose edits fail with the 404 code set for their channel."""
+
+    def __init__(self, errors):
+        self.errors = errors
+
+    def get_partial_messageable(self, channel_id):
+        async def edit(**fields):
+            if channel_id in self.errors:
+                raise not_found(self.errors[channel_id])
+
+        return SimpleNamespace(get_partial_message=lambda message_id: SimpleNamespace(edit=edit))
+
+
+async def network():
+    db = Database(os.path.join(tempfile.mkdtemp(prefix='nomon-discord-jobs-'), 'bump.db'))
+    await db.executemany('INSERT INTO partner_threads (server_id, thread_id, last_bump_message_id) VALUES (?, ?, ?)',
+                         [(1, 91, 9100), (2, 92, 9200)])
+    return db
+
+
+async def check_deleted_bump_message():
+    db = await network()
+    # Thread 91 is still there but its bump message was deleted; thread 92 is gone
+    queue = JobQueue(db, Bot({91: 10008, 92: 10003}), HANDLERS, COMPLETIONS)
+    await queue.enqueue_many([
+        ('edit_message', {'channel_id': 91, 'message_id': 9100, 'content': 'Bumped!', 'bump_hash': 'b'}, 'edit:91', 91),
+        ('edit_message', {'channel_id': 92, 'message_id': 9200, 'content': 'Bumped!', 'bump_hash': 'b'}, 'edit:92', 92),
+    ])
+    await queue.run_batch()
+    rows = await db.fetchall('SELECT thread_id, last_bump_message_id, bump_hash FROM partner_threads ORDER BY thread_id')
+    await db.close()
+    return rows
+
+
+def test_deleted_bump_message_keeps_thread():
+    print("Testing a bump edit whose message was deleted...")
+    rows = asyncio.run(check_deleted_bump_message())
+    assert rows == [(91, None, None)], rows
+    print("✅ Unknown Message clears last_bump_message_id; only Unknown Channel drops the thread")
+
+
+async def check_propagate_deleted_message():
+    db = await network()
+    await db.execute('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id) VALUES (2, 201, 1)')
+    report = await propagate_bump(Bot({91: 10008, 201: 10003}), db, 1, content='Bumped!')
+    own = await db.fetchone('SELECT last_bump_message_id FROM partner_threads WHERE thread_id = 91')
+    await db.close()
+    return report, own
+
+
+def test_propagate_bump_tells_404s_apart():
+    print("\nTesting propagate_bump with a deleted bump message and a deleted thread...")
+    report, own = asyncio.run(check_propagate_deleted_message())
+    assert report.missing == [201], report.missing
+    assert report.lost_messages == [(91, 9100)] and own == (None,), (report.lost_messages, own)
+    print("✅ Only the deleted thread is reported missing; the own thread falls back to its starter message")
+
+
+class ForumBot:
+    """REST-only view of a forum on another shard: each fetch returns a fresh object with the current tags."""
+
+    def __init__(self):
+        self.tag_names = ['Art']
+        self.applied = []
+
+    def get_channel(self, channel_id):
+        return None
+
+    async def fetch_channel(self, channel_id):
+        async def create(name, content, applied_tags):
+            self.applied.append([tag.name for tag in applied_tags])
+            return SimpleNamespace(thread=SimpleNamespace(id=len(self.applied)))
+
+        tags = [SimpleNamespace(id=n, name=name) for n, name in enumerate(self.tag_names)]
+        return SimpleNamespace(id=channel_id, available_tags=tags, create_thread=create)
+
+
+async def check_tags_follow_resolver():
+    bot = ForumBot()
+    bot.channel_resolver = ChannelResolver(bot, ttl=0.05)
+    payload = {'forum_id': 22, 'title': 'Ad', 'content': 'Join us', 'tags': ['Art', 'Music']}
+    await create_thread(bot, payload)
+    # Added on Discord; no gateway event reaches this process
+    bot.tag_names.append('Music')
+    await create_thread(bot, payload)
+    await asyncio.sleep(0.1)
+    await create_thread(bot, payload)
+    return bot.applied
+
+
+def test_tags_follow_resolver():
+    print("\nTesting forum tags for a forum this process gets no events for...")
+    applied = asyncio.run(check_tags_follow_resolver())
+    assert applied == [['Art'], ['Art'], ['Art', 'Music']], applied
+    print("✅ The new tag is used once the resolver re-fetches the forum")
+
+
+async def check_lapsed_create():
+    # Two queues on one file, the way two shard processes share bump.db
+    db_a = await network()
+    db_b = Database(db_a.path)
+    release = asyncio.Event()
+    started = asyncio.Event()
+
+    async def slow_create(bot, payload):
+        started.set()
+        await release.wait()
+        return 701
+
+    async def fast_create(bot, payload):
+        return 702
+
+    queue_a = JobQueue(db_a, None, {'create_thread': slow_create}, COMPLETIONS)
+    queue_b = JobQueue(db_b, None, {'create_thread': fast_create}, COMPLETIONS)
+    await queue_a.enqueue('create_thread', {'hosting_server_id': 1, 'advertised_server_id': 2, 'forum_id': 11},
+                          key='create_thread:1:2', lane=1)
+    batch_a = asyncio.create_task(queue_a.run_batch())
+    await started.wait()
+    # Process A hangs past its lease, so B runs the job again and records its thread first
+    await db_b.execute('UPDATE jobs SET lease_expires_at = 0')
+    await queue_b.run_batch()
+    release.set()
+    await batch_a
+
+    threads = await db_a.fetchall('SELECT thread_id FROM global_partner_threads')
+    jobs = await db_a.fetchall('SELECT kind, payload FROM jobs')
+    await db_b.close()
+    await db_a.close()
+    return threads, jobs
+
+
+def test_lapsed_create_deletes_extra_thread():
+    print("\nTesting a create_thread job that finished after losing its lease...")
+    threads, jobs = asyncio.run(check_lapsed_create())
+    assert threads == [(702,)], threads
+    assert [(kind, json.loads(payload)['thread_id']) for kind, payload in jobs] == [('delete_thread', 701)], jobs
+    print("✅ The re-run's thread is kept and the late run's thread is queued for deletion")
+
+
+if __name__ == "__main__":
+    test_deleted_bump_message_keeps_thread()
+    test_propagate_bump_tells_404s_apart()
+    test_tags_follow_resolver()
+    test_lapsed_create_deletes_extra_thread()
+    print("\nAll Discord job checks passed.")
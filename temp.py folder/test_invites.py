@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database
+from utils.invites import InviteManager
+
+DEAD_URL = 'https://discord.gg/dead'
+
+
+class Bot:
+    async def fetch_invite(self, url, with_counts=False):
+        if url == DEAD_URL:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), {'message': 'Unknown Invite', 'code': 10006})
+        return SimpleNamespace(url=url)
+
+
+def guild(can_invite):
+    async def create_invite(**kwargs):
+        if not can_invite:
+            raise discord.Forbidden(SimpleNamespace(status=403, reason='Forbidden'), {'message': 'Missing Permissions', 'code': 50013})
+        return SimpleNamespace(url='https://discord.gg/fresh')
+
+    channel = SimpleNamespace(id=11, create_invite=create_invite)
+    return SimpleNamespace(id=1, me=None, text_channels=[channel], get_channel=lambda channel_id: None)
+
+
+async def check_ensure_invite(can_invite):
+    db = Database(os.path.join(tempfile.mkdtemp(prefix='nomon-invites-'), 'bump.db'))
+    await db.execute('INSERT INTO servers (server_id, server_name, invite_url) VALUES (1, ?, ?)', ('One', DEAD_URL))
+    invites = InviteManager(Bot(), db)
+    _, stale = await invites.stale_servers()
+    invite_url = await invites.ensure_invite(guild(can_invite))
+    stored, = await db.fetchone('SELECT invite_url FROM servers WHERE server_id = 1')
+    await db.close()
+    return stale, invite_url, stored
+
+
+def test_dead_invite_is_never_returned():
+    print("Testing an invite that cannot be replaced...")
+    stale, invite_url, stored = asyncio.run(check_ensure_invite(can_invite=False))
+    assert stale == [(1, DEAD_URL)], stale
+    assert invite_url is None, invite_url
+    assert stored == DEAD_URL, stored
+    print("✅ ensure_invite returns None, so the sweep queues no refresh")
+
+
+def test_replacement_is_stored():
+    print("\nTesting an invite that can be replaced...")
+    _, invite_url, stored = asyncio.run(check_ensure_invite(can_invite=True))
+    assert invite_url == stored == 'https://discord.gg/fresh', (invite_url, stored)
+    print("✅ New invite stored and returned, so mirrored ads are refreshed once")
+
+
+if __name__ == "__main__":
+    test_dead_invite_is_never_returned()
+    test_replacement_is_stored()
+    print("\nAll invite checks passed.")
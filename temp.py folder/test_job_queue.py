@@ -0,0 +1,260 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database
+from utils.job_queue import JobQueue
+
+
+class Forbidden(Exception):
+    status = 403
+
+
+def new_db(path=None):
+    return Database(path or os.path.join(tempfile.mkdtemp(prefix='nomon-jobs-'), 'bump.db'))
+
+
+async def drain(queue):
+    batches = 0
+    while await queue.run_batch():
+        batches += 1
+    return batches
+
+
+async def job_rows(db):
+    return await db.fetchall('SELECT kind, status, attempts, next_run_at, last_error FROM jobs ORDER BY id')
+
+
+async def check_claim_spreads_lanes(servers=60, latency=0.005):
+    db = new_db()
+    running = 0
+    peak = 0
+
+    async def create_thread(bot, payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(latency)
+        running -= 1
+        return payload['host'] * 1000 + payload['advertised']
+
+    queue = JobQueue(db, SimpleNamespace(), {'create_thread': create_thread})
+    # The shape enqueue_sync_plan gives a full-network sync: grouped by host, laned by host
+    jobs = [('create_thread', {'host': host, 'advertised': advertised}, f"create_thread:{host}:{advertised}", host)
+            for host in range(servers) for advertised in range(servers) if host != advertised]
+    await queue.enqueue_many(jobs)
+
+    started = time.perf_counter()
+    await drain(queue)
+    wall = time.perf_counter() - started
+    serial = len(jobs) * latency
+    remaining = await job_rows(db)
+    await db.close()
+    return peak, wall, serial, remaining
+
+
+def test_claim_spreads_lanes():
+    print("Testing that a host-grouped sync keeps every worker busy...")
+    peak, wall, serial, remaining = asyncio.run(check_claim_spreads_lanes())
+    assert not remaining, remaining
+    assert peak == 10, peak
+    assert wall < serial / 4, (wall, serial)
+    print(f"✅ Peak concurrency {peak}/10, {wall:.2f}s against {serial:.2f}s serial")
+
+
+async def check_lanes_take_turns():
+    db = new_db()
+    done = []
+
+    async def handler(bot, payload):
+        done.append(payload['lane'])
+
+    queue = JobQueue(db, SimpleNamespace(), {'job': handler}, batch_size=3)
+    await queue.enqueue_many([('job', {'lane': 1}, f"big:{i}", 1) for i in range(100)])
+    await queue.enqueue_many([('job', {'lane': lane}, f"small:{lane}", lane) for lane in range(2, 7)])
+    for _ in range(3):
+        await queue.run_batch()
+    await db.close()
+    return done
+
+
+def test_lanes_take_turns():
+    print("\nTesting that a busy lane cannot starve the others...")
+    done = asyncio.run(check_lanes_take_turns())
+    assert set(range(2, 7)) <= set(done), done
+    assert done.count(1) <= 2, done
+    print(f"✅ Every small lane ran within three batches: {done}")
+
+
+async def check_retry_and_failure():
+    db = new_db()
+    calls = {'flaky': 0}
+
+    async def flaky(bot, payload):
+        calls['flaky'] += 1
+        raise OSError("connection reset")
+
+    async def forbidden(bot, payload):
+        raise Forbidden("Missing Permissions")
+
+    queue = JobQueue(db, SimpleNamespace(), {'flaky': flaky, 'forbidden': forbidden}, max_attempts=2, base_delay=60)
+    await queue.enqueue('flaky', {}, key='flaky', lane=1)
+    await queue.enqueue('forbidden', {}, key='forbidden', lane=2)
+
+    await queue.run_batch()
+    after_first = await job_rows(db)
+    # Nothing is due until the backoff passes
+    claimed_early = await queue.run_batch()
+    await db.execute("UPDATE jobs SET next_run_at = 0 WHERE kind = 'flaky'")
+    await queue.run_batch()
+    after_second = await job_rows(db)
+    await db.close()
+    return after_first, claimed_early, after_second, calls['flaky']
+
+
+def test_retry_and_failure():
+    print("\nTesting retries and permanent failures...")
+    after_first, claimed_early, after_second, flaky_calls = asyncio.run(check_retry_and_failure())
+    (kind, status, attempts, next_run_at, error), forbidden = after_first
+    assert (kind, status, attempts) == ('flaky', 'pending', 1), after_first
+    assert next_run_at > time.time() + 30 and 'connection reset' in error, after_first
+    assert forbidden[:3] == ('forbidden', 'failed', 1), forbidden
+    print("✅ Network errors back off, 4xx errors fail at once")
+
+    assert claimed_early == 0
+    assert after_second[0][:3] == ('flaky', 'failed', 2) and flaky_calls == 2, after_second
+    print("✅ Retries wait for next_run_at and stop at max_attempts")
+
+
+async def check_record():
+    db = new_db()
+
+    async def create_thread(bot, payload):
+        return 555
+
+    def record_thread(writer, payload, thread_id):
+        writer.execute('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id) VALUES (?, ?, ?)',
+                       (payload['host'], thread_id, payload['advertised']))
+
+    queue = JobQueue(db, SimpleNamespace(), {'create_thread': create_thread}, {'create_thread': record_thread})
+    await queue.enqueue('create_thread', {'host': 1, 'advertised': 2}, key='create_thread:1:2', lane=1)
+    await queue.run_batch()
+    threads = await db.fetchall('SELECT hosting_server_id, thread_id, advertised_server_id FROM global_partner_threads')
+    jobs = await job_rows(db)
+    await db.close()
+    return threads, jobs
+
+
+def test_record():
+    print("\nTesting that completions are recorded with the job...")
+    threads, jobs = asyncio.run(check_record())
+    assert threads == [(1, 555, 2)], threads
+    assert jobs == [], jobs
+    print("✅ Thread row written and job retired in the same batch")
+
+
+async def check_enqueue_chunks():
+    db = new_db()
+    queue = JobQueue(db, SimpleNamespace(), {}, enqueue_batch_size=500)
+    jobs = [('job', {'n': n}, f"job:{n}", n) for n in range(1200)]
+    await db.run(lambda conn: None)
+    commits_before = db.metrics.commits
+    queued = await queue.enqueue_many(jobs)
+    commits = db.metrics.commits - commits_before
+    requeued = await queue.enqueue_many(jobs)
+    await db.close()
+    return queued, commits, requeued
+
+
+def test_enqueue_chunks():
+    print("\nTesting that a large enqueue commits in chunks...")
+    queued, commits, requeued = asyncio.run(check_enqueue_chunks())
+    assert (queued, commits) == (1200, 3), (queued, commits)
+    assert requeued == 0, requeued
+    print(f"✅ {queued} jobs queued in {commits} transactions; a repeat queues nothing")
+
+
+async def check_progress():
+    db = new_db()
+
+    async def job(bot, payload):
+        if payload['n'] == 0:
+            raise Forbidden()
+
+    queue = JobQueue(db, SimpleNamespace(), {'job': job}, batch_size=2)
+    await queue.enqueue_many([('job', {'n': n}, f"job:{n}", n) for n in range(5)], label='/dev_sync 1')
+    before = await queue.progress()
+    await queue.run_batch()
+    after = await queue.progress()
+    await db.close()
+    return [run[:4] for run in before], [run[:4] for run in after]
+
+
+def test_progress():
+    print("\nTesting per-command progress...")
+    before, after = asyncio.run(check_progress())
+    assert before == [('/dev_sync 1', 5, 0, 0)], before
+    assert after == [('/dev_sync 1', 5, 1, 1)], after
+    print("✅ /dev_sync 1: 1/5 done and 1 failed after one batch of two")
+
+
+async def check_leases():
+    # Two queues on one file, the way two shard processes share bump.db
+    db_a = new_db()
+    db_b = new_db(db_a.path)
+    release = asyncio.Event()
+    started = asyncio.Event()
+    ran = []
+
+    async def slow(bot, payload):
+        ran.append(('a', payload['n']))
+        started.set()
+        await release.wait()
+
+    async def fast(bot, payload):
+        ran.append(('b', payload['n']))
+
+    queue_a = JobQueue(db_a, SimpleNamespace(), {'job': slow})
+    queue_b = JobQueue(db_b, SimpleNamespace(), {'job': fast})
+    await queue_a.enqueue_many([('job', {'n': 1}, 'one', 1), ('job', {'n': 2}, 'two', 1), ('job', {'n': 3}, 'three', 2)])
+
+    batch_a = asyncio.create_task(queue_a.run_batch())
+    await started.wait()
+    # A second process starting up must leave live claims and their lanes alone
+    claimed_while_leased = await queue_b.run_batch()
+
+    await db_b.execute("UPDATE jobs SET lease_expires_at = 0 WHERE lane = 2")
+    claimed_after_expiry = await queue_b.run_batch()
+
+    release.set()
+    await batch_a
+    remaining = await db_a.fetchall('SELECT idempotency_key, status, claimed_by FROM jobs ORDER BY id')
+    await db_b.close()
+    await db_a.close()
+    return claimed_while_leased, claimed_after_expiry, sorted(ran), remaining
+
+
+def test_leases():
+    print("\nTesting claim leases across processes...")
+    claimed_while_leased, claimed_after_expiry, ran, remaining = asyncio.run(check_leases())
+    assert claimed_while_leased == 0, claimed_while_leased
+    print("✅ A second queue neither resets running jobs nor claims their lanes")
+    assert claimed_after_expiry == 1 and ('b', 3) in ran, (claimed_after_expiry, ran)
+    assert remaining == [('two', 'pending', None)], remaining
+    print("✅ Only the expired lease was reclaimed, and its late finish left the re-queued job alone")
+
+
+if __name__ == "__main__":
+    test_claim_spreads_lanes()
+    test_lanes_take_turns()
+    test_retry_and_failure()
+    test_record()
+    test_enqueue_chunks()
+    test_progress()
+    test_leases()
+    print("\nAll job queue checks passed.")
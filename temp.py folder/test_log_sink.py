@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log_sink import HIGH, LOW, NORMAL, LogSink
+
+LOG_PATH = os.path.join(tempfile.mkdtemp(prefix='nomon-log-sink-'), 'nomon_events.log')
+
+
+class Channel:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, embeds):
+        self.messages.append([embed.description for embed in embeds])
+
+
+def sink(**kwargs):
+    channel = Channel()
+    bot = SimpleNamespace(get_channel=lambda channel_id: channel)
+    return LogSink(bot, 1, log_path=LOG_PATH, **kwargs), channel
+
+
+async def check_overflow():
+    log_sink, channel = sink(window=60, max_buffer=5)
+    for n in range(3):
+        log_sink.log(f"Joined {n}", priority=HIGH)
+    for n in range(6):
+        log_sink.log(f"Bumped {n}", priority=LOW)
+    await log_sink.flush()
+    return log_sink.stats(), channel.messages
+
+
+def test_low_priority_dropped_first():
+    print("Testing a buffer overflow...")
+    stats, messages = asyncio.run(check_overflow())
+    assert stats['dropped'] == 4, stats
+    assert messages == [['Joined 0', 'Joined 1', 'Joined 2', 'Bumped 4', 'Bumped 5',
+                         '⚠️ 4 low-priority log events were dropped under load.']], messages
+    print("✅ The 4 oldest low-priority events were dropped and reported; every high-priority one was sent")
+
+
+async def check_summary():
+    log_sink, channel = sink(window=60)
+    for n in range(3):
+        log_sink.log(f"Server {n} registered", priority=NORMAL)
+    for n in range(12):
+        log_sink.log(f"Bumped {n}\nsecond line", priority=LOW)
+    await log_sink.flush()
+    return log_sink.stats(), channel.messages
+
+
+def test_low_priority_summarized():
+    print("\nTesting a flush with more events than fit in one message...")
+    stats, messages = asyncio.run(check_summary())
+    assert len(messages) == 1 and len(messages[0]) == 4, messages
+    assert messages[0][:3] == ['Server 0 registered', 'Server 1 registered', 'Server 2 registered'], messages
+    assert messages[0][3].startswith('🗂️ 12 minor events\n• Bumped 0\n'), messages[0][3]
+    assert stats['summarized'] == 12, stats
+    print("✅ 12 low-priority events folded into one summary embed next to the 3 normal ones")
+
+
+async def check_burst():
+    log_sink, channel = sink(window=0.05)
+    for n in range(25):
+        log_sink.log(f"Joined {n}")
+    await asyncio.sleep(0.2)
+    log_sink._task.cancel()
+    return log_sink.stats(), channel.messages
+
+
+def test_burst_is_batched():
+    print("\nTesting a burst of normal events...")
+    stats, messages = asyncio.run(check_burst())
+    assert [len(message) for message in messages] == [10, 10, 5], messages
+    assert stats['sent_events'] == 25 and stats['dropped'] == 0, stats
+    print("✅ 25 events sent in 3 messages after one window")
+
+
+if __name__ == "__main__":
+    test_low_priority_dropped_first()
+    test_low_priority_summarized()
+    test_burst_is_batched()
+    print("\nAll log sink checks passed.")
@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.migrations import MIGRATIONS, current_version, migrate
+from utils.partner_ads import split_tags
+from utils.registry import duplicate_threads, queue_duplicate_deletions
+
+
+def legacy_db():
+    """bump.db as the old ad-hoc scripts left it, with a few duplicated partner threads."""
+    path = os.path.join(tempfile.mkdtemp(prefix='nomon-migrations-'), 'bump.db')
+    conn = sqlite3.connect(path)
+    migrate(conn, target=2)
+    conn.executemany('INSERT INTO servers (server_id, forum_channel_id, server_name, tags) VALUES (?, ?, ?, ?)', [
+        (1, 11, 'One', 'Gaming,Art'),
+        (2, 12, 'Two', 'Anime'),
+        (3, 13, 'Three', None),
+    ])
+    conn.executemany('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id) VALUES (?, ?, ?)', [
+        (1, 100, 2),
+        (1, 101, 2),   # duplicate pair, different thread: must be deleted on Discord
+        (1, 100, 2),   # duplicate row of the kept thread: must not be deleted
+        (2, 200, 1),
+    ])
+    conn.commit()
+    return conn
+
+
+def server_tags(conn):
+    return sorted(conn.execute('SELECT server_id, tag FROM server_tags'))
+
+
+def expected_tags(conn):
+    return sorted((sid, tag) for sid, tags in conn.execute('SELECT server_id, tags FROM servers') for tag in split_tags(tags) if tag)
+
+
+def test_duplicates_wait_for_the_operator():
+    print("Testing that dropped duplicates are only deleted on request...")
+    conn = legacy_db()
+    migrate(conn)
+
+    rows = conn.execute('SELECT hosting_server_id, thread_id, advertised_server_id FROM global_partner_threads ORDER BY thread_id').fetchall()
+    assert rows == [(1, 100, 2), (2, 200, 1)], rows
+    assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone() == (0,)
+    assert duplicate_threads(conn) == [101], duplicate_threads(conn)
+    print("✅ Upgrading queues nothing; thread 101 is reported as a duplicate")
+
+    assert queue_duplicate_deletions(conn) == [101]
+    jobs = conn.execute("SELECT kind, payload, lane, idempotency_key FROM jobs").fetchall()
+    assert len(jobs) == 1, jobs
+    kind, payload, lane, key = jobs[0]
+    assert (kind, json.loads(payload)['thread_id'], lane, key) == ('delete_thread', 101, 101, 'delete_thread:101'), jobs[0]
+    assert duplicate_threads(conn) == []
+    print("✅ --delete-duplicates queues thread 101; kept thread 100 left alone")
+
+
+def test_queued_duplicates_are_held():
+    print("\nTesting that migration 14 pulls back deletions migration 9 queued...")
+    conn = legacy_db()
+    migrate(conn, target=13)
+    assert conn.execute("SELECT COUNT(*) FROM jobs WHERE kind = 'delete_thread'").fetchone() == (1,)
+    migrate(conn)
+    assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone() == (0,)
+    assert duplicate_threads(conn) == [101], duplicate_threads(conn)
+    print("✅ The pending deletion of thread 101 went back to duplicate_threads")
+
+
+def test_server_tags_follow_servers():
+    print("\nTesting the server_tags triggers...")
+    conn = legacy_db()
+    migrate(conn)
+    assert server_tags(conn) == expected_tags(conn), server_tags(conn)
+
+    conn.execute("INSERT INTO servers (server_id, tags) VALUES (4, 'Music,Art')")
+    conn.execute("UPDATE servers SET tags = 'Chat' WHERE server_id = 1")
+    conn.execute("UPDATE servers SET tags = NULL WHERE server_id = 2")
+    conn.execute("UPDATE servers SET tags = ',RP,,ERP,' WHERE server_id = 3")
+    conn.execute("INSERT INTO servers (server_id, tags) VALUES (5, 'Quote\"d,Back\\slash')")
+    conn.execute('DELETE FROM servers WHERE server_id = 4')
+    conn.commit()
+    assert server_tags(conn) == expected_tags(conn), (server_tags(conn), expected_tags(conn))
+    print("✅ Inserts, edits, cleared tags, odd characters and deletes all mirrored")
+
+
+def test_stale_tags_rebuilt():
+    print("\nTesting that migration 10 rebuilds tags edited before the triggers existed...")
+    conn = legacy_db()
+    migrate(conn, target=9)
+    conn.execute("UPDATE servers SET tags = 'Community' WHERE server_id = 1")
+    conn.commit()
+    assert server_tags(conn) != expected_tags(conn)
+    migrate(conn)
+    assert server_tags(conn) == expected_tags(conn), server_tags(conn)
+    print("✅ server_tags matches servers.tags after the upgrade")
+
+
+def test_hashes_split():
+    print("\nTesting that migration 13 splits ad and bump hashes...")
+    conn = legacy_db()
+    migrate(conn, target=12)
+    conn.execute("UPDATE global_partner_threads SET content_hash = 'ad' WHERE thread_id = 100")
+    conn.execute("INSERT INTO partner_threads (server_id, thread_id, content_hash) VALUES (1, 300, 'bump')")
+    conn.executemany("INSERT INTO jobs (kind, payload, lane, idempotency_key, created_at, updated_at) VALUES (?, ?, 1, ?, 0, 0)", [
+        ('repair_thread', json.dumps({'thread_id': 100, 'content_hash': 'ad'}), 'repair'),
+        ('edit_message', json.dumps({'channel_id': 300, 'content': 'Bumped!', 'content_hash': 'bump'}), 'edit'),
+    ])
+    conn.commit()
+    migrate(conn)
+
+    assert conn.execute('SELECT ad_hash, bump_hash FROM global_partner_threads WHERE thread_id = 100').fetchone() == ('ad', None)
+    assert conn.execute('SELECT ad_hash, bump_hash FROM partner_threads WHERE thread_id = 300').fetchone() == (None, 'bump')
+    payloads = dict(conn.execute("SELECT idempotency_key, payload FROM jobs WHERE idempotency_key IN ('repair', 'edit')"))
+    assert json.loads(payloads['repair']) == {'thread_id': 100, 'ad_hash': 'ad'}, payloads
+    assert json.loads(payloads['edit']) == {'channel_id': 300, 'content': 'Bumped!', 'bump_hash': 'bump'}, payloads
+    print("✅ Columns split and queued payloads renamed")
+
+
+def test_migrate_is_idempotent():
+    print("\nTesting that a second migrate is a no-op...")
+    conn = legacy_db()
+    version = migrate(conn)
+    assert version == MIGRATIONS[-1][0] == current_version(conn)
+    before = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()
+    assert migrate(conn) == version
+    assert conn.execute('SELECT COUNT(*) FROM jobs').fetchone() == before
+    print(f"✅ Stays at version {version}")
+
+
+if __name__ == "__main__":
+    test_duplicates_wait_for_the_operator()
+    test_queued_duplicates_are_held()
+    test_server_tags_follow_servers()
+    test_stale_tags_rebuilt()
+    test_hashes_split()
+    test_migrate_is_idempotent()
+    print("\nAll migration checks passed.")
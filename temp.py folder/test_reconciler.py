@@ -0,0 +1,237 @@
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database
+from utils.discord_jobs import repair_thread, store_bump_hash
+from utils.partner_ads import ad_fingerprint, ad_renderer
+from utils.reconciler import Reconciler, enqueue_registration_refresh
+
+
+def not_found():
+    return discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), {'message': 'Unknown', 'code': 10003})
+
+
+class Channels:
+    """ChannelResolver stand-in: ``cached`` holds threads in the gateway cache, ``rest`` those only REST can see."""
+
+    def __init__(self, cached=(), rest=()):
+        self._cached = {thread.id: thread for thread in cached}
+        self._rest = {thread.id: thread for thread in rest}
+        self.rest_calls = 0
+
+    def cached(self, channel_id):
+        return self._cached.get(channel_id)
+
+    async def resolve(self, channel_id):
+        if channel_id in self._cached:
+            return self._cached[channel_id]
+        self.rest_calls += 1
+        if channel_id not in self._rest:
+            raise not_found()
+        self._cached[channel_id] = self._rest[channel_id]
+        return self._rest[channel_id]
+
+
+def thread(thread_id, starter='Old ad', deleted_starter=False):
+    async def fetch_message(message_id):
+        if deleted_starter:
+            raise not_found()
+        return SimpleNamespace(content=starter, created_at=None)
+
+    message = None if deleted_starter else SimpleNamespace(content=starter, created_at=None)
+    return SimpleNamespace(id=thread_id, name='Old title', applied_tags=[], parent=None,
+                           starter_message=message, fetch_message=fetch_message)
+
+
+class Registry:
+    def __init__(self):
+        self.tombstoned = []
+
+    async def tombstone(self, kind, target_id, reason=None):
+        self.tombstoned.append((kind, target_id))
+        return True
+
+
+class Queue:
+    def __init__(self):
+        self.repairs = []
+        self.payloads = []
+
+    async def enqueue(self, kind, payload, key=None, lane=None, replace=False):
+        return await self.enqueue_many([(kind, payload, key, lane)], replace)
+
+    async def enqueue_many(self, jobs, replace=False):
+        self.repairs.extend(payload['thread_id'] for _, payload, _, _ in jobs)
+        self.payloads.extend(payload for _, payload, _, _ in jobs)
+        return len(jobs)
+
+
+async def network(threads):
+    db = Database(os.path.join(tempfile.mkdtemp(prefix='nomon-reconciler-'), 'bump.db'))
+    await db.execute("INSERT INTO servers (server_id, forum_channel_id, server_name, advertisement, tags) "
+                     "VALUES (2, 22, 'Two', 'Come hang out', 'Art')")
+    # One host per thread, since a host mirrors each server once
+    await db.executemany('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id) VALUES (?, ?, 2)',
+                         [(10000 + thread_id, thread_id) for thread_id in threads])
+    return db
+
+
+async def check_missing_starter():
+    db = await network([100, 101])
+    registry = Registry()
+    channels = Channels(rest=[thread(100, deleted_starter=True)])
+    reconciler = Reconciler(db, channels, Queue(), registry, rate=0, burst=10)
+    await reconciler.tick()
+    counts = reconciler.counts
+    await db.close()
+    return registry.tombstoned, counts
+
+
+def test_only_missing_threads_are_tombstoned():
+    print("Testing tombstones for deleted threads and deleted starter messages...")
+    tombstoned, counts = asyncio.run(check_missing_starter())
+    assert tombstoned == [('thread', 101)], tombstoned
+    assert (counts['missing'], counts['no_starter']) == (1, 1), counts
+    print("✅ Thread 101 (gone) tombstoned; thread 100 (starter message deleted) kept")
+
+
+async def check_budget(rows=200):
+    db = await network(range(1, rows + 1))
+    queue = Queue()
+    # Gateway-cached threads with their starter message: no REST reads at all
+    channels = Channels(cached=[thread(thread_id) for thread_id in range(1, rows // 2 + 1)],
+                        rest=[thread(thread_id) for thread_id in range(rows // 2 + 1, rows + 1)])
+    reconciler = Reconciler(db, channels, queue, Registry(), batch_size=rows, rate=0, burst=10)
+    checked = await reconciler.tick()
+    stats = reconciler.stats()
+    await db.close()
+    return checked, channels.rest_calls, len(queue.repairs), stats
+
+
+def test_budget_only_pays_for_rest():
+    print("\nTesting that cached threads cost no REST budget...")
+    checked, rest_calls, repairs, stats = asyncio.run(check_budget())
+    # 100 cached threads for free, then one token per REST-only thread (its starter message comes with it)
+    assert checked == 110, checked
+    assert rest_calls == 10, rest_calls
+    assert repairs == checked, repairs
+    assert stats['cursor'] == 110 and stats['backlog'] is None, stats
+    print(f"✅ {checked} threads checked on a 10-token budget with {rest_calls} REST reads; resumes after thread {stats['cursor']}")
+
+
+async def check_stats_without_count():
+    db = await network(range(1, 31))
+    channels = Channels(cached=[thread(thread_id) for thread_id in range(1, 31)])
+    reconciler = Reconciler(db, channels, Queue(), Registry(), batch_size=10, rate=0, burst=0)
+    while await reconciler.tick():
+        pass
+    # Two batches into the second pass
+    await reconciler.tick()
+    await reconciler.tick()
+    stats = reconciler.stats()
+    await db.close()
+    return stats
+
+
+def test_stats_use_last_pass():
+    print("\nTesting reconcile stats without a COUNT(*) join...")
+    stats = asyncio.run(check_stats_without_count())
+    assert stats['cycles'] == 1 and stats['last']['checked'] == 30, stats
+    assert stats['backlog'] == 10 and stats['cursor'] == 20, stats
+    print(f"✅ Backlog {stats['backlog']} estimated from the last pass of {stats['last']['checked']}")
+
+
+REGISTRATION = [2, 'Two', 'Come hang out', 'Art', None]
+
+
+async def check_refresh_after_bump():
+    db = await network([100])
+    ad = ad_renderer.render(*REGISTRATION, "Nomons's Cottage", '01/01/2026')
+    await db.execute('UPDATE global_partner_threads SET ad_hash = ? WHERE thread_id = 100',
+                     (ad_fingerprint(ad.title, ad.content, ad.tags),))
+    # A bump edit recorded against the same thread
+    await db.run(store_bump_hash, 100, 'bump')
+    queue = Queue()
+    after_bump = await enqueue_registration_refresh(queue, db, 2)
+    await db.execute("UPDATE servers SET tags = 'Art,Music' WHERE server_id = 2")
+    after_edit = await enqueue_registration_refresh(queue, db, 2)
+    await db.close()
+    return after_bump, after_edit
+
+
+def test_bump_keeps_ad_hash():
+    print("\nTesting that a bump does not make the ad look stale...")
+    after_bump, after_edit = asyncio.run(check_refresh_after_bump())
+    assert (after_bump, after_edit) == (0, 1), (after_bump, after_edit)
+    print("✅ No refresh after a bump; one after the registration changed")
+
+
+async def check_minimal_repair():
+    ad = ad_renderer.render(2, 'Two', 'Come hang out', 'Art,Music', None, "Nomons's Cottage", '01/01/2026')
+    edits = []
+
+    async def edit_thread(**fields):
+        edits.append(('thread', sorted(fields)))
+
+    async def edit_message(**fields):
+        edits.append(('message', sorted(fields)))
+
+    forum = SimpleNamespace(id=22, available_tags=[SimpleNamespace(id=1, name='Art'), SimpleNamespace(id=2, name='Music')])
+    # Title and content already match the new registration; only the tags changed
+    starter = SimpleNamespace(content=ad.content, created_at=None)
+    target = SimpleNamespace(id=100, name=ad.title, applied_tags=[forum.available_tags[0]], parent_id=22, archived=True,
+                             starter_message=starter, edit=edit_thread,
+                             get_partial_message=lambda message_id: SimpleNamespace(edit=edit_message))
+    bot = SimpleNamespace(channel_resolver=Channels(cached=[target, forum]))
+    payload = {'thread_id': 100, 'registration': [2, 'Two', 'Come hang out', 'Art,Music', None], 'ad_hash': 'new'}
+    changed = await repair_thread(bot, payload)
+
+    target.applied_tags = forum.available_tags
+    unchanged = await repair_thread(bot, payload)
+    return changed, unchanged, edits
+
+
+def test_repair_edits_only_drift():
+    print("\nTesting that a registration refresh edits only what differs...")
+    changed, unchanged, edits = asyncio.run(check_minimal_repair())
+    assert changed == ['tags'], changed
+    assert edits == [('thread', ['applied_tags', 'archived'])], edits
+    assert unchanged == [], unchanged
+    print("✅ One PATCH for the tags; nothing at all once the thread matches")
+
+
+async def check_bumped_content():
+    db = await network([100, 101])
+    # Both threads show a bump's content= edit; only thread 100's bump was recorded
+    await db.run(store_bump_hash, 100, 'bump')
+    queue = Queue()
+    channels = Channels(cached=[thread(100, starter='Bumped!'), thread(101, starter='Bumped!')])
+    reconciler = Reconciler(db, channels, queue, Registry(), rate=0, burst=0)
+    await reconciler.tick()
+    await db.close()
+    return queue.payloads
+
+
+def test_bumped_content_is_not_drift():
+    print("\nTesting that the reconciler leaves a bumped message's content alone...")
+    payloads = asyncio.run(check_bumped_content())
+    repaired = {payload['thread_id']: sorted(set(payload) & {'title', 'tags', 'content'}) for payload in payloads}
+    assert repaired == {100: ['tags', 'title'], 101: ['content', 'tags', 'title']}, repaired
+    print("✅ Thread 100 (bumped) gets its title and tags fixed but keeps the bump; thread 101's content is repaired")
+
+
+if __name__ == "__main__":
+    test_only_missing_threads_are_tombstoned()
+    test_budget_only_pays_for_rest()
+    test_stats_use_last_pass()
+    test_bump_keeps_ad_hash()
+    test_repair_edits_only_drift()
+    test_bumped_content_is_not_drift()
+    print("\nAll reconciler checks passed.")
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database
+from utils.job_queue import JobQueue
+from utils.registry import RegistrySync, remove_server_rows
+
+
+async def network():
+    """Three servers mirroring each other, plus each one's own partner thread."""
+    db = Database(os.path.join(tempfile.mkdtemp(prefix='nomon-registry-'), 'bump.db'))
+    await db.executemany('INSERT INTO servers (server_id, forum_channel_id, server_name, tags) VALUES (?, ?, ?, ?)',
+                         [(1, 11, 'One', 'Art'), (2, 12, 'Two', 'Gaming'), (3, 13, 'Three', None)])
+    await db.executemany('INSERT INTO partner_threads (server_id, thread_id) VALUES (?, ?)', [(1, 91), (2, 92), (3, 93)])
+    await db.executemany('INSERT INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id) VALUES (?, ?, ?)',
+                         [(host, host * 100 + advertised, advertised) for host in (1, 2, 3) for advertised in (1, 2, 3) if host != advertised])
+    return db
+
+
+async def threads(db):
+    return sorted(thread_id for thread_id, in await db.fetchall('SELECT thread_id FROM global_partner_threads'))
+
+
+async def check_tombstones():
+    db = await network()
+    registry = RegistrySync(db)
+    referenced = await registry.tombstone('thread', 102, 'thread deleted')
+    unrelated = await registry.tombstone('thread', 555, 'thread deleted')
+    pending = await registry.pending()
+    await db.close()
+    return referenced, unrelated, pending
+
+
+def test_only_referenced_ids_are_tombstoned():
+    print("Testing that unrelated channel events leave no tombstone...")
+    referenced, unrelated, pending = asyncio.run(check_tombstones())
+    assert (referenced, unrelated, pending) == (True, False, 1), (referenced, unrelated, pending)
+    print("✅ Thread 102 tombstoned, unknown thread 555 ignored")
+
+
+async def check_sweep():
+    db = await network()
+    queue = JobQueue(db, None, {})
+    await queue.enqueue_many([
+        ('edit_message', {'channel_id': 102}, 'edit:102', 102),
+        ('edit_message', {'channel_id': 301}, 'edit:301', 301),
+        ('create_thread', {'hosting_server_id': 1}, 'create:1', 1),
+        ('edit_message', {'channel_id': 203}, 'edit:203', 203),
+    ])
+    registry = RegistrySync(db)
+    await registry.tombstone('thread', 102, 'thread deleted')
+    await registry.tombstone('forum', 13, 'forum deleted')
+    await registry.tombstone('guild', 1, 'bot removed from guild')
+    swept = await registry.sweep()
+
+    remaining = await threads(db)
+    servers = await db.fetchall('SELECT server_id, forum_channel_id FROM servers ORDER BY server_id')
+    jobs = sorted(key for key, in await db.fetchall('SELECT idempotency_key FROM jobs'))
+    pending = await registry.pending()
+    await db.close()
+    return swept, remaining, servers, jobs, pending
+
+
+def test_sweep():
+    print("\nTesting a sweep of a guild, a forum and a thread...")
+    swept, remaining, servers, jobs, pending = asyncio.run(check_sweep())
+    assert (swept, pending) == (3, 0), (swept, pending)
+    # Guild 1 hosted 102 and 103; forum 13 held 301 and 302; ads for server 1 elsewhere stay
+    assert remaining == [201, 203], remaining
+    assert servers == [(2, 12), (3, None)], servers
+    assert jobs == ['edit:203'], jobs
+    print("✅ Rows and pending jobs for every tombstoned target removed; other hosts' threads kept")
+
+
+async def check_remove_server():
+    db = await network()
+    await db.run(remove_server_rows, 2)
+    remaining = await threads(db)
+    tags = await db.fetchall('SELECT server_id, tag FROM server_tags ORDER BY server_id')
+    own = await db.fetchall('SELECT server_id FROM partner_threads ORDER BY server_id')
+    await db.close()
+    return remaining, tags, own
+
+
+def test_remove_server_rows():
+    print("\nTesting /remove_server's registry cleanup...")
+    remaining, tags, own = asyncio.run(check_remove_server())
+    assert remaining == [103, 301], remaining
+    assert tags == [(1, 'Art')], tags
+    assert own == [(1,), (3,)], own
+    print("✅ Server 2's threads, own thread and tags are gone")
+
+
+if __name__ == "__main__":
+    test_only_referenced_ids_are_tombstoned()
+    test_sweep()
+    test_remove_server_rows()
+    print("\nAll registry checks passed.")
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_discord import FakeDiscord
+from utils.discord_jobs import BUCKET_KEYS, HANDLERS
+from utils.metrics import rest_requests
+from utils.rest_workers import RestWorkerPool
+
+FORUMS = 40
+
+
+def start_fake(latency):
+    fake = FakeDiscord(latency=latency, jitter=0.0, bucket_limit=50)
+    for guild_id in range(1, FORUMS + 1):
+        fake.add_forum(guild_id, guild_id << 22, tag_names=('Gaming',))
+    return fake, fake.start()
+
+
+def create_payload(forum_id, tags=('Gaming',)):
+    return {'forum_id': forum_id, 'title': 'Ad', 'content': 'Join us', 'tags': list(tags)}
+
+
+async def check_concurrency(latency=0.1):
+    fake, base = start_fake(latency)
+    pool = RestWorkerPool('fake-token', processes=2, api_base=base)
+    handlers = pool.handlers(HANDLERS, BUCKET_KEYS)
+    try:
+        # The first job per worker also waits for its login
+        await asyncio.gather(*(handlers['create_thread'](None, create_payload(guild_id << 22)) for guild_id in (1, 2)))
+        fake.reset_counters()
+        before = sum(rest_requests.values.values())
+
+        started = time.perf_counter()
+        thread_ids = await asyncio.gather(*(handlers['create_thread'](None, create_payload(guild_id << 22))
+                                            for guild_id in range(1, FORUMS + 1)))
+        wall = time.perf_counter() - started
+        # Let the trace messages sent after the last result arrive
+        await asyncio.sleep(0.2)
+        traced = sum(rest_requests.values.values()) - before
+        served = sum(fake.calls.values())
+    finally:
+        pool.shutdown()
+        fake.stop()
+    return thread_ids, wall, FORUMS * latency, traced, served
+
+
+def test_workers_run_jobs_concurrently():
+    print("Testing that each worker runs many jobs at once...")
+    thread_ids, wall, serial, traced, served = asyncio.run(check_concurrency())
+    assert len(set(thread_ids)) == FORUMS, thread_ids
+    assert wall < serial / 4, (wall, serial)
+    print(f"✅ {FORUMS} threads in {wall:.2f}s on 2 processes, against {serial:.2f}s one at a time")
+    assert traced == served, (traced, served)
+    print(f"✅ All {served} worker REST calls counted in this process's metrics")
+
+
+async def check_invalidation():
+    fake, base = start_fake(0.01)
+    forum_id = 1 << 22
+    pool = RestWorkerPool('fake-token', processes=1, api_base=base)
+    handlers = pool.handlers(HANDLERS, BUCKET_KEYS)
+    try:
+        await handlers['create_thread'](None, create_payload(forum_id, ('Art',)))
+        fake.channels[forum_id]['available_tags'].append(
+            {'id': str(forum_id + 9), 'name': 'Art', 'moderated': False, 'emoji_id': None, 'emoji_name': None})
+        stale = await handlers['create_thread'](None, create_payload(forum_id, ('Art',)))
+        # Count what reaches the worker's queue
+        forwarded = []
+        put = pool._requests[0].put
+        pool._requests[0].put = lambda message: (forwarded.append(message), put(message))
+        # Updates for channels no worker has fetched, e.g. any thread in any guild, stay in this process
+        for channel_id in range(100, 200):
+            pool.invalidate(channel_id)
+        pool.invalidate(forum_id)
+        fresh = await handlers['create_thread'](None, create_payload(forum_id, ('Art',)))
+        invalidations = [message for message in forwarded if message[0] == 'invalidate']
+        return fake.channels[stale]['applied_tags'], fake.channels[fresh]['applied_tags'], invalidations
+    finally:
+        pool.shutdown()
+        fake.stop()
+
+
+def test_invalidation_reaches_workers():
+    print("\nTesting that channel invalidations reach the workers...")
+    stale, fresh, invalidations = asyncio.run(check_invalidation())
+    assert stale == [], stale
+    assert fresh == [str((1 << 22) + 9)], fresh
+    print("✅ A new forum tag is used as soon as the forum is invalidated")
+    assert invalidations == [('invalidate', 1 << 22)], invalidations
+    print("✅ Only the forum a worker fetched was forwarded; 100 unrelated invalidations sent nothing")
+
+
+async def check_global_pause(pause=1.0):
+    fake, base = start_fake(0.01)
+    pool = RestWorkerPool('fake-token', processes=2, api_base=base)
+    handlers = pool.handlers(HANDLERS, BUCKET_KEYS)
+    try:
+        await asyncio.gather(*(handlers['create_thread'](None, create_payload(guild_id << 22)) for guild_id in (1, 2)))
+        # What a worker sets on a global 429
+        pool._paused_until.value = time.time() + pause
+        started = time.perf_counter()
+        await asyncio.gather(*(handlers['create_thread'](None, create_payload(guild_id << 22)) for guild_id in (1, 2)))
+        return time.perf_counter() - started
+    finally:
+        pool.shutdown()
+        fake.stop()
+
+
+def test_global_pause_is_shared():
+    print("\nTesting that a global rate limit pauses every worker...")
+    waited = asyncio.run(check_global_pause())
+    assert waited >= 0.9, waited
+    print(f"✅ Both workers held their requests for {waited:.2f}s")
+
+
+if __name__ == "__main__":
+    test_workers_run_jobs_concurrently()
+    test_invalidation_reaches_workers()
+    test_global_pause_is_shared()
+    print("\nAll REST worker checks passed.")
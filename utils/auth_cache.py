@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+
+PERMISSIONS_FILE = 'server_permissions.json'
+
+
+class AuthCache:
+    """Process-wide copy of the devs, whitelisted servers and permission rules.
+
+    Loaded once at startup and updated in place by the commands that change
+    those tables, so permission checks are set lookups with no I/O. With
+    several shard processes, a change made in one reaches the others when
+    they next ``reload`` (every 30 seconds, from ``DevCommands``).
+    """
+
+    def __init__(self, permissions_file=PERMISSIONS_FILE):
+        self.permissions_file = permissions_file
+        self.devs = set()
+        self.whitelisted_servers = set()
+        # feature name -> set of allowed server ids, or None when allowed everywhere
+        self.permissions = {}
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, db):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.reload(db)
+
+    async def reload(self, db):
+        devs = await db.fetchall('SELECT user_id FROM devs')
+        whitelisted = await db.fetchall('SELECT server_id FROM whitelisted_servers')
+        self.devs = {user_id for user_id, in devs}
+        self.whitelisted_servers = {server_id for server_id, in whitelisted}
+        self.permissions = self.load_permissions()
+        self.loaded = True
+
+    def load_permissions(self):
+        if not os.path.exists(self.permissions_file):
+            return {}
+        with open(self.permissions_file, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+
+        permissions = {}
+        for feature, rule in rules.items():
+            allowed = rule.get('allowed_servers', [])
+            if 'all' in allowed:
+                permissions[feature] = None
+            else:
+                permissions[feature] = {int(server_id) for server_id in allowed}
+        return permissions
+
+    def is_dev(self, user_id):
+        return user_id in self.devs
+
+    def is_whitelisted(self, server_id):
+        return server_id in self.whitelisted_servers
+
+    def is_allowed(self, feature, server_id):
+        # For the feature cogs (embed, logging, delivery, ...) that load from EXTENSIONS but live outside this tree.
+        # Features without a rule in server_permissions.json are unrestricted
+        if feature not in self.permissions:
+            return True
+        allowed = self.permissions[feature]
+        return allowed is None or server_id in allowed
+
+    def add_dev(self, user_id):
+        self.devs.add(user_id)
+
+    def remove_dev(self, user_id):
+        self.devs.discard(user_id)
+
+    def add_server(self, server_id):
+        self.whitelisted_servers.add(server_id)
+
+    def remove_server(self, server_id):
+        self.whitelisted_servers.discard(server_id)
+
+
+auth_cache = AuthCache()
@@ -0,0 +1,141 @@
+"""Network-wide bump propagation.
+
+Every partner ad is the starter message of a forum thread, and a forum
+thread's starter message shares the thread's ID. A server's own partner
+thread records its bump message in ``partner_threads.last_bump_message_id``.
+Together these let every edit go straight to a known message ID, so a bump
+never scans thread history and the edits run on a bounded worker pool.
+``enqueue_bump`` hands the same edits to the durable job queue instead.
+Targets whose ``bump_hash`` already matches the edit are skipped; the
+separate ``ad_hash`` that registration refreshes compare is left alone.
+"""
+
+import time
+
+import discord
+
+from utils.database import UnitOfWork
+from utils.discord_jobs import UNKNOWN_MESSAGE, clear_bump_message, store_bump_hash
+from utils.fanout import FanOut
+from utils.metrics import bump_edits, bump_seconds
+from utils.partner_ads import edit_hash
+
+
+class BumpReport:
+    def __init__(self):
+        self.edited = 0
+        self.failed = 0
+        # Targets already showing exactly these fields
+        self.skipped = 0
+        # Threads that no longer exist; callers should drop their rows
+        self.missing = []
+        # (thread_id, message_id) whose message was deleted but whose thread is still there
+        self.lost_messages = []
+        # thread_id -> seconds spent editing that thread, retries included
+        self.latencies = {}
+        self.wall_time = 0.0
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        values = sorted(self.latencies.values())
+        return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def bump_targets(db, advertised_server_id):
+    """Return ``(thread_id, message_id, bump_hash)`` for every message showing this server's ad."""
+    def _targets(conn):
+        targets = [
+            (thread_id, thread_id, bump_hash)
+            for thread_id, bump_hash in conn.execute(
+                'SELECT thread_id, bump_hash FROM global_partner_threads WHERE advertised_server_id = ?', (advertised_server_id,)
+            )
+        ]
+        own = conn.execute(
+            'SELECT thread_id, last_bump_message_id, bump_hash FROM partner_threads WHERE server_id = ?', (advertised_server_id,)
+        ).fetchone()
+        if own and own[0]:
+            targets.append((own[0], own[1] or own[0], own[2]))
+        return targets
+
+    return await db.run(_targets)
+
+
+async def propagate_bump(bot, db, advertised_server_id, max_workers=10, **fields):
+    """Edit every mirrored ad for ``advertised_server_id`` with ``fields`` (content=, embed=, ...)."""
+    report = BumpReport()
+    fanout = FanOut(max_concurrency=max_workers)
+    started = time.perf_counter()
+    starts = {}
+    bump_hash = edit_hash({name: value.to_dict() if hasattr(value, 'to_dict') else value for name, value in fields.items()})
+    edited = []
+
+    async def edit(thread_id, message_id):
+        start = starts.setdefault(thread_id, time.perf_counter())
+        try:
+            await bot.get_partial_messageable(thread_id).get_partial_message(message_id).edit(**fields)
+        except discord.NotFound as e:
+            if e.code == UNKNOWN_MESSAGE:
+                report.lost_messages.append((thread_id, message_id))
+            else:
+                report.missing.append(thread_id)
+            return
+        finally:
+            report.latencies[thread_id] = time.perf_counter() - start
+        report.edited += 1
+        edited.append(thread_id)
+
+    for thread_id, message_id, current_hash in await bump_targets(db, advertised_server_id):
+        if current_hash == bump_hash:
+            report.skipped += 1
+            continue
+        # Edits are bucketed per channel, so every thread is its own lane
+        fanout.add(thread_id, lambda t=thread_id, m=message_id: edit(t, m), label=thread_id)
+
+    result = await fanout.run()
+    report.failed = result.failed
+    for thread_id, e in result.errors:
+        print(f"Error propagating bump to thread {thread_id}: {e}")
+
+    async with UnitOfWork(db) as writes:
+        for thread_id in edited:
+            await writes.run(store_bump_hash, thread_id, bump_hash)
+        # The next bump edits the thread's starter message instead
+        for thread_id, message_id in report.lost_messages:
+            await writes.run(clear_bump_message, thread_id, message_id)
+
+    report.wall_time = time.perf_counter() - started
+    bump_seconds.observe(value=report.wall_time)
+    bump_edits.inc('edited', amount=report.edited)
+    bump_edits.inc('skipped', amount=report.skipped)
+    bump_edits.inc('missing', amount=len(report.missing))
+    bump_edits.inc('no_message', amount=len(report.lost_messages))
+    bump_edits.inc('failed', amount=report.failed)
+    return report
+
+
+async def enqueue_bump(queue, db, advertised_server_id, content=None, embed=None):
+    """Durable variant of ``propagate_bump``: queue one edit per target and return at once.
+
+    A newer bump replaces the payload of any edit still waiting in the queue.
+    """
+    payload = {}
+    if content is not None:
+        payload['content'] = content
+    if embed is not None:
+        payload['embed'] = embed.to_dict()
+    bump_hash = edit_hash(payload)
+
+    jobs = []
+    unchanged = []
+    for thread_id, message_id, current_hash in await bump_targets(db, advertised_server_id):
+        key = f"edit_message:{thread_id}:{message_id}"
+        if current_hash == bump_hash:
+            unchanged.append((key,))
+        else:
+            jobs.append(('edit_message', dict(payload, channel_id=thread_id, message_id=message_id, bump_hash=bump_hash), key, thread_id))
+
+    if unchanged:
+        # An older edit still waiting would overwrite what is already showing
+        await db.executemany("DELETE FROM jobs WHERE idempotency_key = ? AND status = 'pending'", unchanged)
+    return await queue.enqueue_many(jobs, replace=True)
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class ChannelResolver:
+    """Resolve channel IDs via the gateway cache, then a TTL'd LRU, then REST.
+
+    Concurrent lookups for the same ID share one in-flight ``fetch_channel``.
+    """
+
+    def __init__(self, bot, maxsize=1024, ttl=300, on_fetch=None):
+        self.bot = bot
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Called with each channel ID fetched over REST; REST workers report theirs to the gateway process
+        self.on_fetch = on_fetch
+        self._cache = OrderedDict()  # channel_id -> (expires_at, channel)
+        self._inflight = {}
+        self.gateway_hits = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def cached(self, channel_id):
+        """The channel from the gateway cache or the LRU, or None; never calls REST."""
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            self.gateway_hits += 1
+            return channel
+
+        entry = self._cache.get(channel_id)
+        if entry is not None:
+            expires_at, channel = entry
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(channel_id)
+                self.cache_hits += 1
+                return channel
+            del self._cache[channel_id]
+        return None
+
+    async def resolve(self, channel_id):
+        channel = self.cached(channel_id)
+        if channel is not None:
+            return channel
+
+        task = self._inflight.get(channel_id)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(channel_id))
+            self._inflight[channel_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(channel_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, channel_id):
+        channel = await self.bot.fetch_channel(channel_id)
+        self.put(channel)
+        if self.on_fetch is not None:
+            self.on_fetch(channel.id)
+        return channel
+
+    def put(self, channel):
+        self._cache[channel.id] = (time.monotonic() + self.ttl, channel)
+        self._cache.move_to_end(channel.id)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, channel_id):
+        self._cache.pop(channel_id, None)
+        # REST worker processes keep caches of their own and never see gateway events; the pool skips IDs they lack
+        pool = getattr(self.bot, 'rest_pool', None)
+        if pool is not None:
+            pool.invalidate(channel_id)
+
+    def stats(self):
+        return {
+            'gateway_hits': self.gateway_hits,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'rest_fetches': self.misses,
+            'saved_calls': self.gateway_hits + self.cache_hits + self.coalesced,
+            'cached': len(self._cache),
+        }
+
+
+def get_channel_resolver(bot):
+    """Return the resolver shared by every cog on ``bot``."""
+    resolver = getattr(bot, 'channel_resolver', None)
+    if resolver is None:
+        resolver = bot.channel_resolver = ChannelResolver(bot)
+    return resolver
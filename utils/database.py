@@ -0,0 +1,228 @@
+import asyncio
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import db_latency
+from utils.migrations import migrate
+
+DEFAULT_DB_PATH = 'databases/bump.db'
+
+TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+(\w+)', re.IGNORECASE)
+
+
+def operation_label(sql):
+    """Short metrics label such as ``SELECT servers`` for a statement."""
+    verb = sql.split(None, 1)[0].upper() if sql.strip() else '?'
+    table = TABLE.search(sql)
+    return f"{verb} {table.group(1)}" if table else verb
+
+
+class CommitMetrics:
+    """Latency and size of recent write transactions."""
+
+    def __init__(self, window=500):
+        self.commits = 0
+        self.rows = 0
+        self.commit_time = 0.0
+        # (seconds spent in COMMIT, rows changed) for the last ``window`` commits
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds, rows):
+        self.commits += 1
+        self.rows += rows
+        self.commit_time += seconds
+        self.recent.append((seconds, rows))
+
+    def summary(self):
+        latencies = sorted(seconds for seconds, _ in self.recent)
+        return {
+            'commits': self.commits,
+            'rows': self.rows,
+            'rows_per_commit': self.rows / self.commits if self.commits else 0.0,
+            'avg_commit_ms': self.commit_time / self.commits * 1000 if self.commits else 0.0,
+            'p95_commit_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+        }
+
+
+class WriteBatch:
+    """Buffers writes and replays them with one ``executemany`` per statement.
+
+    Statements are grouped by SQL text in first-seen order, so callers must
+    not rely on the interleaving of different statements. Completions and
+    other helpers that only call ``execute``/``executemany`` accept a batch in
+    place of a connection.
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def execute(self, sql, params=()):
+        self._groups.setdefault(sql, []).append(params)
+        self.rows += 1
+
+    def executemany(self, sql, seq_of_params):
+        group = self._groups.setdefault(sql, [])
+        before = len(group)
+        group.extend(seq_of_params)
+        self.rows += len(group) - before
+
+    def apply(self, conn):
+        """Run every buffered statement on ``conn``; returns the number of rows they changed."""
+        before = conn.total_changes
+        for sql, rows in self._groups.items():
+            conn.executemany(sql, rows)
+        return conn.total_changes - before
+
+
+class UnitOfWork:
+    """Collects writes from a cog and commits them in transactions of ``batch_size`` rows.
+
+    Use as ``async with UnitOfWork(db) as uow:``; whatever is still buffered
+    is flushed when the block exits cleanly and dropped if it raises.
+    """
+
+    def __init__(self, db, batch_size=500):
+        self.db = db
+        self.batch_size = batch_size
+        self.flushes = 0
+        # Rows changed by every flush so far
+        self.changes = 0
+        self._batch = WriteBatch()
+
+    def __len__(self):
+        return len(self._batch)
+
+    async def execute(self, sql, params=()):
+        self._batch.execute(sql, params)
+        await self._flush_if_full()
+
+    async def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        # Sliced so a long list still commits every ``batch_size`` rows instead of in one transaction
+        for start in range(0, len(seq_of_params), self.batch_size):
+            self._batch.executemany(sql, seq_of_params[start:start + self.batch_size])
+            await self._flush_if_full()
+
+    async def run(self, helper, *args):
+        """Buffer the writes of ``helper(writer, *args)``, a sync helper that only calls ``execute``/``executemany``."""
+        helper(self._batch, *args)
+        await self._flush_if_full()
+
+    async def _flush_if_full(self):
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered in one transaction; returns the number of statements run."""
+        if not self._batch:
+            return 0
+        batch, self._batch = self._batch, WriteBatch()
+        self.changes += await self.db.run(batch.apply)
+        self.flushes += 1
+        return len(batch)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.flush()
+        else:
+            self._batch = WriteBatch()
+
+
+class Database:
+    """Async access to a SQLite file through one long-lived connection.
+
+    Every statement runs on a dedicated executor thread, so the event loop
+    never blocks on disk I/O and queries are serialized the way SQLite wants.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nomon-db')
+        self.metrics = CommitMetrics()
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            migrate(conn)
+            self._conn = conn
+        return self._conn
+
+    def _call(self, func, args, operation):
+        conn = self._connect()
+        started = time.perf_counter()
+        try:
+            changes = conn.total_changes
+            result = func(conn, *args)
+            changed = conn.total_changes - changes
+            committing = time.perf_counter()
+            conn.commit()
+            if changed:
+                # Reads commit too but cost no fsync, so only writes are measured
+                self.metrics.record(time.perf_counter() - committing, changed)
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            db_latency.observe(operation, value=time.perf_counter() - started)
+
+    async def _submit(self, func, args, operation):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, func, args, operation)
+
+    async def run(self, func, *args):
+        """Run ``func(conn, *args)`` on the DB thread inside one transaction."""
+        return await self._submit(func, args, getattr(func, '__name__', 'run').lstrip('_'))
+
+    async def execute(self, sql, params=()):
+        return await self._submit(lambda conn: conn.execute(sql, params).rowcount, (), operation_label(sql))
+
+    async def executemany(self, sql, seq_of_params):
+        return await self._submit(lambda conn: conn.executemany(sql, seq_of_params).rowcount, (), operation_label(sql))
+
+    async def fetchone(self, sql, params=()):
+        return await self._submit(lambda conn: conn.execute(sql, params).fetchone(), (), operation_label(sql))
+
+    async def fetchall(self, sql, params=()):
+        return await self._submit(lambda conn: conn.execute(sql, params).fetchall(), (), operation_label(sql))
+
+    async def close(self):
+        def _close(conn):
+            conn.close()
+            self._conn = None
+
+        if self._conn is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, _close, self._conn)
+        self._executor.shutdown(wait=False)
+        if _databases.get(self.path) is self:
+            del _databases[self.path]
+
+
+_databases = {}
+
+
+def get_database(path=DEFAULT_DB_PATH):
+    """Return the process-wide Database for ``path``, creating it on first use."""
+    db = _databases.get(path)
+    if db is None:
+        db = _databases[path] = Database(path)
+    return db
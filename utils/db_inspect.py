@@ -0,0 +1,117 @@
+"""Read-only table inspection that never holds more than one page of rows.
+
+Rows are walked by key (``rowid`` or the primary key of a ``WITHOUT ROWID``
+table) with ``WHERE key > ? ... LIMIT``, so a dump of an N² table streams
+at a fixed memory cost and can be resumed from the last key printed.
+Counts come from ``sqlite_stat1`` when ANALYZE has run and from
+``COUNT(*)`` otherwise. ``database_estimate`` first runs an ANALYZE capped
+by ``analysis_limit``, so every indexed table has a fresh estimate and no
+table is scanned.
+"""
+
+import sqlite3
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def table_names(conn):
+    return [name for name, in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+
+
+def column_names(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({quote(table)})')]
+
+
+def key_columns(conn, table):
+    """Columns that order ``table`` uniquely: ``rowid``, or the primary key of a ``WITHOUT ROWID`` table."""
+    try:
+        conn.execute(f'SELECT rowid FROM {quote(table)} LIMIT 0')
+        return ['rowid']
+    except sqlite3.OperationalError:
+        info = sorted((row[5], row[1]) for row in conn.execute(f'PRAGMA table_info({quote(table)})') if row[5])
+        return [name for _, name in info]
+
+
+def estimated_counts(conn):
+    """Row counts recorded by the last ANALYZE, or ``{}`` if it never ran."""
+    try:
+        rows = conn.execute('SELECT tbl, stat FROM sqlite_stat1').fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    counts = {}
+    for table, stat in rows:
+        # The first number of every index's stat is the row count of its table; sampled ones overshoot
+        if stat:
+            rows = int(stat.split()[0])
+            counts[table] = min(counts.get(table, rows), rows)
+    return counts
+
+
+def row_counts(conn, exact=False):
+    """``{table: (rows, estimated)}`` for every user table."""
+    estimates = {} if exact else estimated_counts(conn)
+    counts = {}
+    for table in table_names(conn):
+        if table in estimates:
+            counts[table] = (estimates[table], True)
+        else:
+            # COUNT(*) walks the smallest index rather than the table itself
+            counts[table] = (conn.execute(f'SELECT COUNT(*) FROM {quote(table)}').fetchone()[0], False)
+    return counts
+
+
+def database_estimate(conn, analysis_limit=400):
+    """``database_summary`` from a bounded ANALYZE, for the bot's shared DB thread."""
+    # Each index is sampled for about analysis_limit rows, so the cost does not grow with the N² tables
+    conn.execute(f'PRAGMA analysis_limit = {int(analysis_limit)}')
+    conn.execute('ANALYZE')
+    return database_summary(conn)
+
+
+def database_summary(conn, exact=False):
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    pages = conn.execute('PRAGMA page_count').fetchone()[0]
+    free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return {
+        'tables': row_counts(conn, exact),
+        'size_bytes': page_size * pages,
+        'free_bytes': page_size * free,
+        'journal_mode': conn.execute('PRAGMA journal_mode').fetchone()[0],
+    }
+
+
+def iter_rows(conn, table, where=None, params=(), after=None, limit=None, page_size=500):
+    """Yield ``(key, row)`` for rows of ``table`` in key order, one page query at a time.
+
+    ``where`` is an SQL condition ANDed onto every page and ``after`` is a key
+    from an earlier walk to resume behind. Keys are tuples so composite
+    primary keys resume the same way as ``rowid``.
+    """
+    if table not in table_names(conn):
+        raise ValueError(f"No table named {table!r}")
+    key = key_columns(conn, table)
+    width = len(key)
+    key_sql = ', '.join(quote(column) if column != 'rowid' else column for column in key)
+    placeholders = ', '.join('?' * width)
+    conditions = [f'({where})'] if where else []
+
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_conditions = conditions + ([f'({key_sql}) > ({placeholders})'] if after is not None else [])
+        sql = f'SELECT {key_sql}, * FROM {quote(table)}'
+        if page_conditions:
+            sql += ' WHERE ' + ' AND '.join(page_conditions)
+        sql += f' ORDER BY {key_sql} LIMIT ?'
+
+        size = page_size if remaining is None else min(page_size, remaining)
+        page = conn.execute(sql, (*params, *(after or ()), size)).fetchall()
+        for row in page:
+            yield row[:width], row[width:]
+        if len(page) < size:
+            return
+        after = page[-1][:width]
+        if remaining is not None:
+            remaining -= len(page)
@@ -0,0 +1,185 @@
+"""Handlers for the job kinds the outbound queue knows how to run.
+
+A handler does the Discord side of a job and returns a JSON-able result;
+its completion then records that result in the same transaction that
+retires the job.
+"""
+
+import json
+import time
+
+import discord
+
+from utils.channel_cache import get_channel_resolver
+from utils.database import get_database
+from utils.job_queue import JobQueue
+from utils.partner_ads import ad_drift, ad_renderer, forum_tags, parse_added_line
+
+# JSON error code of a 404 for a deleted message; any other 404 here means the channel itself is gone
+UNKNOWN_MESSAGE = 10008
+
+
+def remove_thread_rows(conn, thread_ids):
+    placeholders = ', '.join('?' for _ in thread_ids)
+    conn.execute(f'DELETE FROM global_partner_threads WHERE thread_id IN ({placeholders})', thread_ids)
+    conn.execute(f'DELETE FROM partner_threads WHERE thread_id IN ({placeholders})', thread_ids)
+
+
+def clear_bump_message(conn, thread_id, message_id):
+    """Forget a deleted bump message, so the next bump edits the thread's starter message instead."""
+    conn.execute('UPDATE partner_threads SET last_bump_message_id = NULL WHERE thread_id = ? AND last_bump_message_id = ?',
+                 (thread_id, message_id))
+
+
+def store_ad_hash(conn, thread_id, ad_hash, clear_bump=True):
+    """Record the ``ad_fingerprint`` a thread now shows; ``clear_bump`` when its message was rewritten over a bump."""
+    bump = ', bump_hash = NULL' if clear_bump else ''
+    # A thread is either mirrored or a server's own, so only one of each pair matches
+    conn.execute(f'UPDATE global_partner_threads SET ad_hash = ?{bump} WHERE thread_id = ?', (ad_hash, thread_id))
+    conn.execute(f'UPDATE partner_threads SET ad_hash = ?{bump} WHERE thread_id = ?', (ad_hash, thread_id))
+
+
+def store_bump_hash(conn, thread_id, bump_hash):
+    """Record the ``edit_hash`` of the last bump edit, leaving the ad fingerprint alone."""
+    conn.execute('UPDATE global_partner_threads SET bump_hash = ? WHERE thread_id = ?', (bump_hash, thread_id))
+    conn.execute('UPDATE partner_threads SET bump_hash = ? WHERE thread_id = ?', (bump_hash, thread_id))
+
+
+async def create_thread(bot, payload):
+    forum = await get_channel_resolver(bot).resolve(payload['forum_id'])
+    thread = await forum.create_thread(
+        name=payload['title'],
+        content=payload['content'],
+        applied_tags=forum_tags.tags_for(forum, payload['tags'])
+    )
+    return thread.thread.id
+
+
+def record_thread(conn, payload, thread_id):
+    conn.execute('INSERT OR IGNORE INTO global_partner_threads (hosting_server_id, thread_id, advertised_server_id, ad_hash) VALUES (?, ?, ?, ?)',
+                 (payload['hosting_server_id'], thread_id, payload['advertised_server_id'], payload.get('ad_hash')))
+    # Both runs of a job whose lease lapsed create a thread; whichever lost the (host, advertised) pair is deleted
+    now = time.time()
+    conn.execute(
+        '''INSERT OR IGNORE INTO jobs (kind, payload, lane, idempotency_key, created_at, updated_at)
+           SELECT 'delete_thread', ?, ?, ?, ?, ?
+           WHERE NOT EXISTS (SELECT 1 FROM global_partner_threads WHERE thread_id = ?)''',
+        (json.dumps({'thread_id': thread_id, 'reason': "Partner thread created twice by a re-run job"}), thread_id,
+         f"delete_thread:{thread_id}", now, now, thread_id)
+    )
+
+
+async def edit_message(bot, payload):
+    fields = {}
+    if 'content' in payload:
+        fields['content'] = payload['content']
+    if 'embed' in payload:
+        fields['embed'] = discord.Embed.from_dict(payload['embed'])
+    try:
+        await bot.get_partial_messageable(payload['channel_id']).get_partial_message(payload['message_id']).edit(**fields)
+    except discord.NotFound as e:
+        # Only the message was deleted, e.g. a bump message removed by a moderator; its thread is still there
+        return 'no_message' if e.code == UNKNOWN_MESSAGE else False
+    return True
+
+
+def record_edit(conn, payload, edited):
+    if edited == 'no_message':
+        clear_bump_message(conn, payload['channel_id'], payload['message_id'])
+    elif not edited:
+        # The thread is gone, so stop pointing bumps and syncs at it
+        remove_thread_rows(conn, [payload['channel_id']])
+    elif 'bump_hash' in payload:
+        store_bump_hash(conn, payload['channel_id'], payload['bump_hash'])
+
+
+async def delete_thread(bot, payload):
+    try:
+        await bot.http.delete_channel(payload['thread_id'], reason=payload.get('reason'))
+    except discord.NotFound:
+        # Thread already deleted or doesn't exist
+        return False
+    return True
+
+
+def record_delete(conn, payload, deleted):
+    remove_thread_rows(conn, [payload['thread_id']])
+
+
+async def repair_thread(bot, payload):
+    """Bring a drifted partner thread back in line with its registration.
+
+    The payload either carries the ``title``/``tags``/``content`` to set, or a
+    ``registration`` row to re-render with the thread's own "💌 Added" line,
+    in which case only the fields that differ are edited. Returns the fields
+    edited, or False if the thread is gone.
+    """
+    channels = get_channel_resolver(bot)
+    try:
+        thread = await channels.resolve(payload['thread_id'])
+        forum = None
+        if 'registration' in payload:
+            message = thread.starter_message or await thread.fetch_message(thread.id)
+            added = parse_added_line(message.content) or ("Nomons's Cottage", message.created_at.strftime('%m/%d/%Y'))
+            ad = ad_renderer.render(*payload['registration'], *added)
+            forum = await channels.resolve(thread.parent_id)
+            payload = dict(payload, **ad_drift(ad, thread.name, message.content, [tag.name for tag in thread.applied_tags],
+                                               {tag.name for tag in forum.available_tags}))
+        fields = {}
+        if 'title' in payload:
+            fields['name'] = payload['title']
+        if 'tags' in payload:
+            forum = forum or await channels.resolve(thread.parent_id)
+            fields['applied_tags'] = forum_tags.tags_for(forum, payload['tags'])
+        if thread.archived and (fields or 'content' in payload):
+            # Archived threads reject edits until they are reopened
+            fields['archived'] = False
+        if fields:
+            await thread.edit(**fields)
+        if 'content' in payload:
+            await thread.get_partial_message(thread.id).edit(content=payload['content'])
+    except discord.NotFound:
+        return False
+    return sorted(field for field in ('title', 'tags', 'content') if field in payload)
+
+
+def record_repair(conn, payload, edited):
+    if edited is False:
+        remove_thread_rows(conn, [payload['thread_id']])
+    elif 'ad_hash' in payload:
+        # Unless the content was rewritten, the message still shows the last bump
+        store_ad_hash(conn, payload['thread_id'], payload['ad_hash'], clear_bump='content' in edited)
+
+
+HANDLERS = {
+    'create_thread': create_thread,
+    'edit_message': edit_message,
+    'delete_thread': delete_thread,
+    'repair_thread': repair_thread,
+}
+
+# The payload field naming the channel each kind writes to, i.e. the major parameter of its rate-limit bucket
+BUCKET_KEYS = {
+    'create_thread': 'forum_id',
+    'edit_message': 'channel_id',
+    'delete_thread': 'thread_id',
+    'repair_thread': 'thread_id',
+}
+
+COMPLETIONS = {
+    'create_thread': record_thread,
+    'edit_message': record_edit,
+    'delete_thread': record_delete,
+    'repair_thread': record_repair,
+}
+
+
+def get_job_queue(bot):
+    """Return the outbound job queue shared by every cog on ``bot``."""
+    queue = getattr(bot, 'job_queue', None)
+    if queue is None:
+        pool = getattr(bot, 'rest_pool', None)
+        # With a worker pool, REST calls leave this process but results are still recorded here
+        handlers = pool.handlers(HANDLERS, BUCKET_KEYS) if pool is not None else HANDLERS
+        queue = bot.job_queue = JobQueue(get_database(), bot, handlers, COMPLETIONS)
+    return queue
@@ -0,0 +1,111 @@
+import asyncio
+import random
+from collections import defaultdict
+
+import discord
+
+
+class FanOutResult:
+    def __init__(self):
+        self.results = []
+        # (label, exception) for every job that gave up
+        self.errors = []
+
+    @property
+    def succeeded(self):
+        return len(self.results)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def retry_delay(exc, attempt, base_delay=1.0, max_delay=60.0):
+    """Seconds to wait before retrying ``exc``, or None if it should not be retried.
+
+    429s wait exactly as long as Discord asks via ``retry_after`` or the
+    ``Retry-After``/``X-RateLimit-Reset-After`` headers; 5xx and network errors
+    back off exponentially with jitter.
+    """
+    if isinstance(exc, discord.RateLimited):
+        return exc.retry_after
+
+    # Duck-typed so errors relayed from REST worker processes are handled the same way
+    status = getattr(exc, 'status', None)
+    if status == 429:
+        if getattr(exc, 'retry_after', None) is not None:
+            return exc.retry_after
+        headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+        for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+            if header in headers:
+                try:
+                    return float(headers[header])
+                except ValueError:
+                    pass
+    elif status is not None:
+        if status < 500:
+            return None
+    elif not (isinstance(exc, (OSError, asyncio.TimeoutError)) or getattr(exc, 'transient', False)):
+        return None
+
+    delay = min(max_delay, base_delay * (2 ** attempt))
+    return delay + random.uniform(0, delay / 2)
+
+
+class FanOut:
+    """Run Discord REST jobs concurrently across lanes (usually guild IDs).
+
+    Jobs in the same lane run one at a time because they share Discord's
+    per-route, per-guild rate-limit buckets; different lanes run in parallel
+    up to ``max_concurrency``. discord.py already paces each bucket from the
+    rate-limit headers, so no fixed sleeps are needed between requests.
+    """
+
+    def __init__(self, max_concurrency=10, per_lane=1, max_retries=5, base_delay=1.0):
+        self.max_concurrency = max_concurrency
+        self.per_lane = per_lane
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._lanes = defaultdict(list)
+
+    def __len__(self):
+        return sum(len(jobs) for jobs in self._lanes.values())
+
+    def add(self, lane, factory, label=None):
+        """Queue ``factory``, a zero-argument callable returning a coroutine."""
+        self._lanes[lane].append((factory, label))
+
+    async def _attempt(self, factory):
+        attempt = 0
+        while True:
+            try:
+                return await factory()
+            except Exception as e:
+                delay = retry_delay(e, attempt, self.base_delay)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def run(self):
+        """Drain every lane."""
+        result = FanOutResult()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def worker(jobs):
+            while jobs:
+                factory, label = jobs.pop(0)
+                async with semaphore:
+                    try:
+                        result.results.append(await self._attempt(factory))
+                    except Exception as e:
+                        result.errors.append((label, e))
+
+        workers = []
+        for jobs in self._lanes.values():
+            for _ in range(min(self.per_lane, len(jobs))):
+                workers.append(worker(jobs))
+        self._lanes = defaultdict(list)
+
+        await asyncio.gather(*workers)
+        return result
@@ -0,0 +1,67 @@
+"""Gateway intents and cache policy computed from config.json and the loaded cogs.
+
+Each extension module may declare a top-level ``INTENTS = [...]`` list naming
+the ``discord.Intents`` flags it needs. The bot connects with the union of
+those lists, so it only receives and caches what some cog actually uses.
+Extensions that declare nothing get ``gateway.default_intents`` instead.
+"""
+
+import ast
+import importlib.util
+
+import discord
+
+DEFAULT_INTENTS = ['guilds', 'guild_messages', 'dm_messages', 'message_content']
+
+
+def declared_intents(extension):
+    """Read ``INTENTS`` from an extension's source without importing it; None if undeclared or missing."""
+    try:
+        spec = importlib.util.find_spec(extension)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+        return None
+
+    with open(spec.origin, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=spec.origin)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'INTENTS' for t in node.targets):
+            return list(ast.literal_eval(node.value))
+    return None
+
+
+def required_intents(extensions, gateway):
+    names = set(gateway.get('extra_intents', []))
+    for extension in extensions:
+        declared = declared_intents(extension)
+        if declared is None:
+            names.update(gateway.get('default_intents', DEFAULT_INTENTS))
+        else:
+            names.update(declared)
+    return names
+
+
+def gateway_options(config, extensions):
+    """Keyword arguments for the bot constructor: intents, member cache, message cache and chunking."""
+    gateway = config.get('gateway', {})
+
+    if gateway.get('intents_profile', 'lean') == 'all':
+        intents = discord.Intents.all()
+    else:
+        intents = discord.Intents.none()
+        for name in sorted(required_intents(extensions, gateway)):
+            setattr(intents, name, True)
+
+    if gateway.get('member_cache', 'none') == 'none':
+        member_cache_flags = discord.MemberCacheFlags.none()
+    else:
+        # Cache as much as the chosen intents allow
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+
+    return {
+        'intents': intents,
+        'member_cache_flags': member_cache_flags,
+        'max_messages': gateway.get('max_messages', 100),
+        'chunk_guilds_at_startup': gateway.get('chunk_guilds_at_startup', False),
+    }
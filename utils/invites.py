@@ -0,0 +1,125 @@
+"""Reuse each server's stored invite instead of minting a new one per registration.
+
+``servers.invite_url`` is checked with ``fetch_invite`` at most once per TTL,
+and a replacement is only created when Discord says the invite is gone.
+``servers.invite_channel_id`` remembers where the last invite was made, so
+that channel is tried before scanning the rest of the guild.
+"""
+
+import asyncio
+import time
+
+import discord
+
+from utils.shard_metrics import local_shards, shard_clause
+
+
+class InviteManager:
+    def __init__(self, bot, db, ttl=6 * 60 * 60, shards=None):
+        self.bot = bot
+        self.db = db
+        self.ttl = ttl
+        # With one process per group of shards, each sweeps only its own guilds
+        self.shard_filter, self.shard_params = shard_clause('server_id', shards)
+        self._checked = {}  # invite_url -> (expires_at, valid)
+        self._inflight = {}
+        self.checks = 0
+        self.cache_hits = 0
+        self.created = 0
+
+    async def is_valid(self, invite_url):
+        entry = self._checked.get(invite_url)
+        if entry is not None and entry[0] > time.monotonic():
+            self.cache_hits += 1
+            return entry[1]
+
+        # Registration edits and the sweep can ask about the same invite at once
+        task = self._inflight.get(invite_url)
+        if task is None:
+            task = asyncio.ensure_future(self._check(invite_url))
+            self._inflight[invite_url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(invite_url, None))
+        return await asyncio.shield(task)
+
+    async def _check(self, invite_url):
+        self.checks += 1
+        try:
+            await self.bot.fetch_invite(invite_url, with_counts=False)
+            valid = True
+        except discord.NotFound:
+            valid = False
+        except discord.HTTPException:
+            # Unknown rather than gone; keep the invite and ask again next time
+            return True
+        self._checked[invite_url] = (time.monotonic() + self.ttl, valid)
+        return valid
+
+    def forget(self, invite_url):
+        self._checked.pop(invite_url, None)
+
+    async def ensure_invite(self, guild):
+        """Return a working invite URL for ``guild``, creating one only if the stored invite is gone.
+
+        Returns None when there is no working invite and none could be made;
+        the dead URL stays stored so the sweep tries again later.
+        """
+        row = await self.db.fetchone('SELECT invite_url, invite_channel_id FROM servers WHERE server_id = ?', (guild.id,))
+        invite_url, channel_id = row if row else (None, None)
+        if invite_url and await self.is_valid(invite_url):
+            return invite_url
+
+        invite, channel = await self.create_invite(guild, channel_id)
+        if invite is None:
+            return None
+
+        await self.db.execute('UPDATE servers SET invite_url = ?, invite_channel_id = ? WHERE server_id = ?',
+                              (invite.url, channel.id, guild.id))
+        self._checked[invite.url] = (time.monotonic() + self.ttl, True)
+        return invite.url
+
+    async def create_invite(self, guild, preferred_channel_id=None):
+        """Create a permanent invite, trying the channel that worked last time first; returns ``(invite, channel)``."""
+        channels = list(guild.text_channels)
+        preferred = guild.get_channel(preferred_channel_id) if preferred_channel_id else None
+        if preferred in channels:
+            channels.remove(preferred)
+            channels.insert(0, preferred)
+
+        me = guild.me
+        for channel in channels:
+            if me is not None and not channel.permissions_for(me).create_instant_invite:
+                continue
+            try:
+                # unique=False lets Discord hand back an equivalent existing invite
+                invite = await channel.create_invite(max_age=0, max_uses=0, unique=False, reason="Nomon partner ad invite")
+            except discord.HTTPException:
+                continue
+            self.created += 1
+            return invite, channel
+        return None, None
+
+    async def stale_servers(self, after=0, limit=25):
+        """Check the next ``limit`` stored invites after ``after``; returns ``(last_server_id, [(server_id, dead_url)])``."""
+        rows = await self.db.fetchall(
+            f'SELECT server_id, invite_url FROM servers WHERE server_id > ? AND invite_url IS NOT NULL AND {self.shard_filter} '
+            'ORDER BY server_id LIMIT ?',
+            (after, *self.shard_params, limit)
+        )
+        stale = [(server_id, invite_url) for server_id, invite_url in rows if not await self.is_valid(invite_url)]
+        return (rows[-1][0] if rows else 0), stale
+
+    def stats(self):
+        return {
+            'checks': self.checks,
+            'cache_hits': self.cache_hits,
+            'created': self.created,
+            'cached': len(self._checked),
+        }
+
+
+def get_invite_manager(bot, db):
+    """Return the invite manager shared by every cog on ``bot``."""
+    manager = getattr(bot, 'invite_manager', None)
+    if manager is None:
+        manager = bot.invite_manager = InviteManager(bot, db, shards=local_shards(bot))
+    return manager
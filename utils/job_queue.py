@@ -0,0 +1,272 @@
+"""Durable queue for outbound Discord writes.
+
+Jobs live in the ``jobs`` table of bump.db, so work queued by a slash
+command survives a crash or ``/restart``. A background task claims due jobs
+in batches of one job per lane (usually the guild or thread ID), runs the
+batch concurrently, and records the outcome of the whole batch in one
+transaction. Failed jobs are retried with exponential backoff until
+``max_attempts``.
+
+Several bot processes can share one queue. A claim stamps each job with
+the claiming queue's ``owner`` and a lease that is renewed while the batch
+runs; only jobs whose lease has expired (their process died or hung) are
+handed back to the queue, and a lane with a job running anywhere is not
+claimed again until that job is recorded. A run that finishes after losing
+its lease still records its result, since its Discord write happened.
+"""
+
+import asyncio
+import functools
+import json
+import os
+import socket
+import time
+import uuid
+from collections import deque
+
+from utils.database import UnitOfWork, WriteBatch
+from utils.fanout import FanOut, retry_delay
+
+# The oldest due job of each idle lane in a key range, walked in lane order off idx_jobs_lane
+LANES_SQL = '''
+    SELECT lane, MIN(id) FROM jobs
+    WHERE status = 'pending' AND lane > ? AND lane <= ? AND next_run_at <= ?
+      AND lane NOT IN (SELECT lane FROM jobs WHERE status = 'running' AND lane IS NOT NULL)
+    GROUP BY lane ORDER BY lane LIMIT ?
+'''
+UNLANED_SQL = '''
+    SELECT id FROM jobs
+    WHERE status = 'pending' AND lane IS NULL AND next_run_at <= ?
+    ORDER BY next_run_at, id LIMIT ?
+'''
+MIN_LANE, MAX_LANE = -2**63, 2**63 - 1
+
+
+class JobQueue:
+    def __init__(self, db, bot, handlers, completions=None, batch_size=50, max_concurrency=10,
+                 max_attempts=8, base_delay=2.0, poll_interval=5.0, lease_seconds=120.0, enqueue_batch_size=500):
+        self.db = db
+        self.bot = bot
+        # kind -> async handler(bot, payload) returning a JSON-able result
+        self.handlers = handlers
+        # kind -> completion(writer, payload, result); ``writer`` is a WriteBatch applied in the batch transaction.
+        # A job re-run after its lease lapsed records both results, so completions must tolerate a second call
+        self.completions = completions or {}
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.enqueue_batch_size = enqueue_batch_size
+        # Unique per queue instance, so a restarted process never mistakes its predecessor's claims for its own
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._task = None
+        # Last lane claimed; the next claim starts after it so every lane gets a turn
+        self._lane_cursor = MIN_LANE
+        # (label, keys, started_at) of recent labelled enqueues, for /job_queue_status
+        self._runs = deque(maxlen=5)
+
+    async def enqueue(self, kind, payload, key=None, lane=None, replace=False):
+        return await self.enqueue_many([(kind, payload, key, lane)], replace=replace)
+
+    async def enqueue_many(self, jobs, replace=False, label=None):
+        """Queue ``(kind, payload, key, lane)`` tuples; returns how many rows were queued.
+
+        A job whose key is already pending is skipped, or has its payload
+        replaced when ``replace`` is set. Failed jobs with the same key are revived.
+        Rows are committed ``enqueue_batch_size`` at a time; keys make a
+        retry after a partial enqueue safe. A ``label`` (e.g. the command
+        that queued the jobs) makes their progress show up in ``progress``.
+        """
+        if label is not None:
+            self._runs.append((label, [job[2] for job in jobs if job[2] is not None], time.time()))
+        now = time.time()
+        if replace:
+            conflict = ("ON CONFLICT(idempotency_key) DO UPDATE SET payload = excluded.payload, status = 'pending', "
+                        "attempts = 0, next_run_at = 0, last_error = NULL, updated_at = excluded.updated_at "
+                        "WHERE jobs.status != 'running'")
+        else:
+            conflict = ("ON CONFLICT(idempotency_key) DO UPDATE SET status = 'pending', attempts = 0, next_run_at = 0, "
+                        "last_error = NULL, updated_at = excluded.updated_at WHERE jobs.status = 'failed'")
+        sql = f'''INSERT INTO jobs (kind, payload, lane, idempotency_key, created_at, updated_at)
+                  VALUES (?, ?, ?, ?, ?, ?) {conflict}'''
+
+        # A full-network sync is thousands of rows; committing them in chunks lets claims and commands in between
+        async with UnitOfWork(self.db, self.enqueue_batch_size) as writes:
+            await writes.executemany(sql, [(kind, json.dumps(payload), lane, key, now, now) for kind, payload, key, lane in jobs])
+        queued = writes.changes
+        if queued:
+            self._wakeup.set()
+        return queued
+
+    async def stats(self):
+        rows = await self.db.fetchall('SELECT status, kind, COUNT(*) FROM jobs GROUP BY status, kind')
+        return {(status, kind): count for status, kind, count in rows}
+
+    async def progress(self):
+        """``(label, total, done, failed, started_at)`` for the last few labelled enqueues, newest first."""
+        def _progress(conn):
+            runs = []
+            for label, keys, started_at in reversed(self._runs):
+                counts = {'pending': 0, 'running': 0, 'failed': 0}
+                # Looked up by key through the idempotency_key index; finished jobs are deleted
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ', '.join('?' for _ in chunk)
+                    for status, count in conn.execute(
+                            f'SELECT status, COUNT(*) FROM jobs WHERE idempotency_key IN ({placeholders}) GROUP BY status', chunk):
+                        counts[status] = counts.get(status, 0) + count
+                runs.append((label, len(keys), len(keys) - sum(counts.values()), counts['failed'], started_at))
+            return runs
+
+        return await self.db.run(_progress)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                drained = await self.run_batch()
+            except Exception as e:
+                print(f"Job queue error: {e}")
+                drained = 0
+            if drained:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=await self._idle_timeout())
+            except asyncio.TimeoutError:
+                pass
+
+    async def _idle_timeout(self):
+        # Sleep until the next retry is due, but never longer than the poll interval
+        next_run_at, = await self.db.fetchone("SELECT MIN(next_run_at) FROM jobs WHERE status = 'pending'")
+        if next_run_at is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(0.0, next_run_at - time.time()))
+
+    def _claim(self, conn):
+        """Mark up to ``batch_size`` due jobs running, at most one per lane, and return them.
+
+        A lane's jobs run one at a time, so a batch of several jobs from one
+        lane would leave the fan-out idle; spreading the batch over distinct
+        lanes keeps ``max_concurrency`` requests in flight even when the queue
+        is dominated by a few big lanes, like a sync grouped by host.
+        """
+        # Take the write lock up front so several bot processes never claim the same jobs
+        conn.execute('BEGIN IMMEDIATE')
+        now = time.time()
+        # Jobs whose process crashed or hung go back to the queue; live claims are renewed by their owner
+        conn.execute("UPDATE jobs SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL "
+                     "WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)", (now,))
+        lanes = conn.execute(LANES_SQL, (self._lane_cursor, MAX_LANE, now, self.batch_size)).fetchall()
+        if len(lanes) < self.batch_size:
+            # Wrap around to the lanes before the cursor
+            lanes += conn.execute(LANES_SQL, (MIN_LANE, self._lane_cursor, now, self.batch_size - len(lanes))).fetchall()
+        if lanes:
+            self._lane_cursor = lanes[-1][0]
+        ids = [job_id for _, job_id in lanes]
+        # Jobs without a lane are independent of each other
+        ids += [job_id for job_id, in conn.execute(UNLANED_SQL, (now, self.batch_size - len(ids)))]
+        if not ids:
+            return []
+
+        placeholders = ', '.join('?' for _ in ids)
+        jobs = conn.execute(f'SELECT id, kind, payload, lane, attempts FROM jobs WHERE id IN ({placeholders}) ORDER BY id', ids).fetchall()
+        conn.executemany("UPDATE jobs SET status = 'running', claimed_by = ?, lease_expires_at = ? WHERE id = ?",
+                         [(self.owner, now + self.lease_seconds, job_id) for job_id in ids])
+        return jobs
+
+    async def _renew_leases(self, job_ids):
+        # Rate-limit waits can hold a batch well past one lease, so keep extending it while it runs
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            expires_at = time.time() + self.lease_seconds
+            try:
+                await self.db.executemany(
+                    "UPDATE jobs SET lease_expires_at = ? WHERE claimed_by = ? AND id = ? AND status = 'running'",
+                    [(expires_at, self.owner, job_id) for job_id in job_ids])
+            except Exception as e:
+                print(f"Error renewing job leases: {e}")
+
+    async def run_batch(self):
+        jobs = await self.db.run(self._claim)
+        if not jobs:
+            return 0
+
+        # Retries are scheduled through the table, so the fan-out itself never sleeps
+        fanout = FanOut(max_concurrency=self.max_concurrency, max_retries=0)
+        outcomes = []
+
+        async def run_job(job_id, kind, payload, attempts):
+            try:
+                result = await self.handlers[kind](self.bot, payload)
+            except Exception as e:
+                outcomes.append((job_id, kind, payload, attempts, None, e))
+                raise
+            outcomes.append((job_id, kind, payload, attempts, result, None))
+
+        for job_id, kind, payload, lane, attempts in jobs:
+            fanout.add(lane if lane is not None else job_id,
+                       functools.partial(run_job, job_id, kind, json.loads(payload), attempts), label=job_id)
+
+        renewer = asyncio.create_task(self._renew_leases([job[0] for job in jobs]))
+        try:
+            await fanout.run()
+        finally:
+            renewer.cancel()
+        try:
+            await self.db.run(self._record, outcomes)
+        except Exception:
+            # Hand the batch back rather than leaving it stuck as running
+            await self.db.executemany("UPDATE jobs SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL "
+                                      "WHERE id = ? AND claimed_by = ?", [(job[0], self.owner) for job in jobs])
+            raise
+        return len(jobs)
+
+    def _record(self, conn, outcomes):
+        # A job whose lease lapsed may already be running elsewhere; that run records it instead
+        placeholders = ', '.join('?' for _ in outcomes)
+        owned = {job_id for job_id, in conn.execute(
+            f"SELECT id FROM jobs WHERE claimed_by = ? AND status = 'running' AND id IN ({placeholders})",
+            (self.owner, *(outcome[0] for outcome in outcomes))
+        )}
+
+        # Grouping by statement turns a batch of 50 results into a handful of executemany calls
+        writes = WriteBatch()
+        now = time.time()
+        for job_id, kind, payload, attempts, result, error in outcomes:
+            completion = self.completions.get(kind) if error is None else None
+            if job_id not in owned:
+                # The job row now belongs to the other run, but what this run did on Discord still happened
+                if completion is not None:
+                    completion(writes, payload, result)
+                print(f"Job {job_id} ({kind}) lost its lease before finishing; recorded its result but left the job alone")
+                continue
+            if error is None:
+                if completion is not None:
+                    completion(writes, payload, result)
+                writes.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+                continue
+
+            attempts += 1
+            delay = retry_delay(error, attempts - 1, self.base_delay, max_delay=15 * 60)
+            if delay is None or attempts >= self.max_attempts:
+                writes.execute("UPDATE jobs SET status = 'failed', attempts = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                               (attempts, str(error)[:500], now, job_id))
+                print(f"Job {job_id} ({kind}) failed permanently: {error}")
+            else:
+                writes.execute("UPDATE jobs SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL, attempts = ?, "
+                               "next_run_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                               (attempts, now + delay, str(error)[:500], now, job_id))
+        writes.apply(conn)
@@ -0,0 +1,184 @@
+"""Buffered sink for the Nomon log channel.
+
+``log`` never awaits: events go to a rotating local file through a
+background logging thread and into an in-memory buffer. A flusher task
+waits a short window, then packs the buffered events into as few messages
+as Discord allows (10 embeds and 6000 characters each), so a burst of
+joins or bumps costs a handful of REST calls instead of one per event.
+When the buffer overflows, low-priority events are dropped first and
+reported as a count; when a flush has more than fits in one message,
+low-priority events are folded into a single summary embed.
+"""
+
+import asyncio
+import datetime
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from collections import deque
+
+import discord
+
+LOW, NORMAL, HIGH = 0, 1, 2
+
+MAX_EMBEDS = 10
+MAX_MESSAGE_CHARS = 6000
+MAX_DESCRIPTION = 4096
+
+
+def file_logger(path, max_bytes=5 * 1024 * 1024, backups=5):
+    """A logger that writes to a rotating file from a background thread."""
+    logger = logging.getLogger('nomon.events')
+    if logger.handlers:
+        return logger
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+
+    records = queue.SimpleQueue()
+    logging.handlers.QueueListener(records, handler).start()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+class LogEvent:
+    __slots__ = ('description', 'color', 'priority', 'title', 'created_at')
+
+    def __init__(self, description, color, priority, title):
+        self.description = description[:MAX_DESCRIPTION]
+        self.color = color
+        self.priority = priority
+        self.title = title
+        self.created_at = time.time()
+
+    def to_embed(self):
+        # The event time, not the time the batch happened to be flushed
+        return discord.Embed(title=self.title, description=self.description, color=self.color,
+                             timestamp=datetime.datetime.fromtimestamp(self.created_at, datetime.timezone.utc))
+
+    def size(self):
+        return len(self.description) + len(self.title or '')
+
+
+class LogSink:
+    def __init__(self, bot, channel_id, window=2.0, max_buffer=200, log_path='logs/nomon_events.log'):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.window = window
+        self.max_buffer = max_buffer
+        self.file = file_logger(log_path)
+        self._buffer = deque()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.sent_messages = 0
+        self.sent_events = 0
+        self.dropped = 0
+        self.total_dropped = 0
+        self.summarized = 0
+
+    def log(self, description, color=0xf9d6c1, priority=NORMAL, title=None):
+        """Record an event; returns at once and never raises."""
+        level = logging.WARNING if priority == HIGH else logging.INFO
+        self.file.log(level, description.replace('\n', ' | '))
+
+        self._buffer.append(LogEvent(description, color, priority, title))
+        if len(self._buffer) > self.max_buffer:
+            self._shed()
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _shed(self):
+        # Drop the oldest event of the lowest priority present
+        lowest = min(event.priority for event in self._buffer)
+        for event in self._buffer:
+            if event.priority == lowest:
+                self._buffer.remove(event)
+                self.dropped += 1
+                self.total_dropped += 1
+                return
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Let the burst build up so it goes out as one message
+            await asyncio.sleep(self.window)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing Nomon logs: {e}")
+
+    def _take_batch(self):
+        events = list(self._buffer)
+        self._buffer.clear()
+        if len(events) > MAX_EMBEDS:
+            low = [event for event in events if event.priority == LOW]
+            if len(low) > 1:
+                events = [event for event in events if event.priority != LOW]
+                events.append(self._summary(low))
+        if self.dropped:
+            events.append(LogEvent(f"⚠️ {self.dropped} low-priority log events were dropped under load.", 0xFFB347, HIGH, None))
+            self.dropped = 0
+        return events
+
+    def _summary(self, events):
+        self.summarized += len(events)
+        lines = [f"• {event.description.splitlines()[0][:120]}" for event in events]
+        text = "\n".join(lines)
+        if len(text) > MAX_DESCRIPTION - 100:
+            text = text[:MAX_DESCRIPTION - 100].rsplit('\n', 1)[0] + "\n…"
+        return LogEvent(f"🗂️ {len(events)} minor events\n{text}", events[-1].color, LOW, None)
+
+    async def flush(self):
+        events = self._take_batch()
+        if not events:
+            return
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            # Not configured or not visible to this shard; the file log still has everything
+            return
+
+        message, chars = [], 0
+        for event in events:
+            if message and (len(message) == MAX_EMBEDS or chars + event.size() > MAX_MESSAGE_CHARS):
+                await self._send(channel, message)
+                message, chars = [], 0
+            message.append(event)
+            chars += event.size()
+        if message:
+            await self._send(channel, message)
+
+    async def _send(self, channel, events):
+        try:
+            await channel.send(embeds=[event.to_embed() for event in events])
+        except discord.HTTPException as e:
+            print(f"Failed to send {len(events)} Nomon log events: {e}")
+            return
+        self.sent_messages += 1
+        self.sent_events += len(events)
+
+    def stats(self):
+        return {
+            'buffered': len(self._buffer),
+            'sent_messages': self.sent_messages,
+            'sent_events': self.sent_events,
+            'dropped': self.total_dropped,
+            'summarized': self.summarized,
+        }
+
+
+def get_log_sink(bot):
+    """Return the log sink shared by every cog on ``bot``, pointed at ``nomon_log_channel_id``."""
+    sink = getattr(bot, 'log_sink', None)
+    if sink is None:
+        channel_id = getattr(bot, 'config', {}).get('nomon_log_channel_id')
+        sink = bot.log_sink = LogSink(bot, channel_id)
+    return sink
@@ -0,0 +1,191 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+Counters, gauges and histograms are plain dicts keyed by label values, so
+recording a sample is a dict lookup and an add with no locks or background
+work. ``serve_metrics`` exposes ``registry.render()`` on a local HTTP
+``/metrics`` endpoint, and ``rest_trace_config`` counts every Discord REST
+call and 429 by route through aiohttp's tracing hooks; REST worker processes
+report their calls to ``record_rest_call`` in the gateway process.
+"""
+
+import bisect
+import re
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Snowflakes, interaction tokens and webhook tokens would give every request its own series
+ROUTE_IDS = re.compile(r'/(\d{15,21}|[A-Za-z0-9_\-.]{60,})(?=/|$)')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"'.replace('\n', ' ') for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in self.values.items():
+            yield f'{self.name}{_labels(self.label_names, labels)} {value}'
+
+
+class Gauge(Counter):
+    def set(self, *labels, value):
+        self.values[labels] = value
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} gauge'
+        for labels, value in self.values.items():
+            yield f'{self.name}{_labels(self.label_names, labels)} {value}'
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, *labels, value):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        names = self.label_names + ('le',)
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f'{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}'
+            yield f'{self.name}_bucket{_labels(names, labels + ("+Inf",))} {series[-1]}'
+            yield f'{self.name}_sum{_labels(self.label_names, labels)} {series[-2]}'
+            yield f'{self.name}_count{_labels(self.label_names, labels)} {series[-1]}'
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(*self.labels, value=time.perf_counter() - self.started)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        # Callables run before each render, for values that are cheaper to read than to track
+        self.collectors = []
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+command_latency = registry.histogram(
+    'nomon_app_command_seconds', 'Time from interaction creation to slash command completion', ('command', 'outcome'))
+rest_requests = registry.counter('nomon_rest_requests_total', 'Discord REST calls by route and status', ('method', 'route', 'status'))
+rest_rate_limited = registry.counter('nomon_rest_429_total', 'Discord REST calls answered with 429, by route', ('method', 'route'))
+rest_latency = registry.histogram('nomon_rest_request_seconds', 'Discord REST call duration by route', ('method', 'route'))
+db_latency = registry.histogram(
+    'nomon_db_seconds', 'SQLite work per database call, commit included', ('operation',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+gateway_latency = registry.gauge('nomon_gateway_latency_seconds', 'Heartbeat latency per shard', ('shard',))
+bump_seconds = registry.histogram('nomon_bump_propagation_seconds', 'Wall time to propagate one bump across the network')
+bump_edits = registry.counter('nomon_bump_edits_total', 'Mirrored ad edits from bumps by outcome', ('outcome',))
+
+
+def route_of(path):
+    return ROUTE_IDS.sub('/:id', path)
+
+
+def record_rest_call(method, route, status, seconds):
+    """Count one REST call; REST worker processes report theirs through this too."""
+    rest_requests.inc(method, route, status)
+    rest_latency.observe(method, route, value=seconds)
+    if status == 429:
+        rest_rate_limited.inc(method, route)
+
+
+def rest_trace_config():
+    """aiohttp TraceConfig for the bot's ``http_trace`` that times and counts REST calls."""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        record_rest_call(params.method, route_of(params.url.path), params.response.status,
+                         time.perf_counter() - context.started)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+
+async def serve_metrics(host='127.0.0.1', port=9108):
+    """Start the ``/metrics`` endpoint; returns the runner so the caller can ``cleanup()`` it."""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,253 @@
+"""Versioned schema migrations for bump.db.
+
+The applied version lives in ``PRAGMA user_version``. Each migration runs in
+its own transaction and is only ever appended to ``MIGRATIONS``, never edited.
+"""
+
+import json
+import time
+
+
+def _base_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS servers (
+            server_id INTEGER PRIMARY KEY,
+            forum_channel_id INTEGER,
+            server_name TEXT,
+            advertisement TEXT,
+            tags TEXT,
+            invite_url TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS partner_threads (
+            server_id INTEGER PRIMARY KEY,
+            thread_id INTEGER,
+            last_bump INTEGER DEFAULT 0,
+            next_bump INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS global_partner_threads (
+            hosting_server_id INTEGER,
+            thread_id INTEGER,
+            advertised_server_id INTEGER
+        )
+    ''')
+    conn.execute('CREATE TABLE IF NOT EXISTS devs (user_id INTEGER PRIMARY KEY)')
+    conn.execute('CREATE TABLE IF NOT EXISTS whitelisted_servers (server_id INTEGER PRIMARY KEY)')
+
+
+def _add_last_bump_message_id(conn):
+    columns = [info[1] for info in conn.execute('PRAGMA table_info(partner_threads)')]
+    if 'last_bump_message_id' not in columns:
+        conn.execute('ALTER TABLE partner_threads ADD COLUMN last_bump_message_id INTEGER')
+
+
+def _partner_thread_indexes(conn):
+    # Keep the oldest row for any duplicated (host, advertised) pair so the unique index can be built.
+    # The dropped threads still exist on Discord, so they are kept aside in duplicate_threads.
+    duplicates = '''
+        FROM global_partner_threads WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM global_partner_threads GROUP BY hosting_server_id, advertised_server_id
+        )
+    '''
+    conn.execute('CREATE TABLE IF NOT EXISTS duplicate_threads (thread_id INTEGER PRIMARY KEY)')
+    conn.execute(f'INSERT OR IGNORE INTO duplicate_threads (thread_id) SELECT thread_id {duplicates} AND thread_id IS NOT NULL')
+    conn.execute(f'DELETE {duplicates}')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_gpt_host_advertised ON global_partner_threads (hosting_server_id, advertised_server_id)')
+    # Covers the bump lookup (advertised -> hosts, threads) and the advertised half of remove_server
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_gpt_advertised_host_thread ON global_partner_threads (advertised_server_id, hosting_server_id, thread_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_gpt_thread ON global_partner_threads (thread_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_partner_threads_thread ON partner_threads (thread_id)')
+
+
+def _server_tags(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS server_tags (
+            server_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (server_id, tag)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_server_tags_tag ON server_tags (tag, server_id)')
+    for server_id, tags_str in conn.execute('SELECT server_id, tags FROM servers WHERE tags IS NOT NULL').fetchall():
+        conn.executemany('INSERT OR IGNORE INTO server_tags (server_id, tag) VALUES (?, ?)',
+                         [(server_id, tag) for tag in tags_str.split(',') if tag])
+
+
+def _jobs(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            lane INTEGER,
+            idempotency_key TEXT UNIQUE,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_run_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, next_run_at)')
+
+
+def _tombstones(conn):
+    # Targets Discord told us are gone, waiting to be swept out of the registry in one batch
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tombstones (
+            kind TEXT NOT NULL,
+            target_id INTEGER NOT NULL,
+            reason TEXT,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (kind, target_id)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _content_hash(conn):
+    # Hash of what we last wrote to each thread's message, so identical edits can be skipped
+    conn.execute('ALTER TABLE global_partner_threads ADD COLUMN content_hash TEXT')
+    conn.execute('ALTER TABLE partner_threads ADD COLUMN content_hash TEXT')
+
+
+def _invite_channel(conn):
+    conn.execute('ALTER TABLE servers ADD COLUMN invite_channel_id INTEGER')
+
+
+def _delete_duplicate_threads(conn):
+    # Databases migrated before duplicates were kept aside have nothing to queue
+    conn.execute('CREATE TABLE IF NOT EXISTS duplicate_threads (thread_id INTEGER PRIMARY KEY)')
+    now = time.time()
+    rows = conn.execute('''
+        SELECT thread_id FROM duplicate_threads
+        WHERE thread_id NOT IN (SELECT thread_id FROM global_partner_threads WHERE thread_id IS NOT NULL)
+          AND thread_id NOT IN (SELECT thread_id FROM partner_threads WHERE thread_id IS NOT NULL)
+    ''').fetchall()
+    # Same shape as the delete_thread jobs /delete_all_threads queues, laned by thread
+    conn.executemany(
+        '''INSERT OR IGNORE INTO jobs (kind, payload, lane, idempotency_key, created_at, updated_at)
+           VALUES ('delete_thread', ?, ?, ?, ?, ?)''',
+        [(json.dumps({'thread_id': thread_id, 'reason': "Duplicate partner thread"}), thread_id,
+          f"delete_thread:{thread_id}", now, now) for thread_id, in rows]
+    )
+    conn.execute('DROP TABLE duplicate_threads')
+
+
+def _tag_rows(server_id, tags, source=''):
+    """``SELECT`` of ``(server_id, tag)`` rows from a CSV tags column, split the way ``split_tags`` does.
+
+    Trigger bodies cannot use a recursive CTE, so the CSV is rewritten as a
+    JSON array for ``json_each``; a value that still is not valid JSON is
+    left unindexed rather than failing the write.
+    """
+    array = f'''('["' || replace(replace(replace(COALESCE({tags}, ''), '\\', '\\\\'), '"', '\\"'), ',', '","') || '"]')'''
+    return (f"SELECT {server_id}, value FROM {source}json_each(CASE WHEN json_valid({array}) THEN {array} ELSE '[]' END) "
+            "WHERE value != ''")
+
+
+def _server_tags_triggers(conn):
+    # Every write to servers.tags keeps server_tags in step, whichever code path made it
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS servers_tags_insert AFTER INSERT ON servers BEGIN
+            INSERT OR IGNORE INTO server_tags (server_id, tag) {_tag_rows('NEW.server_id', 'NEW.tags')};
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS servers_tags_update AFTER UPDATE OF server_id, tags ON servers BEGIN
+            DELETE FROM server_tags WHERE server_id = OLD.server_id;
+            INSERT OR IGNORE INTO server_tags (server_id, tag) {_tag_rows('NEW.server_id', 'NEW.tags')};
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS servers_tags_delete AFTER DELETE ON servers BEGIN
+            DELETE FROM server_tags WHERE server_id = OLD.server_id;
+        END
+    ''')
+    # Registrations edited since migration 4 left the table stale; rebuild it once
+    conn.execute('DELETE FROM server_tags')
+    conn.execute(f"INSERT OR IGNORE INTO server_tags (server_id, tag) {_tag_rows('servers.server_id', 'servers.tags', 'servers, ')}")
+
+
+def _jobs_lane_index(conn):
+    # Lets the claim find the oldest due job of each lane without sorting the whole queue
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_lane ON jobs (status, lane, next_run_at, id)')
+
+
+def _job_leases(conn):
+    # Which queue claimed a running job and until when, so one process never resets another's work
+    conn.execute('ALTER TABLE jobs ADD COLUMN claimed_by TEXT')
+    conn.execute('ALTER TABLE jobs ADD COLUMN lease_expires_at REAL')
+
+
+def _ad_and_bump_hashes(conn):
+    # Bumps and ad renders hash different things, so one column made every bump look like a stale ad.
+    # Only bumps ever wrote partner_threads' hash; mirrored threads mostly hold ad fingerprints, and
+    # any bump hash left in one is replaced by the reconciler's backfill on its next pass.
+    conn.execute('ALTER TABLE global_partner_threads RENAME COLUMN content_hash TO ad_hash')
+    conn.execute('ALTER TABLE global_partner_threads ADD COLUMN bump_hash TEXT')
+    conn.execute('ALTER TABLE partner_threads RENAME COLUMN content_hash TO bump_hash')
+    conn.execute('ALTER TABLE partner_threads ADD COLUMN ad_hash TEXT')
+    # Jobs queued before the split still carry the old payload key
+    for kinds, key in ((('create_thread', 'repair_thread'), 'ad_hash'), (('edit_message',), 'bump_hash')):
+        placeholders = ', '.join('?' for _ in kinds)
+        conn.execute(f'''
+            UPDATE jobs SET payload = json_set(json_remove(payload, '$.content_hash'), '$.{key}', json_extract(payload, '$.content_hash'))
+            WHERE kind IN ({placeholders}) AND json_valid(payload) AND json_type(payload, '$.content_hash') IS NOT NULL
+        ''', kinds)
+
+
+def _hold_duplicate_deletions(conn):
+    # Migration 9 deleted user-visible threads on the first start after an upgrade. Pull back whatever it
+    # queued that has not run yet; they wait in duplicate_threads for ``migrate_db.py --delete-duplicates``.
+    conn.execute('CREATE TABLE IF NOT EXISTS duplicate_threads (thread_id INTEGER PRIMARY KEY)')
+    held = ("FROM jobs WHERE kind = 'delete_thread' AND status = 'pending' AND claimed_by IS NULL "
+            "AND json_valid(payload) AND json_extract(payload, '$.reason') = 'Duplicate partner thread'")
+    conn.execute(f"INSERT OR IGNORE INTO duplicate_threads (thread_id) SELECT json_extract(payload, '$.thread_id') {held}")
+    conn.execute(f'DELETE {held}')
+
+
+MIGRATIONS = [
+    (1, 'base schema', _base_schema),
+    (2, 'partner_threads.last_bump_message_id', _add_last_bump_message_id),
+    (3, 'global_partner_threads indexes', _partner_thread_indexes),
+    (4, 'normalized server_tags', _server_tags),
+    (5, 'outbound job queue', _jobs),
+    (6, 'registry tombstones', _tombstones),
+    (7, 'partner thread content_hash', _content_hash),
+    (8, 'servers.invite_channel_id', _invite_channel),
+    (9, 'queue deletion of duplicate partner threads', _delete_duplicate_threads),
+    (10, 'server_tags triggers', _server_tags_triggers),
+    (11, 'jobs lane index', _jobs_lane_index),
+    (12, 'jobs claim leases', _job_leases),
+    (13, 'separate ad and bump hashes', _ad_and_bump_hashes),
+    (14, 'hold duplicate thread deletions for the operator', _hold_duplicate_deletions),
+]
+
+
+def current_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, target=None, verbose=False):
+    """Apply every pending migration up to ``target`` and return the new version."""
+    version = current_version(conn)
+    for number, name, apply in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        try:
+            if not conn.in_transaction:
+                conn.execute('BEGIN')
+            apply(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+        if verbose:
+            print(f"Applied migration {number}: {name}")
+    return version
@@ -0,0 +1,156 @@
+"""Button-driven embed paginator that loads one page at a time.
+
+Sources page by key (``WHERE key > ?`` / ``WHERE key < ?``) instead of
+OFFSET, so every page costs the same however deep the listing goes and only
+the rows on screen are ever held in memory.
+"""
+
+import heapq
+
+import discord
+
+
+class SQLitePageSource:
+    """Keyset pages over one indexed integer column of a table."""
+
+    def __init__(self, db, table, column, per_page=15):
+        self.db = db
+        self.table = table
+        self.column = column
+        self.per_page = per_page
+
+    async def count(self):
+        row = await self.db.fetchone(f'SELECT COUNT(*) FROM {self.table}')
+        return row[0]
+
+    async def after(self, key):
+        """Up to ``per_page + 1`` keys greater than ``key``; the extra one only signals another page."""
+        if key is None:
+            rows = await self.db.fetchall(
+                f'SELECT {self.column} FROM {self.table} ORDER BY {self.column} LIMIT ?',
+                (self.per_page + 1,)
+            )
+        else:
+            rows = await self.db.fetchall(
+                f'SELECT {self.column} FROM {self.table} WHERE {self.column} > ? ORDER BY {self.column} LIMIT ?',
+                (key, self.per_page + 1)
+            )
+        return [row[0] for row in rows]
+
+    async def before(self, key):
+        rows = await self.db.fetchall(
+            f'SELECT {self.column} FROM {self.table} WHERE {self.column} < ? ORDER BY {self.column} DESC LIMIT ?',
+            (key, self.per_page)
+        )
+        return [row[0] for row in reversed(rows)]
+
+
+class GuildPageSource:
+    """Keyset pages over the guilds in the bot's cache, ordered by ID."""
+
+    def __init__(self, bot, per_page=15):
+        self.bot = bot
+        self.per_page = per_page
+
+    async def count(self):
+        return len(self.bot.guilds)
+
+    async def after(self, key):
+        guilds = self.bot.guilds if key is None else (g for g in self.bot.guilds if g.id > key)
+        # A bounded heap keeps this O(n) without sorting every guild for each page
+        return heapq.nsmallest(self.per_page + 1, guilds, key=lambda g: g.id)
+
+    async def before(self, key):
+        guilds = (g for g in self.bot.guilds if g.id < key)
+        return sorted(heapq.nlargest(self.per_page, guilds, key=lambda g: g.id), key=lambda g: g.id)
+
+
+class Paginator(discord.ui.View):
+    """Previous/next buttons over a page source.
+
+    ``render(items, page, total)`` builds the embed for the items on screen
+    and ``key(item)`` gives the value the source pages by.
+    """
+
+    def __init__(self, source, render, owner_id, key=lambda item: item, timeout=300):
+        super().__init__(timeout=timeout)
+        self.source = source
+        self.render = render
+        self.owner_id = owner_id
+        self.key = key
+        self.items = []
+        self.page = 0
+        self.total = 0
+        self.has_next = False
+        self.message = None
+
+    async def load_first(self):
+        self.total = await self.source.count()
+        await self.load_after(None)
+        self.page = 0
+
+    async def load_after(self, key):
+        items = await self.source.after(key)
+        self.has_next = len(items) > self.source.per_page
+        self.items = items[:self.source.per_page]
+
+    async def load_before(self, key):
+        self.items = await self.source.before(key)
+        # Whatever we came back from is still there
+        self.has_next = True
+
+    def page_count(self):
+        return max(1, -(-self.total // self.source.per_page))
+
+    def current_embed(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not self.has_next
+        return self.render(self.items, self.page, self.total)
+
+    async def send(self, interaction, empty="💤 Nothing to show!"):
+        """Load the first page and send it as an ephemeral reply."""
+        await self.load_first()
+        if not self.items:
+            await interaction.response.send_message(empty, ephemeral=True)
+            self.stop()
+            return
+        if not self.has_next:
+            # Single page, no need for buttons
+            await interaction.response.send_message(embed=self.current_embed(), ephemeral=True)
+            self.stop()
+            return
+        await interaction.response.send_message(embed=self.current_embed(), view=self, ephemeral=True)
+        self.message = await interaction.original_response()
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Only the person who ran this command can turn its pages.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message is None:
+            return
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except discord.HTTPException:
+            pass
+
+    @discord.ui.button(label='◀ Previous', style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.items:
+            await self.load_before(self.key(self.items[0]))
+        if self.items:
+            self.page = max(0, self.page - 1)
+        else:
+            # Everything before this page was removed in the meantime
+            await self.load_first()
+        await interaction.response.edit_message(embed=self.current_embed(), view=self)
+
+    @discord.ui.button(label='Next ▶', style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.load_after(self.key(self.items[-1]) if self.items else None)
+        self.page += 1
+        await interaction.response.edit_message(embed=self.current_embed(), view=self)
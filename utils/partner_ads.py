@@ -0,0 +1,110 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict, namedtuple
+
+RenderedAd = namedtuple('RenderedAd', ['title', 'content', 'tags'])
+
+ADDED_LINE = re.compile(r'^💌 Added to (.+) on (.+)$', re.MULTILINE)
+
+
+def split_tags(tags_str):
+    return tags_str.split(',') if tags_str else []
+
+
+def registration_version(server_name, advertisement, tags_str, invite_url):
+    """Short fingerprint of a ``servers`` row; changes whenever the registration is edited."""
+    raw = '\x1f'.join(str(value or '') for value in (server_name, advertisement, tags_str, invite_url))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def render_partner_ad(server_id, server_name, advertisement, tags_str, invite_url, portal, added_on):
+    tags = split_tags(tags_str)
+    join_text = f"[Join Server]({invite_url})" if invite_url else f"Server ID: {server_id}"
+    content = f"**{server_name}** ({join_text})\n\n{advertisement}\n\n💌 Added to {portal} on {added_on}\n\nTags: {', '.join(tags) if tags else 'None'}"
+    return RenderedAd(f"🌸 {server_name} — Partner Ad", content, tags)
+
+
+def parse_added_line(content):
+    """Return ``(portal, added_on)`` from a posted ad, or None if the line is missing."""
+    match = ADDED_LINE.search(content or '')
+    return match.groups() if match else None
+
+
+def ad_fingerprint(title, content, tags):
+    """Hash of what an ad shows, minus the "💌 Added" line, which differs per forum and date."""
+    body = ADDED_LINE.sub('', content or '')
+    raw = '\x1f'.join([title or '', body, ','.join(sorted(tags))])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def ad_drift(ad, name, content, applied_tags, available_tags=None):
+    """The ``title``/``tags``/``content`` of ``ad`` a thread showing the other arguments needs set.
+
+    Tags missing from the forum's ``available_tags`` can never be applied,
+    so they are not drift, and neither is a different "💌 Added" line.
+    """
+    expected_tags = ad.tags if available_tags is None else [tag for tag in ad.tags if tag in available_tags]
+    changes = {}
+    if name != ad.title:
+        changes['title'] = ad.title
+    if sorted(applied_tags) != sorted(expected_tags):
+        changes['tags'] = ad.tags
+    if ADDED_LINE.sub('', content or '') != ADDED_LINE.sub('', ad.content):
+        changes['content'] = ad.content
+    return changes
+
+
+def edit_hash(fields):
+    """Hash of the fields passed to a message edit (content=, embed= as a dict, ...)."""
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class AdRenderer:
+    """Caches rendered partner ads by ``(server_id, registration version)``.
+
+    When a server joins, its ad is rendered once and reused for every
+    hosting forum instead of being rebuilt N times.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def render(self, server_id, server_name, advertisement, tags_str, invite_url, portal, added_on):
+        key = (server_id, registration_version(server_name, advertisement, tags_str, invite_url), portal, added_on)
+        ad = self._cache.get(key)
+        if ad is not None:
+            self._cache.move_to_end(key)
+            return ad
+
+        ad = self._cache[key] = render_partner_ad(server_id, server_name, advertisement, tags_str, invite_url, portal, added_on)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return ad
+
+
+class ForumTagIndex:
+    """Per-forum ``name -> ForumTag`` dicts, rebuilt only when the forum changes.
+
+    Each index belongs to the forum object it was built from. A forum this
+    process gets no gateway events for is re-fetched once its
+    ``ChannelResolver`` entry expires, and the new object rebuilds the index.
+    """
+
+    def __init__(self):
+        self._by_forum = {}  # forum_id -> (forum, name -> ForumTag)
+
+    def tags_for(self, forum, names):
+        entry = self._by_forum.get(forum.id)
+        if entry is None or entry[0] is not forum:
+            entry = self._by_forum[forum.id] = (forum, {tag.name: tag for tag in forum.available_tags})
+        index = entry[1]
+        return [index[name] for name in names if name in index]
+
+    def invalidate(self, forum_id):
+        self._by_forum.pop(forum_id, None)
+
+
+ad_renderer = AdRenderer()
+forum_tags = ForumTagIndex()
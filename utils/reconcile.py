@@ -0,0 +1,55 @@
+"""Set-based planning for partner thread syncs.
+
+Instead of probing ``global_partner_threads`` once per (host, advertised)
+pair, one anti-join returns every missing pair and the executor works
+through the resulting plan.
+"""
+
+MISSING_PAIRS_SQL = '''
+    SELECT host.server_id, advertised.server_id
+    FROM servers AS host
+    JOIN servers AS advertised ON advertised.server_id != host.server_id
+    WHERE {where} host.forum_channel_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM global_partner_threads AS g
+        WHERE g.hosting_server_id = host.server_id AND g.advertised_server_id = advertised.server_id
+    )
+'''
+
+
+class SyncPlan:
+    def __init__(self, servers, missing):
+        # server_id -> (forum_channel_id, server_name, advertisement, tags, invite_url)
+        self.servers = servers
+        # (hosting_server_id, advertised_server_id) pairs that have no thread yet
+        self.missing = missing
+
+    def __len__(self):
+        return len(self.missing)
+
+    def by_host(self):
+        hosts = {}
+        for host_id, advertised_id in self.missing:
+            hosts.setdefault(host_id, []).append(advertised_id)
+        return hosts
+
+
+def build_sync_plan(conn, server_id=None):
+    """Plan the threads missing for ``server_id`` in both directions, or for the whole network."""
+    servers = {row[0]: row[1:] for row in conn.execute(
+        'SELECT server_id, forum_channel_id, server_name, advertisement, tags, invite_url FROM servers'
+    )}
+
+    if server_id is None:
+        missing = conn.execute(MISSING_PAIRS_SQL.format(where='')).fetchall()
+    elif server_id not in servers:
+        missing = []
+    else:
+        # Two narrow branches keep the single-server plan O(N) instead of scanning every pair
+        missing = conn.execute(
+            MISSING_PAIRS_SQL.format(where='host.server_id = ? AND')
+            + ' UNION ALL '
+            + MISSING_PAIRS_SQL.format(where='advertised.server_id = ? AND'),
+            (server_id, server_id)
+        ).fetchall()
+
+    return SyncPlan(servers, missing)
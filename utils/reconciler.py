@@ -0,0 +1,208 @@
+"""Background drift detection for mirrored partner threads.
+
+The reconciler walks ``global_partner_threads`` in thread-ID order, a small
+batch per tick, and compares each thread's title, tags and starter message
+with what the current ``servers`` row would render. Only threads whose
+fingerprint differs get a ``repair_thread`` job; threads that no longer
+exist are tombstoned for the registry sweep. Only reads that miss the
+gateway and channel caches go to REST, and each one takes a token from a
+bucket, so a full pass over a large network is spread out instead of
+competing with bumps and interactions.
+
+``enqueue_registration_refresh`` is the push side: after a server edits its
+registration, only threads whose stored ``ad_hash`` differs from the new ad
+are queued, and their repair edits only the fields that changed. Bumps keep
+their own ``bump_hash``, so a bump never makes an ad look stale, and the
+reconciler leaves the content of a bumped message alone.
+"""
+
+import time
+
+import discord
+
+from utils.database import UnitOfWork
+from utils.partner_ads import ad_drift, ad_fingerprint, ad_renderer, parse_added_line
+from utils.shard_metrics import shard_clause
+
+BATCH_SQL = '''
+    SELECT g.thread_id, g.ad_hash, g.bump_hash, g.advertised_server_id, s.server_name, s.advertisement, s.tags, s.invite_url
+    FROM global_partner_threads AS g
+    JOIN servers AS s ON s.server_id = g.advertised_server_id
+    WHERE g.thread_id > ? AND {shards}
+    ORDER BY g.thread_id LIMIT ?
+'''
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost=1):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+
+class Reconciler:
+    def __init__(self, db, channels, queue, registry, batch_size=50, rate=2.0, burst=20, slice_seconds=5.0, shards=None):
+        self.db = db
+        self.channels = channels
+        self.queue = queue
+        self.registry = registry
+        self.batch_size = batch_size
+        # One token per REST read; a check needs none when the thread and its starter message are cached
+        self.budget = TokenBucket(rate, burst)
+        self.slice_seconds = slice_seconds
+        # Only threads hosted in this process's guilds, which are also the ones in its gateway cache
+        shard_filter, self.shard_params = shard_clause('g.hosting_server_id', shards)
+        self.batch_sql = BATCH_SQL.format(shards=shard_filter)
+        self.cursor = 0
+        self.cycle_started = time.time()
+        self.last_cycle_seconds = None
+        self.cycles = 0
+        self.counts = self._zero_counts()
+        self.last_counts = None
+
+    @staticmethod
+    def _zero_counts():
+        return {'checked': 0, 'in_sync': 0, 'drifted': 0, 'missing': 0, 'no_starter': 0, 'errors': 0}
+
+    async def tick(self):
+        """Check threads until the batch, the time slice or the token budget runs out; returns threads checked."""
+        started = time.monotonic()
+        rows = await self.db.fetchall(self.batch_sql, (self.cursor, *self.shard_params, self.batch_size))
+        if not rows:
+            self._finish_cycle()
+            return 0
+
+        checked = 0
+        # Hash backfills from the whole batch go out in one transaction
+        async with UnitOfWork(self.db, self.batch_size) as writes:
+            for row in rows:
+                if time.monotonic() - started > self.slice_seconds:
+                    break
+                if not await self.check(writes, *row):
+                    # Out of REST budget; this thread is checked first next tick
+                    break
+                self.cursor = row[0]
+                checked += 1
+        return checked
+
+    def _finish_cycle(self):
+        now = time.time()
+        self.last_cycle_seconds = now - self.cycle_started
+        self.last_counts = self.counts
+        self.counts = self._zero_counts()
+        self.cycle_started = now
+        self.cursor = 0
+        self.cycles += 1
+
+    async def check(self, writes, thread_id, stored_hash, bump_hash, advertised_id, server_name, advertisement, tags_str, invite_url):
+        """Compare one thread with its registration; returns False if the REST budget ran out first."""
+        thread = self.channels.cached(thread_id)
+        if thread is None:
+            if not self.budget.take():
+                return False
+            try:
+                thread = await self.channels.resolve(thread_id)
+            except discord.NotFound:
+                self.counts['checked'] += 1
+                self.counts['missing'] += 1
+                await self.registry.tombstone('thread', thread_id, 'missing during reconcile')
+                return True
+            except discord.HTTPException as e:
+                self.counts['checked'] += 1
+                self.counts['errors'] += 1
+                print(f"Reconciler could not read thread {thread_id}: {e}")
+                return True
+
+        message = thread.starter_message
+        if message is None:
+            if not self.budget.take():
+                # The resolved thread stays in the channel cache for the retry
+                return False
+            try:
+                message = await thread.fetch_message(thread_id)
+            except discord.NotFound:
+                # The thread is still there, only its starter message was deleted; nothing to compare or edit
+                self.counts['checked'] += 1
+                self.counts['no_starter'] += 1
+                return True
+            except discord.HTTPException as e:
+                self.counts['checked'] += 1
+                self.counts['errors'] += 1
+                print(f"Reconciler could not read the starter message of thread {thread_id}: {e}")
+                return True
+        self.counts['checked'] += 1
+
+        # Keep the forum and date the ad was originally posted with
+        added = parse_added_line(message.content) or ("Nomons's Cottage", time.strftime('%m/%d/%Y'))
+        expected = ad_renderer.render(advertised_id, server_name, advertisement, tags_str, invite_url, *added)
+
+        forum = thread.parent
+        # Without the forum in the cache every expected tag counts, as in the repair itself
+        available = {tag.name for tag in forum.available_tags} if forum is not None else None
+        drift = ad_drift(expected, thread.name, message.content, [tag.name for tag in thread.applied_tags], available)
+        if bump_hash is not None:
+            # The message shows the last bump (propagate_bump may set content=), which a repair would overwrite
+            drift.pop('content', None)
+        ad_hash = ad_fingerprint(expected.title, expected.content, expected.tags)
+        if not drift:
+            self.counts['in_sync'] += 1
+            if stored_hash != ad_hash:
+                # Backfills rows created before ad hashes were stored
+                await writes.execute('UPDATE global_partner_threads SET ad_hash = ? WHERE thread_id = ?', (ad_hash, thread_id))
+            return True
+
+        self.counts['drifted'] += 1
+        payload = dict(drift, thread_id=thread_id, ad_hash=ad_hash)
+        await self.queue.enqueue('repair_thread', payload, key=f"repair_thread:{thread_id}", lane=thread_id, replace=True)
+        return True
+
+    def stats(self):
+        # The last pass's size stands in for a COUNT(*) join over the whole table
+        remaining = None
+        if self.last_counts is not None:
+            remaining = max(0, self.last_counts['checked'] - self.counts['checked'])
+        return {
+            'backlog': remaining,
+            'cursor': self.cursor,
+            'cycles': self.cycles,
+            'cycle_elapsed': time.time() - self.cycle_started,
+            'last_cycle_seconds': self.last_cycle_seconds,
+            'current': dict(self.counts),
+            'last': self.last_counts,
+            'tokens': self.budget.tokens,
+        }
+
+
+async def enqueue_registration_refresh(queue, db, server_id):
+    """Queue a re-render of every mirrored ad for ``server_id`` that does not already show its registration."""
+    row = await db.fetchone(
+        'SELECT server_name, advertisement, tags, invite_url FROM servers WHERE server_id = ?', (server_id,)
+    )
+    if row is None:
+        return 0
+
+    registration = [server_id, *row]
+    # The fingerprint ignores the "💌 Added" line, so any portal and date give the same hash
+    ad = ad_renderer.render(*registration, "Nomons's Cottage", time.strftime('%m/%d/%Y'))
+    ad_hash = ad_fingerprint(ad.title, ad.content, ad.tags)
+
+    rows = await db.fetchall(
+        'SELECT thread_id FROM global_partner_threads WHERE advertised_server_id = ? AND ad_hash IS NOT ?',
+        (server_id, ad_hash)
+    )
+    jobs = [
+        ('repair_thread', {'thread_id': thread_id, 'registration': registration, 'ad_hash': ad_hash},
+         f"repair_thread:{thread_id}", thread_id)
+        for thread_id, in rows
+    ]
+    return await queue.enqueue_many(jobs, replace=True)
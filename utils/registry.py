@@ -0,0 +1,138 @@
+"""Keeps the partner registry in step with what still exists on Discord.
+
+Gateway listeners record each vanished guild, forum or thread as a row in
+``tombstones``, and ``sweep`` periodically removes everything those
+tombstones point at in one transaction: registry rows, and pending jobs
+that would only 404. Bumps and syncs then stop spending REST calls on
+targets that are already gone.
+"""
+
+import json
+import sqlite3
+import time
+
+TOMBSTONE_SQL = 'INSERT OR IGNORE INTO tombstones (kind, target_id, reason, created_at) SELECT ?, ?, ?, ?'
+
+# Only tombstone IDs the registry actually references; most channel events are for unrelated channels
+REFERENCED = {
+    'guild': '''WHERE EXISTS (SELECT 1 FROM servers WHERE server_id = ?2)
+                   OR EXISTS (SELECT 1 FROM partner_threads WHERE server_id = ?2)
+                   OR EXISTS (SELECT 1 FROM global_partner_threads WHERE hosting_server_id = ?2)''',
+    'forum': 'WHERE EXISTS (SELECT 1 FROM servers WHERE forum_channel_id = ?2)',
+    'thread': '''WHERE EXISTS (SELECT 1 FROM global_partner_threads WHERE thread_id = ?2)
+                    OR EXISTS (SELECT 1 FROM partner_threads WHERE thread_id = ?2)''',
+}
+
+
+def duplicate_threads(conn):
+    """Threads migration 3 dropped as duplicates; they still exist on Discord until an operator deletes them."""
+    try:
+        rows = conn.execute('''
+            SELECT thread_id FROM duplicate_threads
+            WHERE thread_id NOT IN (SELECT thread_id FROM global_partner_threads WHERE thread_id IS NOT NULL)
+              AND thread_id NOT IN (SELECT thread_id FROM partner_threads WHERE thread_id IS NOT NULL)
+            ORDER BY thread_id
+        ''').fetchall()
+    except sqlite3.OperationalError:
+        # Not migrated past version 3 yet
+        return []
+    return [thread_id for thread_id, in rows]
+
+
+def queue_duplicate_deletions(conn):
+    """Queue a ``delete_thread`` job for every thread in ``duplicate_threads``; returns the thread IDs."""
+    thread_ids = duplicate_threads(conn)
+    now = time.time()
+    # Same shape as the delete_thread jobs /delete_all_threads queues, laned by thread
+    conn.executemany(
+        '''INSERT OR IGNORE INTO jobs (kind, payload, lane, idempotency_key, created_at, updated_at)
+           VALUES ('delete_thread', ?, ?, ?, ?, ?)''',
+        [(json.dumps({'thread_id': thread_id, 'reason': "Duplicate partner thread"}), thread_id,
+          f"delete_thread:{thread_id}", now, now) for thread_id in thread_ids]
+    )
+    conn.execute('DELETE FROM duplicate_threads')
+    return thread_ids
+
+
+def remove_server_rows(conn, server_id):
+    """Drop a server and every thread it hosts or is advertised in."""
+    # servers_tags_delete drops its server_tags rows
+    conn.execute('DELETE FROM servers WHERE server_id = ?', (server_id,))
+    conn.execute('DELETE FROM partner_threads WHERE server_id = ?', (server_id,))
+    conn.execute('DELETE FROM global_partner_threads WHERE hosting_server_id = ? OR advertised_server_id = ?', (server_id, server_id))
+
+
+def _sweep_guilds(conn, guild_ids):
+    # The bot can no longer reach anything inside these guilds. Ads for them in
+    # other forums stay; those threads still exist and are ours to manage.
+    for guild_id in guild_ids:
+        conn.execute('DELETE FROM servers WHERE server_id = ?', (guild_id,))
+        conn.execute('DELETE FROM partner_threads WHERE server_id = ?', (guild_id,))
+        conn.execute('DELETE FROM global_partner_threads WHERE hosting_server_id = ?', (guild_id,))
+    # create_thread jobs are laned by hosting guild
+    conn.executemany("DELETE FROM jobs WHERE status = 'pending' AND lane = ?", [(guild_id,) for guild_id in guild_ids])
+
+
+def _sweep_forums(conn, forum_ids):
+    for forum_id in forum_ids:
+        hosts = [row[0] for row in conn.execute('SELECT server_id FROM servers WHERE forum_channel_id = ?', (forum_id,))]
+        # Deleting a forum deletes its threads too, without a thread delete event for each
+        for host_id in hosts:
+            threads = [(row[0],) for row in conn.execute(
+                'SELECT thread_id FROM global_partner_threads WHERE hosting_server_id = ?', (host_id,))]
+            conn.execute('DELETE FROM global_partner_threads WHERE hosting_server_id = ?', (host_id,))
+            conn.executemany("DELETE FROM jobs WHERE status = 'pending' AND lane = ?", threads)
+            conn.execute("DELETE FROM jobs WHERE status = 'pending' AND kind = 'create_thread' AND lane = ?", (host_id,))
+        # The server stays registered but is skipped by syncs until it sets a new forum
+        conn.execute('UPDATE servers SET forum_channel_id = NULL WHERE forum_channel_id = ?', (forum_id,))
+
+
+def _sweep_threads(conn, thread_ids):
+    params = [(thread_id,) for thread_id in thread_ids]
+    conn.executemany('DELETE FROM global_partner_threads WHERE thread_id = ?', params)
+    conn.executemany('DELETE FROM partner_threads WHERE thread_id = ?', params)
+    # edit_message and delete_thread jobs are laned by thread
+    conn.executemany("DELETE FROM jobs WHERE status = 'pending' AND lane = ?", params)
+
+
+SWEEPERS = {
+    'guild': _sweep_guilds,
+    'forum': _sweep_forums,
+    'thread': _sweep_threads,
+}
+
+
+class RegistrySync:
+    def __init__(self, db, batch_size=500):
+        self.db = db
+        self.batch_size = batch_size
+        self.swept = 0
+
+    async def tombstone(self, kind, target_id, reason=None):
+        """Record that ``target_id`` is gone; returns True if the registry referenced it."""
+        return await self.db.execute(
+            f'{TOMBSTONE_SQL} {REFERENCED[kind]}',
+            (kind, target_id, reason, time.time())
+        ) > 0
+
+    async def pending(self):
+        row = await self.db.fetchone('SELECT COUNT(*) FROM tombstones')
+        return row[0]
+
+    async def sweep(self):
+        """Apply up to ``batch_size`` tombstones in one transaction; returns how many were applied."""
+        def _sweep(conn):
+            rows = conn.execute(
+                'SELECT kind, target_id FROM tombstones ORDER BY created_at LIMIT ?', (self.batch_size,)
+            ).fetchall()
+            by_kind = {}
+            for kind, target_id in rows:
+                by_kind.setdefault(kind, []).append(target_id)
+            for kind, target_ids in by_kind.items():
+                SWEEPERS[kind](conn, target_ids)
+            conn.executemany('DELETE FROM tombstones WHERE kind = ? AND target_id = ?', rows)
+            return len(rows)
+
+        swept = await self.db.run(_sweep)
+        self.swept += swept
+        return swept
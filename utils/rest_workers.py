@@ -0,0 +1,277 @@
+"""Worker processes that run job-queue handlers away from the gateway process.
+
+Each worker logs in with the bot token over REST only (no gateway
+connection) and executes the same handlers as ``utils.discord_jobs``. The
+gateway process keeps claiming jobs and recording their results, so its
+event loop stays free to acknowledge interactions within Discord's deadline.
+
+Jobs reach a worker through its own multiprocessing queue and run as tasks
+on the worker's event loop, so one process has as many requests in flight
+as the job queue hands it. A job is sent to the worker picked by the
+channel its writes land in, which keeps each rate-limit bucket inside one
+process's limiter; a global 429 seen by any worker pauses all of them
+through a shared deadline. Workers ship the route, status and duration of
+every call back to the gateway process for ``/metrics``.
+
+Workers have no gateway to tell them a channel changed, so their channel
+cache uses a short TTL. Each worker reports the channels it fetches, and
+the gateway process forwards a ``ChannelResolver.invalidate`` only for
+those still inside that TTL, rather than for every channel and thread
+update in every guild.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+
+import discord
+
+# Workers only learn about channel edits through forwarded invalidations, so their cache expires sooner
+WORKER_RESOLVER_TTL = 30
+
+
+class RemoteJobError(Exception):
+    """Picklable stand-in for an exception raised inside a worker process."""
+
+    def __init__(self, message, status=None, retry_after=None, transient=False):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        # Network-level failures that are worth retrying
+        self.transient = transient
+
+    def __reduce__(self):
+        return (RemoteJobError, (str(self), self.status, self.retry_after, self.transient))
+
+
+def _remote_error(e):
+    if isinstance(e, discord.RateLimited):
+        return RemoteJobError(str(e), status=429, retry_after=e.retry_after)
+    if isinstance(e, discord.HTTPException):
+        headers = getattr(e.response, 'headers', None) or {}
+        retry_after = headers.get('Retry-After') or headers.get('X-RateLimit-Reset-After')
+        return RemoteJobError(str(e), status=e.status, retry_after=float(retry_after) if retry_after else None)
+    if isinstance(e, (OSError, asyncio.TimeoutError)):
+        return RemoteJobError(f"{type(e).__name__}: {e}", transient=True)
+    return RemoteJobError(f"{type(e).__name__}: {e}")
+
+
+def _worker_trace(results, paused_until):
+    """TraceConfig that waits out a global 429 from any worker and reports each call to the parent."""
+    import aiohttp
+
+    from utils.metrics import route_of
+
+    async def on_request_start(session, context, params):
+        # Awaited before the request goes out, so sleeping here holds it back
+        while True:
+            wait = paused_until.value - time.time()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        response = params.response
+        if response.status == 429 and (response.headers.get('X-RateLimit-Global')
+                                       or response.headers.get('X-RateLimit-Scope') == 'global'):
+            retry_after = float(response.headers.get('Retry-After') or 1.0)
+            with paused_until.get_lock():
+                paused_until.value = max(paused_until.value, time.time() + retry_after)
+        results.put(('trace', params.method, route_of(params.url.path), response.status,
+                     time.perf_counter() - context.started))
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+
+async def _run_job(client, results, request_id, kind, payload):
+    from utils.discord_jobs import HANDLERS
+
+    try:
+        result = await HANDLERS[kind](client, payload)
+    except Exception as e:
+        results.put(('result', request_id, None, _remote_error(e)))
+    else:
+        results.put(('result', request_id, result, None))
+
+
+async def _serve(token, requests, results, paused_until, api_base):
+    from utils.channel_cache import ChannelResolver
+    from utils.partner_ads import forum_tags
+
+    if api_base:
+        discord.http.Route.BASE = api_base
+    client = discord.Client(intents=discord.Intents.none(), http_trace=_worker_trace(results, paused_until))
+    # login() only sets up the HTTP session; connect() is never called
+    await client.login(token)
+    channels = client.channel_resolver = ChannelResolver(
+        client, ttl=WORKER_RESOLVER_TTL, on_fetch=lambda channel_id: results.put(('fetched', channel_id))
+    )
+
+    loop = asyncio.get_running_loop()
+    running = set()
+    try:
+        while True:
+            message = await loop.run_in_executor(None, requests.get)
+            if message is None:
+                break
+            if message[0] == 'invalidate':
+                channels.invalidate(message[1])
+                forum_tags.invalidate(message[1])
+                continue
+            _, request_id, kind, payload = message
+            task = asyncio.create_task(_run_job(client, results, request_id, kind, payload))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        for task in running:
+            task.cancel()
+        await client.close()
+
+
+def _worker_main(token, requests, results, paused_until, api_base):
+    asyncio.run(_serve(token, requests, results, paused_until, api_base))
+
+
+class RestWorkerPool:
+    def __init__(self, token, processes=2, api_base=None):
+        self.token = token
+        self.processes = processes
+        # Another API root for every worker, e.g. the load test's fake Discord
+        self.api_base = api_base
+        self._context = multiprocessing.get_context('spawn')
+        self._results = self._context.Queue()
+        # Wall-clock time until which every worker holds its requests after a global 429
+        self._paused_until = self._context.Value('d', 0.0)
+        self._loop = asyncio.get_running_loop()
+        self._ids = itertools.count()
+        self._pending = {}  # request_id -> (worker index, future)
+        self._requests = [None] * processes
+        self._workers = [None] * processes
+        self._round_robin = itertools.count()
+        # channel_id -> monotonic time a worker's cached copy expires; only these are worth an invalidation
+        self._worker_cached = {}
+        self._closed = False
+        for index in range(processes):
+            self._start_worker(index)
+        self._reader = threading.Thread(target=self._read_results, name='nomon-rest-results', daemon=True)
+        self._reader.start()
+
+    def _start_worker(self, index):
+        # A fresh request queue, so a replacement never runs jobs already failed back to the queue
+        self._requests[index] = self._context.Queue()
+        self._workers[index] = self._context.Process(
+            target=_worker_main, name=f'nomon-rest-worker-{index}', daemon=True,
+            args=(self.token, self._requests[index], self._results, self._paused_until, self.api_base)
+        )
+        self._workers[index].start()
+
+    def _read_results(self):
+        from utils.metrics import record_rest_call
+
+        while True:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if self._closed:
+                    return
+                for index, worker in enumerate(self._workers):
+                    if not worker.is_alive():
+                        self._loop.call_soon_threadsafe(self._replace_worker, index, worker)
+                continue
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            if message[0] == 'trace':
+                # Metric dicts belong to the event loop thread
+                self._loop.call_soon_threadsafe(record_rest_call, *message[1:])
+            elif message[0] == 'fetched':
+                self._loop.call_soon_threadsafe(self._note_fetched, message[1])
+            else:
+                self._loop.call_soon_threadsafe(self._resolve, *message[1:])
+
+    def _note_fetched(self, channel_id):
+        now = time.monotonic()
+        self._worker_cached[channel_id] = now + WORKER_RESOLVER_TTL
+        if len(self._worker_cached) > 4096:
+            self._worker_cached = {key: expires for key, expires in self._worker_cached.items() if expires > now}
+
+    def _resolve(self, request_id, result, error):
+        _, future = self._pending.pop(request_id, (None, None))
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _replace_worker(self, index, worker):
+        if self._closed or self._workers[index] is not worker:
+            return
+        print(f"REST worker {index} exited with code {worker.exitcode}; starting a new one")
+        for request_id, (owner, future) in list(self._pending.items()):
+            if owner == index:
+                del self._pending[request_id]
+                if not future.done():
+                    future.set_exception(RemoteJobError("REST worker process exited", transient=True))
+        self._start_worker(index)
+
+    async def run(self, kind, payload, channel_id=None):
+        if channel_id is not None:
+            index = (channel_id >> 22) % self.processes
+        else:
+            index = next(self._round_robin) % self.processes
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = (index, future)
+        self._requests[index].put(('run', request_id, kind, payload))
+        try:
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    def handlers(self, kinds, bucket_keys=None):
+        """Job-queue handlers that forward each kind to the pool.
+
+        ``bucket_keys`` maps a kind to the payload field holding the channel
+        its writes go to; jobs for one channel always go to the same worker.
+        """
+        bucket_keys = bucket_keys or {}
+
+        def forward(kind):
+            field = bucket_keys.get(kind)
+
+            async def handler(bot, payload):
+                return await self.run(kind, payload, payload.get(field) if field else None)
+            return handler
+
+        return {kind: forward(kind) for kind in kinds}
+
+    def invalidate(self, channel_id):
+        """Drop ``channel_id`` from every worker's channel cache and forum tag index, if a worker may hold it."""
+        expires = self._worker_cached.pop(channel_id, None)
+        if expires is None or expires <= time.monotonic():
+            return
+        for requests in self._requests:
+            requests.put(('invalidate', channel_id))
+
+    def shutdown(self):
+        self._closed = True
+        for requests in self._requests:
+            requests.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self._results.put(None)
+        for _, future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
@@ -0,0 +1,74 @@
+import time
+from collections import defaultdict, deque
+
+
+def shard_for_guild(guild_id, shard_count):
+    # Discord's documented routing formula
+    return (guild_id >> 22) % max(shard_count or 1, 1)
+
+
+def local_shards(bot):
+    """``(shard_count, shard_ids)`` when this process runs only some shards, else None."""
+    shard_ids = getattr(bot, 'shard_ids', None)
+    shard_count = getattr(bot, 'shard_count', None)
+    if not shard_ids or not shard_count or set(range(shard_count)) <= set(shard_ids):
+        return None
+    return shard_count, sorted(shard_ids)
+
+
+def shard_clause(column, shards):
+    """SQL condition and params keeping rows whose guild ID ``column`` routes to ``shards``.
+
+    Background sweeps use this so that, with one process per group of
+    shards, each guild is swept by exactly one process.
+    """
+    if shards is None:
+        return '1', ()
+    shard_count, shard_ids = shards
+    return f"(({column} >> 22) % ?) IN ({', '.join('?' for _ in shard_ids)})", (shard_count, *shard_ids)
+
+
+class ShardMetrics:
+    """Rolling per-shard event rates plus connect/disconnect/resume counts."""
+
+    def __init__(self, window=60):
+        self.window = window
+        self._events = defaultdict(deque)
+        self.connects = defaultdict(int)
+        self.disconnects = defaultdict(int)
+        self.resumes = defaultdict(int)
+        self.last_disconnect = {}
+
+    def record_event(self, shard_id):
+        now = time.monotonic()
+        events = self._events[shard_id]
+        events.append(now)
+        self._trim(events, now)
+
+    def _trim(self, events, now):
+        while events and events[0] < now - self.window:
+            events.popleft()
+
+    def events_per_minute(self, shard_id):
+        events = self._events.get(shard_id)
+        if not events:
+            return 0.0
+        self._trim(events, time.monotonic())
+        return len(events) * 60 / self.window
+
+    def record_connect(self, shard_id):
+        self.connects[shard_id] += 1
+
+    def record_disconnect(self, shard_id):
+        self.disconnects[shard_id] += 1
+        self.last_disconnect[shard_id] = time.time()
+
+    def record_resume(self, shard_id):
+        self.resumes[shard_id] += 1
+
+
+def get_shard_metrics(bot):
+    metrics = getattr(bot, 'shard_metrics', None)
+    if metrics is None:
+        metrics = bot.shard_metrics = ShardMetrics()
+    return metrics
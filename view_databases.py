@@ -1,62 +1,138 @@
-import sqlite3
+import argparse
+import csv
+import json
 import os
+import pathlib
+import sqlite3
+import sys
 
-def view_database(db_path, db_name):
-    if not os.path.exists(db_path):
-        print(f"Database {db_name} does not exist.")
-        return
+from utils.db_inspect import column_names, database_summary, iter_rows, table_names
+
+DEFAULT_PRINT_LIMIT = 50
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
 
-    # Get all table names
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cursor.fetchall()
+def connect_readonly(db_path):
+    # mode=ro means a --where clause can never write, and nothing gets migrated or created
+    return sqlite3.connect(pathlib.Path(db_path).resolve().as_uri() + '?mode=ro', uri=True)
+
+
+def view_database(db_path, db_name, exact=False):
+    conn = connect_readonly(db_path)
+    summary = database_summary(conn, exact)
 
     print(f"=== {db_name.upper()} DATABASE ===")
-    if not tables:
+    print(f"Size: {summary['size_bytes'] / 2**20:.1f} MiB ({summary['free_bytes'] / 2**20:.1f} MiB free), "
+          f"journal: {summary['journal_mode']}")
+    if not summary['tables']:
         print("No tables found in this database.")
         conn.close()
         return
 
-    for table_name, in tables:
+    for table_name, (rows, estimated) in summary['tables'].items():
         print(f"\n--- Table: {table_name} ---")
+        print(f"Columns: {', '.join(column_names(conn, table_name))}")
+        print(f"Rows: {'~' if estimated else ''}{rows}")
+
+    conn.close()
 
-        # Get column names
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-        print(f"Columns: {', '.join(column_names)}")
 
-        # Get all rows
-        cursor.execute(f"SELECT * FROM {table_name}")
-        rows = cursor.fetchall()
+def parse_key(text):
+    """``--after 12`` or ``--after Gaming,123`` for a composite key."""
+    parts = []
+    for part in text.split(','):
+        try:
+            parts.append(int(part))
+        except ValueError:
+            parts.append(part)
+    return tuple(parts)
 
-        if not rows:
-            print("No data in table")
+
+def dump_table(db_path, args):
+    conn = connect_readonly(db_path)
+    if args.table not in table_names(conn):
+        conn.close()
+        raise ValueError(f"No table named {args.table!r}")
+    columns = column_names(conn, args.table)
+    limit = args.limit
+    if limit is None and not args.export:
+        limit = DEFAULT_PRINT_LIMIT
+    rows = iter_rows(conn, args.table, where=args.where, after=parse_key(args.after) if args.after else None,
+                     limit=limit, page_size=args.page_size)
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    written, last_key = 0, None
+    try:
+        if args.export == 'csv':
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            for last_key, row in rows:
+                writer.writerow(row)
+                written += 1
+        elif args.export == 'jsonl':
+            for last_key, row in rows:
+                out.write(json.dumps(dict(zip(columns, row))) + '\n')
+                written += 1
         else:
-            print(f"Data ({len(rows)} rows):")
-            for row in rows:
+            print(f"--- Table: {args.table} ---")
+            print(f"Columns: {', '.join(columns)}")
+            for last_key, row in rows:
                 print(f"  {row}")
+                written += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        conn.close()
+
+    # Status goes to stderr so it never ends up inside an export piped from stdout
+    print(f"{written} rows", file=sys.stderr)
+    if limit is not None and written == limit and last_key is not None:
+        print(f"More rows may follow; continue with --after {','.join(str(part) for part in last_key)}", file=sys.stderr)
 
-    conn.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Inspect the bot's databases without loading whole tables.")
+    parser.add_argument('--db', help="database file; defaults to every .db in databases/ (summary) or bump.db (--table)")
+    parser.add_argument('--table', help="stream the rows of this table instead of printing the summary")
+    parser.add_argument('--where', help="SQL condition the rows must match, e.g. \"advertised_server_id = 123\"")
+    parser.add_argument('--limit', type=int,
+                        help=f"stop after this many rows (default {DEFAULT_PRINT_LIMIT} when printing, all when exporting)")
+    parser.add_argument('--after', help="resume after this key (rowid, or comma-separated primary key)")
+    parser.add_argument('--page-size', type=int, default=500, help="rows fetched per query")
+    parser.add_argument('--export', choices=('csv', 'jsonl'), help="write rows in this format instead of printing them")
+    parser.add_argument('--output', help="file to export to (default: stdout)")
+    parser.add_argument('--exact', action='store_true', help="COUNT(*) every table instead of using ANALYZE estimates")
+    args = parser.parse_args()
+
     databases_dir = 'databases'
-    if not os.path.exists(databases_dir):
-        print("Databases directory does not exist.")
+    if args.table:
+        db_path = args.db or os.path.join(databases_dir, 'bump.db')
+        if not os.path.exists(db_path):
+            parser.error(f"Database {db_path} does not exist.")
+        try:
+            dump_table(db_path, args)
+        except (ValueError, sqlite3.Error) as e:
+            parser.error(str(e))
         return
 
-    db_files = [f for f in os.listdir(databases_dir) if f.endswith('.db')]
+    if args.db:
+        db_files = [args.db]
+    else:
+        if not os.path.exists(databases_dir):
+            print("Databases directory does not exist.")
+            return
+        db_files = [os.path.join(databases_dir, f) for f in sorted(os.listdir(databases_dir)) if f.endswith('.db')]
     if not db_files:
         print("No database files found.")
         return
 
-    for db_file in db_files:
-        db_path = os.path.join(databases_dir, db_file)
-        db_name = db_file[:-3]  # Remove .db extension
-        view_database(db_path, db_name)
+    for db_path in db_files:
+        if not os.path.exists(db_path):
+            print(f"Database {db_path} does not exist.")
+            continue
+        db_name = os.path.basename(db_path)[:-3]  # Remove .db extension
+        view_database(db_path, db_name, args.exact)
         print("\n" + "="*50 + "\n")
 
+
 if __name__ == "__main__":
     main()